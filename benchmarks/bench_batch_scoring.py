@@ -0,0 +1,128 @@
+'''
+Throughput and peak RSS of `score_file` on synthetic featured census
+rows, against loading the whole input and scoring it at once.
+
+A small forest and featurizer are fitted on 100k rows and gzip-pickled
+like the notebooks' final artifacts. Each run is a fresh process so peak
+RSS is not shared (worker processes are not counted).
+
+Run from the repository root:
+
+    python benchmarks/bench_batch_scoring.py --sizes 100000 1000000 10000000
+
+'''
+
+# standard libraries
+import argparse
+import gzip
+import os
+import pickle
+import subprocess
+import sys
+import tempfile
+import time
+
+import pandas as pd
+
+# make the repository root importable
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from functions import TreeFeaturizer, load_pickle, score_file, score_trees
+from bench_load_census import peak_rss_mb
+from bench_sparse_encoding import census_rows
+
+
+def write_artifacts(directory, n_estimators):
+    from sklearn.ensemble import RandomForestClassifier
+    from sklearn.preprocessing import MinMaxScaler
+
+    trees = census_rows(100000)
+    featurizer = TreeFeaturizer().fit(trees)
+    scaler = MinMaxScaler().fit(featurizer.transform(trees))
+    model = RandomForestClassifier(n_estimators=n_estimators, max_depth=20,
+                                   class_weight='balanced', random_state=99)
+    model.fit(scaler.transform(featurizer.transform(trees)), trees['health'])
+
+    for name, obj in [('featurizer', featurizer), ('scaler', scaler),
+                      ('model', model)]:
+        with gzip.open(os.path.join(directory, f'{name}.pickle'),
+                       'wb') as goodbye:
+            pickle.dump(obj, goodbye, protocol=pickle.HIGHEST_PROTOCOL)
+
+
+def write_input(path, n, chunksize=500000):
+    '''
+    Write n featured rows to Parquet, a chunk at a time.
+    '''
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    writer = None
+    for i, start in enumerate(range(0, n, chunksize)):
+        trees = census_rows(min(chunksize, n - start), seed=i)
+        trees.index = pd.RangeIndex(start, start + len(trees))
+        table = pa.Table.from_pandas(trees)
+        if writer is None:
+            writer = pq.ParquetWriter(path, table.schema)
+        writer.write_table(table)
+    writer.close()
+
+
+def run(mode, n, directory, chunksize, n_jobs):
+    artifacts = [os.path.join(directory, f'{name}.pickle')
+                 for name in ['featurizer', 'model', 'scaler']]
+    input_path = os.path.join(directory, f'trees_{n}.parquet')
+    output_path = os.path.join(directory, f'scores_{n}.parquet')
+
+    start = time.perf_counter()
+    if mode == 'in memory':
+        featurizer, model, scaler = map(load_pickle, artifacts)
+        score_trees(pd.read_parquet(input_path), featurizer, model,
+                    scaler).to_parquet(output_path)
+    else:
+        score_file(input_path, output_path, *artifacts[:2],
+                   scaler_path=artifacts[2], chunksize=chunksize,
+                   n_jobs=n_jobs)
+    elapsed = time.perf_counter() - start
+
+    print(f'{n:>9} {mode:>10} {elapsed:>9.1f} {n / elapsed:>10,.0f} '
+          f'{peak_rss_mb():>14.1f}')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--sizes', type=int, nargs='+',
+                        default=[100000, 1000000, 10000000])
+    parser.add_argument('--chunksize', type=int, default=100000)
+    parser.add_argument('--n-jobs', type=int, default=-1)
+    parser.add_argument('--n-estimators', type=int, default=50)
+    parser.add_argument('--in-memory-max', type=int, default=1000000,
+                        help='largest size also scored all at once')
+    parser.add_argument('--mode')
+    parser.add_argument('--rows', type=int)
+    parser.add_argument('--directory')
+    args = parser.parse_args()
+
+    if args.mode:
+        run(args.mode, args.rows, args.directory, args.chunksize, args.n_jobs)
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        write_artifacts(tmp, args.n_estimators)
+
+        print(f'{"rows":>9} {"mode":>10} {"time (s)":>9} {"rows/s":>10} '
+              f'{"peak RSS (MB)":>14}')
+        for n in args.sizes:
+            write_input(os.path.join(tmp, f'trees_{n}.parquet'), n)
+            modes = ['chunked']
+            if n <= args.in_memory_max:
+                modes.insert(0, 'in memory')
+            for mode in modes:
+                subprocess.run([sys.executable, __file__, '--mode', mode,
+                                '--rows', str(n), '--directory', tmp,
+                                '--chunksize', str(args.chunksize),
+                                '--n-jobs', str(args.n_jobs)], check=True)
+            os.remove(os.path.join(tmp, f'trees_{n}.parquet'))
+
+
+if __name__ == '__main__':
+    main()
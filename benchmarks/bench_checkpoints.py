@@ -0,0 +1,98 @@
+'''
+Compare loading a pipeline stage from a gzip pickle (as the notebooks
+do) with `load_checkpoint` from Parquet: full loads, a few columns, and
+only volunteer rows.
+
+Each load runs in a fresh process so peak RSS is not shared.
+
+Run from the repository root:
+
+    python benchmarks/bench_checkpoints.py --rows 683788
+
+'''
+
+# standard libraries
+import argparse
+import gzip
+import os
+import pickle
+import subprocess
+import sys
+import tempfile
+import time
+
+# make the repository root importable
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from functions import (load_census, load_checkpoint, save_checkpoint,
+                       write_synthetic_census)
+from bench_load_census import peak_rss_mb
+
+
+NAME = 'nyc_trees_initial_clean'
+
+LOADS = {
+    'gzip pickle': None,
+    'parquet': {},
+    'parquet, 3 columns': {'columns': ['health', 'latitude', 'longitude']},
+    'parquet, volunteers': {'filters': [('user_type', '==', 'Volunteer')]},
+}
+
+
+def run(load, directory):
+    start = time.perf_counter()
+    if LOADS[load] is None:
+        with gzip.open(os.path.join(directory, f'{NAME}.pkl'), 'rb') as hello:
+            trees = pickle.load(hello)
+    else:
+        trees = load_checkpoint(NAME, directory, **LOADS[load])
+    elapsed = time.perf_counter() - start
+
+    print(f'{load:>20} {elapsed:>9.2f} {peak_rss_mb():>14.1f} '
+          f'{len(trees):>8} {trees.shape[1]:>5}')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--rows', type=int, default=683788)
+    parser.add_argument('--load')
+    parser.add_argument('--directory')
+    args = parser.parse_args()
+
+    if args.load:
+        run(args.load, args.directory)
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        csv_path = os.path.join(tmp, 'census.csv')
+        write_synthetic_census(csv_path, args.rows)
+        trees = load_census(csv_path)
+
+        # the notebooks' checkpoint, with object string columns as they
+        # came out of a bare pd.read_csv
+        start = time.perf_counter()
+        pickle_path = os.path.join(tmp, f'{NAME}.pkl')
+        notebook_trees = trees.astype(
+            {col: object for col in trees.select_dtypes('category')})
+        with gzip.open(pickle_path, 'wb') as goodbye:
+            pickle.dump(notebook_trees, goodbye,
+                        protocol=pickle.HIGHEST_PROTOCOL)
+        pickle_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        parquet_path = save_checkpoint(trees, NAME, tmp)
+        parquet_time = time.perf_counter() - start
+
+        print(f'gzip pickle: {os.path.getsize(pickle_path) / 1e6:.1f} MB, '
+              f'saved in {pickle_time:.2f} s')
+        print(f'parquet:     {os.path.getsize(parquet_path) / 1e6:.1f} MB, '
+              f'saved in {parquet_time:.2f} s')
+
+        print(f'{"load":>20} {"time (s)":>9} {"peak RSS (MB)":>14} '
+              f'{"rows":>8} {"cols":>5}')
+        for load in LOADS:
+            subprocess.run([sys.executable, __file__, '--load', load,
+                            '--directory', tmp], check=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,118 @@
+'''
+Compare the gzip-pickled RandomForest (as saved by the notebooks) with
+its `CompactForest` export: file size, load time, peak RSS after
+loading and prediction throughput, and check that predictions match.
+
+Each load runs in a fresh process so page cache and peak RSS are not
+shared.
+
+Run from the repository root:
+
+    python benchmarks/bench_compact_forest.py --rows 100000 --n-estimators 100
+
+'''
+
+# standard libraries
+import argparse
+import gzip
+import os
+import pickle
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+# make the repository root importable
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from functions import CompactForest, TreeFeaturizer
+from bench_load_census import peak_rss_mb
+from bench_sparse_encoding import census_rows
+
+
+def test_matrix(directory, rows):
+    import joblib
+    featurizer = joblib.load(os.path.join(directory, 'featurizer.joblib'))
+    return featurizer.transform(census_rows(rows, seed=7)).to_numpy()
+
+
+def run(fmt, directory, test_rows):
+    X = test_matrix(directory, test_rows)
+    rss_before = peak_rss_mb()
+
+    start = time.perf_counter()
+    if fmt == 'gzip pickle':
+        with gzip.open(os.path.join(directory, 'model.pickle'), 'rb') as hello:
+            model = pickle.load(hello)
+        model.n_jobs = 1
+    else:
+        model = CompactForest.load(os.path.join(directory, 'model.forest'))
+    load_time = time.perf_counter() - start
+    load_rss = peak_rss_mb() - rss_before
+
+    start = time.perf_counter()
+    predictions = model.predict(X)
+    predict_time = time.perf_counter() - start
+    np.save(os.path.join(directory, f'{fmt}.npy'), predictions.astype(str))
+
+    print(f'{fmt:>14} {load_time:>9.2f} {load_rss:>14.1f} '
+          f'{len(X) / predict_time:>10,.0f}')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--rows', type=int, default=100000)
+    parser.add_argument('--n-estimators', type=int, default=100)
+    parser.add_argument('--test-rows', type=int, default=20000)
+    parser.add_argument('--format')
+    parser.add_argument('--directory')
+    args = parser.parse_args()
+
+    if args.format:
+        run(args.format, args.directory, args.test_rows)
+        return
+
+    import joblib
+    from sklearn.ensemble import RandomForestClassifier
+
+    with tempfile.TemporaryDirectory() as tmp:
+
+        # the final model's parameters
+        trees = census_rows(args.rows)
+        featurizer = TreeFeaturizer(scale=True).fit(trees)
+        joblib.dump(featurizer, os.path.join(tmp, 'featurizer.joblib'))
+        model = RandomForestClassifier(
+            n_estimators=args.n_estimators, max_features=11, max_depth=55,
+            min_samples_leaf=3, class_weight='balanced', random_state=99,
+            n_jobs=-1)
+        model.fit(featurizer.transform(trees).to_numpy(), trees['health'])
+
+        pickle_path = os.path.join(tmp, 'model.pickle')
+        with gzip.open(pickle_path, 'wb') as goodbye:
+            pickle.dump(model, goodbye, protocol=pickle.HIGHEST_PROTOCOL)
+
+        start = time.perf_counter()
+        forest_path = os.path.join(tmp, 'model.forest')
+        CompactForest.from_forest(model).save(forest_path)
+        export_time = time.perf_counter() - start
+
+        raw_size = len(pickle.dumps(model, protocol=pickle.HIGHEST_PROTOCOL))
+        print(f'gzip pickle:    {os.path.getsize(pickle_path) / 1e6:.1f} MB '
+              f'({raw_size / 1e6:.1f} MB uncompressed)')
+        print(f'CompactForest:  {os.path.getsize(forest_path) / 1e6:.1f} MB '
+              f'(exported in {export_time:.1f} s)')
+        print(f'{"format":>14} {"load (s)":>9} {"load RSS (MB)":>14} '
+              f'{"rows/s":>10}')
+        for fmt in ['gzip pickle', 'compact']:
+            subprocess.run([sys.executable, __file__, '--format', fmt,
+                            '--directory', tmp,
+                            '--test-rows', str(args.test_rows)], check=True)
+
+        same = np.array_equal(np.load(os.path.join(tmp, 'gzip pickle.npy')),
+                              np.load(os.path.join(tmp, 'compact.npy')))
+        print(f'same predictions: {same}')
+
+
+if __name__ == '__main__':
+    main()
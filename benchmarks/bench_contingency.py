@@ -0,0 +1,89 @@
+'''
+Compare the EDA's significance sweep (crosstab, chi2_contingency and
+statsmodels standardized residuals per column) with `ContingencyCube`,
+on the census replicated several times, and check the results match.
+
+Run from the repository root:
+
+    python benchmarks/bench_contingency.py --rows 683788 --copies 3
+
+'''
+
+# standard libraries
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+from scipy import stats
+
+# make the repository root importable
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from functions import (YES_NO_COLS, ContingencyCube, load_census,
+                       write_synthetic_census)
+
+COLS = (['boroname', 'cb_num', 'nta', 'council_dist', 'st_assembly',
+         'st_senate', 'species', 'steward', 'guards'] + YES_NO_COLS)
+
+
+# the EDA's approach, kept here only as a baseline
+def notebook_sweep(trees):
+    import statsmodels.api as sm
+
+    results = {}
+    for col in COLS:
+        proportions = trees.groupby(col, observed=True).health.value_counts(
+            normalize=True).unstack()
+        df_ = pd.crosstab(trees.health, trees[col])
+        stat, p, dof, expected = stats.chi2_contingency(df_)
+        table_ = sm.stats.Table(df_)
+        results[col] = (proportions, stat, p, table_.standardized_resids)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--rows', type=int, default=683788)
+    parser.add_argument('--copies', type=int, default=3)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'census.csv')
+        write_synthetic_census(path, args.rows)
+        trees = load_census(path)
+    trees = pd.concat([trees] * args.copies, ignore_index=True)
+    print(f'{len(trees)} rows, {len(COLS)} columns')
+
+    start = time.perf_counter()
+    legacy = notebook_sweep(trees)
+    legacy_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    cube = ContingencyCube(trees, COLS)
+    build_time = time.perf_counter() - start
+    start = time.perf_counter()
+    cube.summary()
+    results = {col: (cube.proportions(col), *cube.chi2(col)[:2],
+                     cube.standardized_resids(col)) for col in COLS}
+    sweep_time = time.perf_counter() - start
+
+    same = all(
+        np.allclose(legacy[col][0].to_numpy(), results[col][0].to_numpy())
+        and np.isclose(legacy[col][1], results[col][1])
+        and np.isclose(legacy[col][2], results[col][2])
+        and np.allclose(legacy[col][3].to_numpy(), results[col][3].to_numpy())
+        for col in COLS)
+
+    print(f'notebook sweep:        {legacy_time:>7.2f} s')
+    print(f'cube build (1 pass):   {build_time:>7.2f} s')
+    print(f'cube sweep from cache: {sweep_time:>7.3f} s '
+          f'({legacy_time / (build_time + sweep_time):.1f}x overall)')
+    print(f'same results: {same}')
+    print(cube.summary().head(8).round(3).to_string())
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,94 @@
+'''
+Apply random daily batches of new and removed trees to a
+`SpatialFeatureStore`, check after each batch that its features match a
+full `add_spatial_features` recompute, and compare the time taken.
+
+Run from the repository root:
+
+    python benchmarks/bench_feature_store.py --rows 683788 --days 5 --batch 500
+
+'''
+
+# standard libraries
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+# make the repository root importable
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from functions import (SpatialFeatureStore, add_spatial_features,
+                       synthetic_census)
+
+
+def census_trees(n, start=0, seed=42):
+    '''
+    Synthetic tree locations and block ids, with tree ids.
+    '''
+    trees = synthetic_census(n, seed=seed)[['latitude', 'longitude',
+                                            'block_id']]
+    trees.insert(0, 'tree_id', np.arange(start, start + n))
+    return trees
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--rows', type=int, default=683788)
+    parser.add_argument('--days', type=int, default=5)
+    parser.add_argument('--batch', type=int, default=500,
+                        help='trees added and removed per day')
+    args = parser.parse_args()
+
+    trees = census_trees(args.rows)
+
+    start = time.perf_counter()
+    store = SpatialFeatureStore(trees)
+    build_time = time.perf_counter() - start
+    print(f'{args.rows} trees, store built in {build_time:.1f} s')
+
+    print(f'{"day":>4} {"added":>6} {"removed":>8} {"changed":>8} '
+          f'{"update (s)":>11} {"recompute (s)":>14} {"max diff (m)":>13} '
+          f'{"match":>6}')
+
+    rng = np.random.default_rng(0)
+    next_id = args.rows
+    for day in range(1, args.days + 1):
+
+        # new trees, some of them on top of existing ones
+        new = census_trees(args.batch, start=next_id, seed=day)
+        new.loc[:9, ['latitude', 'longitude']] = trees.sample(
+            10, random_state=day)[['latitude', 'longitude']].to_numpy()
+        next_id += args.batch
+        removed = rng.choice(trees['tree_id'].to_numpy(), args.batch,
+                             replace=False)
+
+        start = time.perf_counter()
+        changed = store.delete(removed).union(store.insert(new))
+        update_time = time.perf_counter() - start
+
+        trees = pd.concat([trees[~trees['tree_id'].isin(removed)], new],
+                          ignore_index=True)
+        start = time.perf_counter()
+        full = trees.set_index('tree_id')[['block_id', 'latitude',
+                                           'longitude']].copy()
+        add_spatial_features(full)
+        recompute_time = time.perf_counter() - start
+
+        features = store.features().loc[full.index]
+        diff = (features['neighbor_dist'] - full['neighbor_dist']).abs().max()
+        match = (np.allclose(features['neighbor_dist'], full['neighbor_dist'],
+                             rtol=1e-9, atol=1e-9)
+                 and np.array_equal(features['log_block_count'],
+                                    full['log_block_count'])
+                 and len(store) == len(full))
+
+        print(f'{day:>4} {len(new):>6} {len(removed):>8} {len(changed):>8} '
+              f'{update_time:>11.2f} {recompute_time:>14.2f} {diff:>13.2e} '
+              f'{str(match):>6}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,76 @@
+'''
+Benchmark the single-pass `find_extremes` against the original
+per-column loop (with its `std_val` NameError fixed) on a frame shaped
+like the 147-column one-hot model matrix.
+
+Run from the repository root:
+
+    python benchmarks/bench_find_extremes.py --rows 550000
+
+'''
+
+# standard libraries
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+# make the repository root importable
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from functions import find_extremes
+
+
+# original implementation, kept here only as a baseline
+def legacy_find_extremes(df, num_std):
+    extreme_list = []
+    for column in list(df.columns):
+        if df[column].max() > (df[column].mean() + num_std * df[column].std()):
+            extreme_list.append(column)
+        if df[column].min() < (df[column].mean() - num_std * df[column].std()):
+            extreme_list.append(column)
+    return extreme_list
+
+
+def model_matrix(n_rows, seed=42):
+    '''
+    3 continuous columns, 11 binary flags and 133 one-hot columns.
+    '''
+    rng = np.random.default_rng(seed)
+    continuous = pd.DataFrame({
+        'tree_diameter': rng.gamma(2, 6, n_rows),
+        'log_block_count': np.log(rng.integers(1, 80, n_rows)),
+        'neighbor_dist': rng.lognormal(2, 0.6, n_rows)})
+    flags = pd.DataFrame(rng.random((n_rows, 11)) < 0.1,
+                         columns=[f'flag_{i}' for i in range(11)]).astype(int)
+    categories = pd.Series(rng.integers(0, 133, n_rows)).astype(str)
+    dummies = pd.get_dummies(categories, prefix='cat')
+    return pd.concat([continuous, flags, dummies], axis=1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--rows', type=int, default=550000)
+    parser.add_argument('--num-std', type=float, default=4)
+    args = parser.parse_args()
+
+    df = model_matrix(args.rows)
+    print(f'frame: {df.shape[0]} rows x {df.shape[1]} columns')
+
+    start = time.perf_counter()
+    legacy = legacy_find_extremes(df, args.num_std)
+    legacy_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    extreme_list, _ = find_extremes(df, args.num_std)
+    new_time = time.perf_counter() - start
+
+    print(f'legacy loop: {legacy_time:.3f} s')
+    print(f'single pass: {new_time:.3f} s ({legacy_time / new_time:.1f}x)')
+    print(f'same columns: {sorted(set(legacy)) == sorted(extreme_list)}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,109 @@
+'''
+Compare the notebooks' final RandomForest (three classes, class_weight=
+'balanced') with `GoodBooster` (binary 'Good' vs 'Not Good' on
+`FeatureBinner` codes): fit time, predict throughput, pickled model size
+and `good_precision` on held-out rows.
+
+Health in `synthetic_census` does not depend on the features, so a known
+signal is planted first (problems and large diameters lower the odds of
+'Good', distance to the nearest tree raises them). The precision numbers
+only show that both models find it; compare them on the real census in
+the notebook.
+
+Run from the repository root:
+
+    python benchmarks/bench_good_booster.py --rows 1000000
+
+'''
+
+# standard libraries
+import argparse
+import os
+import pickle
+import sys
+import time
+
+import numpy as np
+
+# make the repository root importable
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from functions import (FeatureBinner, GoodBooster, TreeFeaturizer,
+                       add_spatial_features, good_precision, synthetic_census)
+
+
+def planted_health(X, seed):
+    rng = np.random.default_rng(seed)
+    logit = (2.0 - 1.5 * X[:, 3:12].sum(axis=1) - 0.03 * (X[:, 0] - 11)
+             + 0.4 * np.log1p(X[:, 13]))
+    good = rng.random(len(X)) < 1 / (1 + np.exp(-logit))
+    return np.where(good, 'Good',
+                    np.where(rng.random(len(X)) < 0.78, 'Fair', 'Poor'))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--rows', type=int, default=1000000)
+    parser.add_argument('--n-estimators', type=int, default=100)
+    parser.add_argument('--test-share', type=float, default=0.25)
+    args = parser.parse_args()
+
+    from sklearn.ensemble import RandomForestClassifier
+
+    trees = synthetic_census(args.rows)
+    add_spatial_features(trees, engine='projected_kdtree')
+    X = TreeFeaturizer().fit_transform(trees).to_numpy()
+    del trees
+    y = planted_health(X, seed=1)
+    split = int(len(X) * (1 - args.test_share))
+    print(f'{len(X)} rows x {X.shape[1]} features, {split} to train, '
+          f'{(y == "Good").mean():.1%} Good')
+
+    rows = []
+
+    # the final model's parameters
+    forest = RandomForestClassifier(
+        n_estimators=args.n_estimators, max_features=11, max_depth=55,
+        min_samples_leaf=3, class_weight='balanced', random_state=99,
+        n_jobs=-1)
+    start = time.perf_counter()
+    forest.fit(X[:split], y[:split])
+    fit_time = time.perf_counter() - start
+    start = time.perf_counter()
+    y_pred = forest.predict(X[split:])
+    predict_time = time.perf_counter() - start
+    rows.append(('RandomForest', 0.0, fit_time, predict_time,
+                 len(pickle.dumps(forest, protocol=pickle.HIGHEST_PROTOCOL)),
+                 y_pred, X.nbytes))
+    del forest
+
+    # binned once, then fit on the codes
+    start = time.perf_counter()
+    binner = FeatureBinner().fit(X[:split])
+    codes = binner.transform(X[:split])
+    bin_time = time.perf_counter() - start
+    start = time.perf_counter()
+    booster = GoodBooster().fit(codes, y[:split])
+    fit_time = time.perf_counter() - start
+    start = time.perf_counter()
+    y_pred = booster.predict(binner.transform(X[split:]))
+    predict_time = time.perf_counter() - start
+    rows.append(('GoodBooster', bin_time, fit_time, predict_time,
+                 len(pickle.dumps((binner, booster),
+                                  protocol=pickle.HIGHEST_PROTOCOL)),
+                 y_pred, codes.nbytes * len(X) // split))
+    print(f'GoodBooster kept {booster.n_iter_} iterations')
+
+    n_test = len(X) - split
+    print(f'{"model":>13} {"bin (s)":>8} {"fit (s)":>8} {"rows/s":>10} '
+          f'{"model MB":>9} {"matrix MB":>10} {"Good prec":>10} '
+          f'{"Good share":>11}')
+    for name, bin_time, fit_time, predict_time, size, y_pred, nbytes in rows:
+        print(f'{name:>13} {bin_time:>8.2f} {fit_time:>8.2f} '
+              f'{n_test / predict_time:>10,.0f} {size / 1e6:>9.1f} '
+              f'{nbytes / 1e6:>10.0f} '
+              f'{good_precision(y[split:], y_pred):>10.4f} '
+              f'{(y_pred == "Good").mean():>11.1%}')
+
+
+if __name__ == '__main__':
+    main()
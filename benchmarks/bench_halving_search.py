@@ -0,0 +1,112 @@
+'''
+Compare the notebook's `GridSearchCV` (36 candidates x 3 folds, all at
+full size) with `halving_search` on the same grid: wall-clock time, peak
+RSS of the main process and of the largest worker, and the time to
+resume a finished search from its cache.
+
+Each mode runs in a fresh process so peak RSS is not shared.
+
+Run from the repository root:
+
+    python benchmarks/bench_halving_search.py --rows 100000 --n-jobs -1
+
+'''
+
+# standard libraries
+import argparse
+import glob
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+# make the repository root importable
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from functions import TreeFeaturizer, good_precision, halving_search
+from bench_load_census import peak_rss_mb
+from bench_sparse_encoding import census_rows
+
+# the notebook's grid
+PARAM_GRID = {
+    'max_depth': [40, 50, 60, None],
+    'min_samples_leaf': [3, 4, 5],
+    'min_samples_split': [5, 10, 15],
+    'n_estimators': [100]
+}
+
+
+def worker_peak_rss_mb():
+    '''
+    Largest peak RSS (VmHWM) among live child processes in MB, e.g. the
+    joblib workers, which stay alive for reuse after a search.
+    '''
+    peak = 0.0
+    for children in glob.glob(f'/proc/{os.getpid()}/task/*/children'):
+        with open(children) as f:
+            for pid in f.read().split():
+                try:
+                    with open(f'/proc/{pid}/status') as status:
+                        for line in status:
+                            if line.startswith('VmHWM'):
+                                peak = max(peak, int(line.split()[1]) / 1024)
+                except FileNotFoundError:
+                    continue
+    return peak
+
+
+def run(mode, rows, n_jobs, cache_dir):
+    from sklearn.ensemble import RandomForestClassifier
+    from sklearn.metrics import make_scorer
+    from sklearn.model_selection import GridSearchCV
+
+    trees = census_rows(rows)
+    X = TreeFeaturizer(scale=True).fit_transform(trees).to_numpy()
+    y = trees['health'].to_numpy()
+
+    start = time.perf_counter()
+    if mode == 'grid':
+        rf = RandomForestClassifier(class_weight='balanced', random_state=99)
+        rf_grid = GridSearchCV(estimator=rf, param_grid=PARAM_GRID,
+                               scoring=make_scorer(good_precision), cv=3,
+                               n_jobs=n_jobs)
+        rf_grid.fit(X, y)
+        best, n_fits = rf_grid.best_params_, 36 * 3
+    else:
+        best, results = halving_search(X, y, PARAM_GRID, cache_dir,
+                                       n_jobs=n_jobs)
+        n_fits = 3 * len(results)
+    elapsed = time.perf_counter() - start
+
+    print(f'{mode:>14} {elapsed:>9.1f} {n_fits:>5} {peak_rss_mb():>10.1f} '
+          f'{worker_peak_rss_mb():>12.1f}  {best}')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--rows', type=int, default=100000)
+    parser.add_argument('--n-jobs', type=int, default=-1)
+    parser.add_argument('--mode')
+    parser.add_argument('--cache-dir')
+    args = parser.parse_args()
+
+    if args.mode:
+        run(args.mode, args.rows, args.n_jobs, args.cache_dir)
+        return
+
+    cache_dir = tempfile.mkdtemp()
+    try:
+        print(f'{"mode":>14} {"time (s)":>9} {"fits":>5} {"main (MB)":>10} '
+              f'{"worker (MB)":>12}  best params')
+        for mode in ['grid', 'halving', 'halving resume']:
+            subprocess.run([sys.executable, __file__, '--mode', mode,
+                            '--rows', str(args.rows),
+                            '--n-jobs', str(args.n_jobs),
+                            '--cache-dir', cache_dir], check=True)
+    finally:
+        shutil.rmtree(cache_dir)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,78 @@
+'''
+Measure cold-start import time (`python -X importtime`) of the
+`functions` package for a scoring worker, a full `from functions import
+*`, and the original single-module functions.py (archives/), and check
+that the worker's imports stay under a time budget.
+
+Each import runs in a fresh interpreter; the fastest of --repeat runs is
+reported. Exits with an error if the worker import exceeds --budget.
+
+Run from the repository root:
+
+    python benchmarks/bench_import_time.py --budget 1.0
+
+'''
+
+# standard libraries
+import argparse
+import os
+import subprocess
+import sys
+
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# (label, directory to import from, statement)
+IMPORTS = [
+    ('original functions.py', os.path.join(ROOT, 'archives'),
+     'import functions_original'),
+    ('worker', ROOT, 'from functions import good_precision, yes_to_one'),
+    ('score_file', ROOT, 'from functions import score_file'),
+    ('CompactForest', ROOT, 'from functions import CompactForest'),
+    ('import *', ROOT, 'from functions import *'),
+]
+
+HEAVY = ['matplotlib', 'sklearn', 'scipy']
+
+
+def import_time(directory, statement):
+    '''
+    Total import time (in seconds) of `statement` in a fresh interpreter,
+    and the heavy packages it loaded.
+    '''
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c',
+                             statement], cwd=directory, capture_output=True,
+                            text=True, check=True)
+    total = 0
+    loaded = set()
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, _, name = line[len('import time:'):].split('|')
+        total += int(self_us)
+        loaded.add(name.strip().split('.')[0])
+    return total / 1e6, [package for package in HEAVY if package in loaded]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--budget', type=float, default=1.0,
+                        help='worker import budget in seconds')
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    print(f'{"import":>22} {"time (s)":>9}  heavy packages')
+    times = {}
+    for label, directory, statement in IMPORTS:
+        runs = [import_time(directory, statement) for _ in range(args.repeat)]
+        times[label], loaded = min(runs)
+        print(f'{label:>22} {times[label]:>9.2f}  {", ".join(loaded) or "-"}')
+
+    if times['worker'] > args.budget:
+        sys.exit(f'worker import took {times["worker"]:.2f} s, over the '
+                 f'{args.budget:.2f} s budget')
+    print(f'worker import within the {args.budget:.2f} s budget')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,93 @@
+'''
+Compare load time and peak RSS of `load_census` (with and without
+chunks) against the notebooks' bare `pd.read_csv` + drop + rename, on a
+synthetic census CSV (`write_synthetic_census`).
+
+Each loader runs in a fresh process so peak RSS is not shared.
+
+Run from the repository root:
+
+    python benchmarks/bench_load_census.py --rows 683788
+
+'''
+
+# standard libraries
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+# make the repository root importable
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from functions import CENSUS_COLUMNS, load_census, write_synthetic_census
+
+
+# the notebooks' approach, kept here only as a baseline
+def notebook_load(path):
+    trees = pd.read_csv(path, keep_default_na=False, na_values=[''])
+    trees.drop(trees[trees.status.isin(['Dead', 'Stump'])].index, inplace=True)
+    trees.drop(columns=[col for col in trees.columns
+                        if col not in CENSUS_COLUMNS], inplace=True)
+    trees.columns = list(CENSUS_COLUMNS.values())
+    trees.dropna(how='any', axis=0, inplace=True)
+    trees['steward'] = np.where(trees.steward == '4orMore', '5plus',
+                                trees.steward)
+    return trees
+
+
+def peak_rss_mb():
+    '''
+    Peak resident memory of this process in MB. Unlike ru_maxrss, VmHWM
+    is not inherited from the parent process.
+    '''
+    with open('/proc/self/status') as f:
+        for line in f:
+            if line.startswith('VmHWM'):
+                return int(line.split()[1]) / 1024
+
+
+def run(loader, path):
+    start = time.perf_counter()
+    if loader == 'notebook':
+        trees = notebook_load(path)
+    elif loader == 'load_census':
+        trees = load_census(path)
+    else:
+        trees = load_census(path, chunksize=100000)
+    elapsed = time.perf_counter() - start
+
+    max_rss = peak_rss_mb()
+    frame_mb = trees.memory_usage(deep=True).sum() / 1e6
+    print(f'{loader:>20} {elapsed:>9.2f} {max_rss:>14.1f} {frame_mb:>10.1f}')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--rows', type=int, default=683788)
+    parser.add_argument('--loader')
+    parser.add_argument('--path')
+    args = parser.parse_args()
+
+    if args.loader:
+        run(args.loader, args.path)
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'census.csv')
+        write_synthetic_census(path, args.rows)
+        print(f'CSV: {args.rows} rows, {os.path.getsize(path) / 1e6:.0f} MB')
+
+        print(f'{"loader":>20} {"time (s)":>9} {"peak RSS (MB)":>14} '
+              f'{"frame (MB)":>10}')
+        for loader in ['notebook', 'load_census', 'load_census chunked']:
+            subprocess.run([sys.executable, __file__, '--loader', loader,
+                            '--path', path], check=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,92 @@
+'''
+Compare the notebooks' map (one folium.Circle per tree) with health grid
+layers from `write_health_tiles` + `health_grid_map`: HTML/GeoJSON size,
+time to build and save, and the number of map features a browser has to
+draw.
+
+The per-marker map is built for --marker-rows trees and scaled linearly
+to --rows (building it for all 683,788 trees takes minutes and writes
+hundreds of MB; pass --marker-rows 683788 to measure it directly).
+
+Run from the repository root:
+
+    python benchmarks/bench_map_tiles.py --rows 683788 --marker-rows 50000
+
+'''
+
+# standard libraries
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import folium
+
+# make the repository root importable
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from functions import health_grid_map, synthetic_census, write_health_tiles
+
+
+COLORS = {'Good': 'green', 'Fair': 'yellow', 'Poor': 'red'}
+
+
+# the notebooks' approach, kept here only as a baseline
+def marker_map(trees, path):
+    tree_map = folium.Map(location=[40.700991, -73.924587], zoom_start=11)
+    for lat, lon, health in zip(trees['latitude'], trees['longitude'],
+                                trees['health']):
+        folium.Circle(location=[lat, lon], radius=1,
+                      color=COLORS[health]).add_to(tree_map)
+    tree_map.save(path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--rows', type=int, default=683788)
+    parser.add_argument('--marker-rows', type=int, default=50000)
+    parser.add_argument('--zooms', type=int, nargs='+', default=[11, 13, 15])
+    args = parser.parse_args()
+
+    trees = synthetic_census(args.rows)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        marker_rows = min(args.marker_rows, args.rows)
+        path = os.path.join(tmp, 'markers.html')
+        start = time.perf_counter()
+        marker_map(trees.iloc[:marker_rows], path)
+        scale = args.rows / marker_rows
+        marker_time = (time.perf_counter() - start) * scale
+        marker_mb = os.path.getsize(path) / 1e6 * scale
+
+        start = time.perf_counter()
+        paths = write_health_tiles(trees, os.path.join(tmp, 'tiles'),
+                                   args.zooms)
+        tiles_time = time.perf_counter() - start
+
+        path = os.path.join(tmp, 'grid.html')
+        start = time.perf_counter()
+        health_grid_map(paths).save(path)
+        grid_time = time.perf_counter() - start
+
+        print(f'{args.rows} trees')
+        print(f'{"map":>28} {"time (s)":>9} {"size (MB)":>10} '
+              f'{"features":>9}')
+        label = ('per-marker' if marker_rows == args.rows
+                 else f'per-marker (x{scale:.1f} scaled)')
+        print(f'{label:>28} {marker_time:>9.1f} {marker_mb:>10.1f} '
+              f'{args.rows:>9}')
+        print(f'{"write_health_tiles":>28} {tiles_time:>9.1f} '
+              f'{sum(map(os.path.getsize, paths.values())) / 1e6:>10.1f} '
+              f'{"":>9}')
+        for zoom, tile_path in paths.items():
+            with open(tile_path) as f:
+                n_cells = f.read().count('"Feature"')
+            print(f'{f"  zoom {zoom} layer":>28} {"":>9} '
+                  f'{os.path.getsize(tile_path) / 1e6:>10.1f} {n_cells:>9}')
+        print(f'{"health_grid_map (embedded)":>28} {grid_time:>9.1f} '
+              f'{os.path.getsize(path) / 1e6:>10.1f}')
+
+
+if __name__ == '__main__':
+    main()
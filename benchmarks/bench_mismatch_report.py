@@ -0,0 +1,82 @@
+'''
+Compare `mismatch_report` with the volunteer notebook's approach: a list
+comprehension over the labels, then re-reading the census CSV and
+filtering it with `index.isin`.
+
+Run from the repository root:
+
+    python benchmarks/bench_mismatch_report.py --rows 683788
+
+'''
+
+# standard libraries
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+# make the repository root importable
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from functions import (CENSUS_DTYPES, load_census, load_checkpoint,
+                       mismatch_report, save_checkpoint,
+                       write_synthetic_census)
+
+
+# the notebook's approach, kept here only as a baseline
+def notebook_mismatches(y, y_preds, path):
+    y_preds_series = pd.Series(y_preds, index=y.index)
+    mismatch_indices = [i for i, v in y.items() if y[i] != y_preds_series[i]]
+    trees_initial = pd.read_csv(path)
+    return trees_initial[trees_initial.index.isin(mismatch_indices)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--rows', type=int, default=683788)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'census.csv')
+        write_synthetic_census(path, args.rows)
+
+        # volunteer labels and model scores
+        trees = load_census(path)
+        y = trees.loc[trees.user_type == 'Volunteer', 'health']
+        rng = np.random.default_rng(0)
+        probabilities = rng.dirichlet([1, 4, 1], len(y))
+        classes = np.array(['Fair', 'Good', 'Poor'])
+        scores = pd.DataFrame(probabilities, index=y.index,
+                              columns=[f'prob_{c}' for c in classes])
+        scores.insert(0, 'prediction', classes[probabilities.argmax(axis=1)])
+
+        # all raw columns, as a columnar checkpoint
+        raw = load_census(path, extra_cols=list(CENSUS_DTYPES), clean=False)
+        save_checkpoint(raw, 'census_raw', tmp)
+
+        start = time.perf_counter()
+        legacy = notebook_mismatches(y, scores['prediction'], path)
+        legacy_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        report = mismatch_report(y, scores)
+        compare_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        source = load_checkpoint('census_raw', tmp)
+        report = mismatch_report(y, scores, source=source)
+        join_time = time.perf_counter() - start
+
+        print(f'{len(y)} volunteer rows, {len(report)} mismatches')
+        print(f'notebook (loop + re-read CSV):      {legacy_time:>7.2f} s')
+        print(f'mismatch_report:                    {compare_time:>7.2f} s')
+        print(f'mismatch_report + checkpoint join:  {join_time:>7.2f} s '
+              f'({legacy_time / join_time:.1f}x)')
+        print(f'same rows: {set(legacy.index) == set(report.index)}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,83 @@
+'''
+Benchmark the array-native `nearest_neighbor` against the original
+implementation, which built its radians array with a per-Point lambda.
+
+Run from the repository root:
+
+    python benchmarks/bench_nearest_neighbor.py --sizes 100000 680000 5000000
+
+'''
+
+# standard libraries
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+import geopandas as gpd
+
+# make the repository root importable
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from functions import get_nearest, nearest_neighbor, EARTH_RADIUS
+
+
+# original implementation, kept here only as a baseline
+def legacy_nearest_neighbor(gdf, name=None):
+    radians = np.array(
+        gdf['geometry'].apply(
+            lambda geom: (geom.x * np.pi / 180,
+                          geom.y * np.pi / 180)).to_list())
+    tree, neighbor_dist = get_nearest(src_points=radians, candidates=radians)
+    return pd.Series(neighbor_dist * EARTH_RADIUS, index=gdf.index, name=name)
+
+
+def random_trees(n, seed=42):
+    '''
+    Uniform random points within NYC's bounding box.
+    '''
+    rng = np.random.default_rng(seed)
+    lat = rng.uniform(40.4960, 40.9155, n)
+    lon = rng.uniform(-74.2557, -73.7004, n)
+    return gpd.GeoDataFrame({'latitude': lat, 'longitude': lon},
+                            geometry=gpd.points_from_xy(lon, lat))
+
+
+def timed(func, *args, **kwargs):
+    start = time.perf_counter()
+    result = func(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--sizes', type=int, nargs='+',
+                        default=[100000, 680000, 5000000])
+    parser.add_argument('--skip-legacy', action='store_true',
+                        help='only time the array-native path')
+    args = parser.parse_args()
+
+    print(f'{"rows":>10} {"legacy (s)":>12} {"geometry (s)":>13} '
+          f'{"columns (s)":>12} {"speedup":>8}')
+
+    for n in args.sizes:
+        gdf = random_trees(n)
+
+        # array-native path, reading Points with vectorized accessors
+        _, geom_time = timed(nearest_neighbor, gdf.geometry)
+
+        # array-native path, reading latitude/longitude columns
+        _, col_time = timed(nearest_neighbor, gdf)
+
+        if args.skip_legacy:
+            legacy_time = float('nan')
+        else:
+            _, legacy_time = timed(legacy_nearest_neighbor, gdf)
+
+        print(f'{n:>10} {legacy_time:>12.2f} {geom_time:>13.2f} '
+              f'{col_time:>12.2f} {legacy_time / col_time:>7.1f}x')
+
+
+if __name__ == '__main__':
+    main()
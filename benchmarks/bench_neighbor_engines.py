@@ -0,0 +1,57 @@
+'''
+Compare the `nearest_neighbor` engines ('haversine', 'projected_kdtree'
+and 'grid_hash') for speed and for accuracy against the haversine result.
+
+Run from the repository root:
+
+    python benchmarks/bench_neighbor_engines.py --sizes 100000 683788
+
+'''
+
+# standard libraries
+import argparse
+import os
+import sys
+import time
+
+# make the repository root importable
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from functions import nearest_neighbor, synthetic_census
+
+
+ENGINES = ['haversine', 'projected_kdtree', 'grid_hash']
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--sizes', type=int, nargs='+',
+                        default=[100000, 683788])
+    parser.add_argument('--n-jobs', type=int, default=None)
+    args = parser.parse_args()
+
+    print(f'{"rows":>8} {"engine":>17} {"time (s)":>9} {"speedup":>8} '
+          f'{"median err (m)":>15} {"max err (m)":>12} {"max rel err":>12}')
+
+    for n in args.sizes:
+        trees = synthetic_census(n)[['latitude', 'longitude']]
+
+        results = {}
+        times = {}
+        for engine in ENGINES:
+            start = time.perf_counter()
+            results[engine] = nearest_neighbor(trees, engine=engine,
+                                               n_jobs=args.n_jobs)
+            times[engine] = time.perf_counter() - start
+
+        reference = results['haversine']
+        for engine in ENGINES:
+            error = (results[engine] - reference).abs()
+            relative = (error / reference.where(reference > 0)).max()
+            print(f'{n:>8} {engine:>17} {times[engine]:>9.2f} '
+                  f'{times["haversine"] / times[engine]:>7.1f}x '
+                  f'{error.median():>15.4f} {error.max():>12.4f} '
+                  f'{relative:>12.2e}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,74 @@
+'''
+Time `neighborhood_features` city-wide with both engines, against
+building the same counts and shares from per-tree lists of neighbors.
+
+Run from the repository root:
+
+    python benchmarks/bench_neighborhood_features.py --sizes 100000 683788
+
+'''
+
+# standard libraries
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+# make the repository root importable
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from functions import (TreeIndex, coords_to_radians, neighborhood_features,
+                       synthetic_census)
+
+RADII = (10, 25, 50, 100)
+
+
+# per-tree lists, kept here only as a baseline
+def list_features(trees, k=5):
+    radians = coords_to_radians(trees)
+    index = TreeIndex(radians)
+    counts = {radius: [len(found) - 1 for found in
+                       index.query_radius(radians, radius)]
+              for radius in RADII}
+    distances, neighbors = index.query(radians, k=k + 1)
+    species = trees['species'].tolist()
+    health = trees['health'].tolist()
+    same_species = [np.mean([species[j] == species[i] for j in row[1:]])
+                    for i, row in enumerate(neighbors)]
+    poor = [np.mean([health[j] == 'Poor' for j in row[1:]])
+            for row in neighbors]
+    return counts, distances[:, 1:].mean(axis=1), same_species, poor
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--sizes', type=int, nargs='+',
+                        default=[100000, 683788])
+    parser.add_argument('--n-jobs', type=int, default=-1)
+    parser.add_argument('--list-max', type=int, default=100000,
+                        help='largest size also run with per-tree lists')
+    args = parser.parse_args()
+
+    print(f'{"rows":>8} {"method":>16} {"time (s)":>9} {"mean count 100m":>16}')
+    for n in args.sizes:
+        trees = synthetic_census(n)
+
+        for engine in ['haversine', 'projected_kdtree']:
+            start = time.perf_counter()
+            features = neighborhood_features(trees, radii=RADII,
+                                             n_jobs=args.n_jobs, engine=engine)
+            elapsed = time.perf_counter() - start
+            print(f'{n:>8} {engine:>16} {elapsed:>9.2f} '
+                  f'{features["count_100m"].mean():>16.1f}')
+
+        if n <= args.list_max:
+            start = time.perf_counter()
+            counts, *_ = list_features(trees)
+            elapsed = time.perf_counter() - start
+            print(f'{n:>8} {"per-tree lists":>16} {elapsed:>9.2f} '
+                  f'{np.mean(counts[100]):>16.1f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,63 @@
+'''
+Scaling benchmark for the chunked, multi-threaded `get_nearest` query,
+checking that every parallel run is bit-identical to the serial path.
+
+Run from the repository root:
+
+    python benchmarks/bench_parallel_nearest.py --size 683788
+
+'''
+
+# standard libraries
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+# make the repository root importable
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from functions import TreeIndex, get_nearest
+
+
+def random_radians(n, seed=42):
+    '''
+    Uniform random (latitude, longitude) radians within NYC's bounding box.
+    '''
+    rng = np.random.default_rng(seed)
+    return np.radians(np.column_stack([rng.uniform(40.4960, 40.9155, n),
+                                       rng.uniform(-74.2557, -73.7004, n)]))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--size', type=int, default=683788)
+    parser.add_argument('--max-jobs', type=int, default=os.cpu_count())
+    parser.add_argument('--chunk-size', type=int, default=50000)
+    args = parser.parse_args()
+
+    radians = random_radians(args.size)
+    index = TreeIndex(radians)
+
+    # serial reference
+    start = time.perf_counter()
+    serial_tree, serial_dist = get_nearest(radians, index)
+    serial_time = time.perf_counter() - start
+    print(f'{"n_jobs":>6} {"time (s)":>9} {"speedup":>8} {"identical":>10}')
+    print(f'{1:>6} {serial_time:>9.2f} {1:>7.2f}x {"-":>10}')
+
+    # n_jobs=1 is the serial path above
+    for n_jobs in range(2, args.max_jobs + 1):
+        start = time.perf_counter()
+        target_tree, closest_dist = get_nearest(
+            radians, index, n_jobs=n_jobs, chunk_size=args.chunk_size)
+        elapsed = time.perf_counter() - start
+        identical = (np.array_equal(target_tree, serial_tree)
+                     and np.array_equal(closest_dist, serial_dist))
+        print(f'{n_jobs:>6} {elapsed:>9.2f} {serial_time / elapsed:>7.2f}x '
+              f'{str(identical):>10}')
+
+
+if __name__ == '__main__':
+    main()
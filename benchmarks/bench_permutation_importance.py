@@ -0,0 +1,97 @@
+'''
+Time permutation importance of a RandomForest (the final model's
+parameters) on the ~147-column held-out matrix: scikit-learn's
+`permutation_importance` (every column, every row predicted again)
+against `functions.permutation_importance` per column and per one-hot
+group, and check that the per-column rankings agree.
+
+Health is planted as in `bench_good_booster.py`.
+
+Run from the repository root:
+
+    python benchmarks/bench_permutation_importance.py --rows 100000 --n-jobs -1
+
+'''
+
+# standard libraries
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+# make the repository root importable
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from functions import (TreeFeaturizer, add_spatial_features, good_precision,
+                       permutation_importance, synthetic_census)
+from bench_good_booster import planted_health
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--rows', type=int, default=100000)
+    parser.add_argument('--test-rows', type=int, default=20000)
+    parser.add_argument('--n-estimators', type=int, default=50)
+    parser.add_argument('--n-repeats', type=int, default=3)
+    parser.add_argument('--n-jobs', type=int, default=None)
+    parser.add_argument('--skip-sklearn', action='store_true')
+    args = parser.parse_args()
+
+    import pandas as pd
+    from sklearn import inspection
+    from sklearn.ensemble import RandomForestClassifier
+    from sklearn.metrics import make_scorer
+
+    trees = synthetic_census(args.rows + args.test_rows)
+    add_spatial_features(trees, engine='projected_kdtree')
+    X = TreeFeaturizer().fit_transform(trees)
+    y = planted_health(X.to_numpy(), seed=1)
+    X_train, X_test = X.iloc[:args.rows], X.iloc[args.rows:]
+    y_train, y_test = y[:args.rows], y[args.rows:]
+
+    model = RandomForestClassifier(
+        n_estimators=args.n_estimators, max_features=11, max_depth=55,
+        min_samples_leaf=3, class_weight='balanced', random_state=99,
+        n_jobs=1).fit(X_train.to_numpy(), y_train)
+    print(f'{len(X_test)} held-out rows x {X.shape[1]} features, '
+          f'{args.n_repeats} repeats, n_jobs={args.n_jobs}')
+
+    print(f'{"method":>28} {"time (s)":>9} {"rows predicted":>15}')
+    results = {}
+    if not args.skip_sklearn:
+        start = time.perf_counter()
+        result = inspection.permutation_importance(
+            model, X_test.to_numpy(), y_test,
+            scoring=make_scorer(good_precision), n_repeats=args.n_repeats,
+            n_jobs=args.n_jobs, random_state=42)
+        seconds = time.perf_counter() - start
+        results['sklearn'] = pd.Series(result.importances_mean,
+                                       index=X.columns)
+        print(f'{"sklearn, per column":>28} {seconds:>9.1f} {1:>15.1%}')
+
+    for label, groups in [('per column', None), ('per one-hot group',
+                                                 'dummies')]:
+        start = time.perf_counter()
+        importances = permutation_importance(
+            model, X_test, y_test, groups=groups, n_repeats=args.n_repeats,
+            n_jobs=args.n_jobs)
+        seconds = time.perf_counter() - start
+        predicted = np.average(importances['rows_predicted'])
+        print(f'{"functions, " + label:>28} {seconds:>9.1f} '
+              f'{predicted:>15.1%}')
+        results[label] = importances['importance']
+
+    print('\ntop features per one-hot group:')
+    print(results['per one-hot group'].head(10).round(4).to_string())
+
+    if 'sklearn' in results:
+        ours, theirs = results['per column'], results['sklearn']
+        top = set(ours.index[:10]) & set(theirs.sort_values().index[-10:])
+        rank = ours.rank().corr(theirs[ours.index].rank())
+        print(f'\nper column vs sklearn: {len(top)} of the top 10 in common, '
+              f'rank correlation {rank:.2f}')
+
+
+if __name__ == '__main__':
+    main()
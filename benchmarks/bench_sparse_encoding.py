@@ -0,0 +1,115 @@
+'''
+Compare the dense feature matrix (TreeFeaturizer + MinMaxScaler over all
+147 columns, as in the notebooks) with the sparse CSR path
+(TreeFeaturizer(scale=True, sparse=True)): peak memory of encoding and
+scaling, and RandomForest fit time.
+
+Each mode runs in a fresh process so peak RSS is not shared.
+
+Run from the repository root:
+
+    python benchmarks/bench_sparse_encoding.py --rows 550000 --n-estimators 20
+
+'''
+
+# standard libraries
+import argparse
+import os
+import subprocess
+import sys
+import time
+import tracemalloc
+
+# make the repository root importable
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from functions import TreeFeaturizer, add_spatial_features, synthetic_census
+
+
+def census_rows(n, seed=42):
+    '''
+    Synthetic census rows with the spatial features the models use.
+    '''
+    trees = synthetic_census(n, seed=seed)
+    add_spatial_features(trees, engine='projected_kdtree')
+    return trees
+
+
+def peak_rss_mb():
+    '''
+    Peak resident memory of this process in MB. Unlike ru_maxrss, VmHWM
+    is not inherited from the parent process.
+    '''
+    with open('/proc/self/status') as f:
+        for line in f:
+            if line.startswith('VmHWM'):
+                return int(line.split()[1]) / 1024
+
+
+def run(mode, rows, n_estimators):
+    from sklearn.ensemble import RandomForestClassifier
+    from sklearn.preprocessing import MinMaxScaler
+
+    trees = census_rows(rows)
+    y = trees['health'].to_numpy()
+
+    def encode():
+        if mode == 'dense':
+            X = TreeFeaturizer().fit_transform(trees)
+            return MinMaxScaler().fit_transform(X)
+        return TreeFeaturizer(scale=True, sparse=True).fit_transform(trees)
+
+    # time without tracing, then trace a second run for peak memory
+    start = time.perf_counter()
+    X = encode()
+    encode_time = time.perf_counter() - start
+
+    tracemalloc.start()
+    encode()
+    _, encode_peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    if mode == 'dense':
+        size = X.nbytes
+    else:
+        size = X.data.nbytes + X.indices.nbytes + X.indptr.nbytes
+
+    start = time.perf_counter()
+    forest = RandomForestClassifier(n_estimators=n_estimators,
+                                    class_weight='balanced', random_state=99,
+                                    n_jobs=-1)
+    forest.fit(X, y)
+    fit_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    forest.predict(X)
+    predict_time = time.perf_counter() - start
+
+    max_rss = peak_rss_mb()
+    print(f'{mode:>6} {X.shape[1]:>5} {size / 1e6:>10.1f} '
+          f'{encode_peak / 1e6:>11.1f} {encode_time:>10.2f} '
+          f'{fit_time:>9.2f} {predict_time:>11.2f} {max_rss:>13.1f}')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--rows', type=int, default=550000)
+    parser.add_argument('--n-estimators', type=int, default=20)
+    parser.add_argument('--mode', choices=['dense', 'sparse'])
+    args = parser.parse_args()
+
+    if args.mode:
+        run(args.mode, args.rows, args.n_estimators)
+        return
+
+    print(f'{"mode":>6} {"cols":>5} {"matrix MB":>10} {"encode peak":>11} '
+          f'{"encode (s)":>10} {"fit (s)":>9} {"predict (s)":>11} '
+          f'{"peak RSS (MB)":>13}')
+    for mode in ['dense', 'sparse']:
+        subprocess.run([sys.executable, __file__, '--mode', mode,
+                        '--rows', str(args.rows),
+                        '--n-estimators', str(args.n_estimators)],
+                       check=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,221 @@
+'''
+Run the hot paths of `functions` on synthetic censuses
+(`synthetic_census`) of several sizes and write the time and peak memory
+of every run to a JSON file, so commits can be compared offline.
+
+Each case and size runs in a fresh process. Generating the census and
+any inputs (e.g. the feature matrix for `find_extremes`) is not timed,
+and the peak RSS is reset just before the timed call, so 'peak_mb' is
+the high-water mark during the call and 'extra_mb' its growth over the
+RSS before it.
+
+Run from the repository root:
+
+    python benchmarks/bench_suite.py --sizes 10000 100000 1000000 10000000
+
+Results go to benchmarks/results/<commit>.json by default, which git
+ignores; copy a file elsewhere to keep it. Compare two result files
+(e.g. from two commits) with:
+
+    python benchmarks/bench_suite.py --compare old.json new.json
+
+'''
+
+# standard libraries
+import argparse
+import datetime
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+
+import numpy as np
+
+# make the repository root importable
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+from functions import (CLIP_COLS, YES_NO_COLS, TreeFeaturizer,
+                       add_spatial_features, coords_to_radians, find_extremes,
+                       get_nearest, good_precision, nearest_neighbor,
+                       rein_extremes, synthetic_census, yes_to_one)
+
+
+def featured(trees):
+    add_spatial_features(trees, engine='projected_kdtree')
+    return trees
+
+
+def model_matrix(trees):
+    return TreeFeaturizer().fit_transform(featured(trees))
+
+
+# case: function of the census returning the call to time
+CASES = {
+    'yes_to_one': lambda trees: (
+        lambda df=trees[YES_NO_COLS].copy(): yes_to_one(df, YES_NO_COLS)),
+    'good_precision': lambda trees: (
+        lambda y_pred=np.random.default_rng(0).permutation(trees['health']):
+        good_precision(trees['health'], y_pred)),
+    'nearest_neighbor/haversine': lambda trees: (
+        lambda: nearest_neighbor(trees, engine='haversine')),
+    'nearest_neighbor/projected_kdtree': lambda trees: (
+        lambda: nearest_neighbor(trees, engine='projected_kdtree')),
+    'nearest_neighbor/grid_hash': lambda trees: (
+        lambda: nearest_neighbor(trees, engine='grid_hash')),
+    'get_nearest': lambda trees: (
+        lambda points=coords_to_radians(trees): get_nearest(points, points,
+                                                            k_neighbors=2)),
+    'add_spatial_features': lambda trees: (
+        lambda df=trees[['latitude', 'longitude', 'block_id']].copy():
+        add_spatial_features(df, engine='projected_kdtree')),
+    'TreeFeaturizer/dense': lambda trees: (
+        lambda df=featured(trees): TreeFeaturizer().fit_transform(df)),
+    'TreeFeaturizer/sparse': lambda trees: (
+        lambda df=featured(trees): TreeFeaturizer(
+            scale=True, sparse=True).fit_transform(df)),
+    'find_extremes': lambda trees: (
+        lambda X=model_matrix(trees): find_extremes(X, 4)),
+    'rein_extremes': lambda trees: (
+        lambda X=model_matrix(trees): rein_extremes(X, CLIP_COLS, 4)),
+}
+
+
+def rss_mb(field):
+    '''
+    Current ('VmRSS') or peak ('VmHWM') resident memory in MB.
+    '''
+    with open('/proc/self/status') as f:
+        for line in f:
+            if line.startswith(field):
+                return int(line.split()[1]) / 1024
+
+
+def run(case, rows, seed):
+    call = CASES[case](synthetic_census(rows, seed=seed))
+
+    # reset the peak RSS to the current RSS
+    with open('/proc/self/clear_refs', 'w') as f:
+        f.write('5')
+    before = rss_mb('VmRSS')
+
+    start = time.perf_counter()
+    cpu_start = time.process_time()
+    call()
+    seconds = time.perf_counter() - start
+    cpu_seconds = time.process_time() - cpu_start
+
+    peak = rss_mb('VmHWM')
+    print(json.dumps({'seconds': seconds, 'cpu_seconds': cpu_seconds,
+                      'peak_mb': peak, 'extra_mb': peak - before}))
+
+
+def environment():
+    import pandas as pd
+    import sklearn
+
+    commit = subprocess.run(['git', 'describe', '--always', '--dirty'],
+                            cwd=ROOT, capture_output=True, text=True)
+    return {'commit': commit.stdout.strip() or None,
+            'date': datetime.datetime.now(datetime.timezone.utc).isoformat(),
+            'python': platform.python_version(), 'numpy': np.__version__,
+            'pandas': pd.__version__, 'sklearn': sklearn.__version__,
+            'cpus': os.cpu_count()}
+
+
+def compare(old_path, new_path, threshold):
+    with open(old_path) as f:
+        old = {(r['case'], r['rows']): r for r in json.load(f)['results']}
+    with open(new_path) as f:
+        new = json.load(f)['results']
+
+    print(f'{"case":>34} {"rows":>9} {"old (s)":>9} {"new (s)":>9} '
+          f'{"ratio":>6} {"old MB":>8} {"new MB":>8}')
+    regressions = 0
+    for result in new:
+        before = old.get((result['case'], result['rows']))
+        if before is None or 'seconds' not in before or 'seconds' not in result:
+            continue
+        ratio = result['seconds'] / before['seconds']
+        flag = ''
+        if ratio > threshold:
+            flag = '  slower'
+            regressions += 1
+        print(f'{result["case"]:>34} {result["rows"]:>9} '
+              f'{before["seconds"]:>9.3f} {result["seconds"]:>9.3f} '
+              f'{ratio:>6.2f} {before["peak_mb"]:>8.0f} '
+              f'{result["peak_mb"]:>8.0f}{flag}')
+    print(f'{regressions} case(s) over {threshold:.2f}x slower')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--sizes', type=int, nargs='+',
+                        default=[10000, 100000, 1000000, 10000000])
+    parser.add_argument('--cases', nargs='+', choices=list(CASES),
+                        default=list(CASES))
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--timeout', type=float, default=1800,
+                        help='seconds per case and size')
+    parser.add_argument('--output',
+                        help='default: benchmarks/results/<commit>.json')
+    parser.add_argument('--compare', nargs=2, metavar=('OLD', 'NEW'))
+    parser.add_argument('--threshold', type=float, default=1.2,
+                        help='time ratio flagged by --compare')
+    parser.add_argument('--case', help=argparse.SUPPRESS)
+    parser.add_argument('--rows', type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.compare:
+        compare(*args.compare, args.threshold)
+        return
+    if args.case:
+        run(args.case, args.rows, args.seed)
+        return
+
+    report = environment()
+    output = args.output or os.path.join(
+        ROOT, 'benchmarks', 'results', f'{report["commit"] or "results"}.json')
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+
+    print(f'{"case":>34} {"rows":>9} {"time (s)":>9} {"peak MB":>8} '
+          f'{"extra MB":>8}')
+    report['results'] = []
+    for rows in args.sizes:
+        for case in args.cases:
+            result = {'case': case, 'rows': rows}
+            try:
+                child = subprocess.run(
+                    [sys.executable, __file__, '--case', case, '--rows',
+                     str(rows), '--seed', str(args.seed)],
+                    capture_output=True, text=True, timeout=args.timeout)
+            except subprocess.TimeoutExpired:
+                result['status'] = 'timeout'
+            else:
+                if child.returncode == 0:
+                    result.update(json.loads(child.stdout.splitlines()[-1]))
+                    result['status'] = 'ok'
+                else:
+                    # e.g. killed when out of memory, without a traceback
+                    result['status'] = 'error'
+                    errors = child.stderr.strip().splitlines()
+                    result['error'] = (errors[-1] if errors
+                                       else f'exit code {child.returncode}')
+
+            if result['status'] == 'ok':
+                print(f'{case:>34} {rows:>9} {result["seconds"]:>9.3f} '
+                      f'{result["peak_mb"]:>8.0f} {result["extra_mb"]:>8.0f}')
+            else:
+                print(f'{case:>34} {rows:>9} {result["status"]:>9}')
+            report['results'].append(result)
+
+            # keep partial results if a long run is interrupted
+            with open(output, 'w') as f:
+                json.dump(report, f, indent=1)
+
+    print(f'results written to {output}')
+
+
+if __name__ == '__main__':
+    main()
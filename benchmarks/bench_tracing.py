@@ -0,0 +1,81 @@
+'''
+Measure the overhead of `PipelineTrace` on the helpers it instruments:
+the cost of one call of a traced function with no trace active and with
+one, and a small pipeline (spatial features, encoding, Good precision)
+on a synthetic census run without a trace and inside one, with the
+trace's summary table.
+
+Run from the repository root:
+
+    python benchmarks/bench_tracing.py --rows 1000000
+
+'''
+
+# standard libraries
+import argparse
+import os
+import sys
+import time
+import timeit
+
+import numpy as np
+import pandas as pd
+
+# make the repository root importable
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+from functions import (PipelineTrace, TreeFeaturizer, add_spatial_features,
+                       good_precision, synthetic_census, traced)
+
+
+@traced()
+def identity(x):
+    return x
+
+
+def pipeline(trees):
+    trees = trees.copy()
+    add_spatial_features(trees, engine='projected_kdtree')
+    TreeFeaturizer().fit_transform(trees)
+    y_pred = np.random.default_rng(0).permutation(trees['health'])
+    good_precision(trees['health'], y_pred)
+
+
+def best_of(func, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--rows', type=int, default=1000000)
+    parser.add_argument('--calls', type=int, default=1000000)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    # per call, against the undecorated function
+    plain = timeit.timeit(lambda: identity.__wrapped__(1), number=args.calls)
+    disabled = timeit.timeit(lambda: identity(1), number=args.calls)
+    with PipelineTrace():
+        enabled = timeit.timeit(lambda: identity(1), number=args.calls // 100)
+    print(f'per call: disabled +{(disabled - plain) / args.calls * 1e9:.0f} ns, '
+          f'enabled +{enabled / (args.calls // 100) * 1e6:.0f} us')
+
+    trees = synthetic_census(args.rows)
+    off = best_of(lambda: pipeline(trees), args.repeat)
+    with PipelineTrace() as trace:
+        on = best_of(lambda: pipeline(trees), args.repeat)
+    print(f'pipeline on {args.rows} rows: {off:.3f} s without a trace, '
+          f'{on:.3f} s traced ({100 * (on / off - 1):+.1f}%)')
+
+    pd.set_option('display.width', 200)
+    pd.set_option('display.max_columns', 10)
+    print(trace.summary().round(3))
+
+
+if __name__ == '__main__':
+    main()
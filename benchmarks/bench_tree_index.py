@@ -0,0 +1,114 @@
+'''
+Benchmark `TreeIndex`: build time, k-NN and radius query throughput, and
+resident memory of worker processes that load the saved index either
+memory-mapped or fully into RAM.
+
+Run from the repository root:
+
+    python benchmarks/bench_tree_index.py --size 683788 --workers 4
+
+'''
+
+# standard libraries
+import argparse
+import multiprocessing as mp
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+# make the repository root importable
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from functions import TreeIndex
+
+
+def random_radians(n, seed=42):
+    '''
+    Uniform random (latitude, longitude) radians within NYC's bounding box.
+    '''
+    rng = np.random.default_rng(seed)
+    return np.radians(np.column_stack([rng.uniform(40.4960, 40.9155, n),
+                                       rng.uniform(-74.2557, -73.7004, n)]))
+
+
+def rss_mb():
+    '''
+    Private (anonymous) and file-backed resident memory of this process,
+    in MB. File-backed pages of a memory-map are shared between processes.
+    '''
+    stats = {}
+    with open('/proc/self/status') as f:
+        for line in f:
+            if line.startswith(('RssAnon', 'RssFile')):
+                key, value, _ = line.split()
+                stats[key.rstrip(':')] = int(value) / 1024
+    return stats.get('RssAnon', np.nan), stats.get('RssFile', np.nan)
+
+
+def worker(args):
+    path, mmap_mode, queries = args
+    before_anon, _ = rss_mb()
+    index = TreeIndex.load(path, mmap_mode=mmap_mode)
+    index.query(queries, k=3)
+    after_anon, after_file = rss_mb()
+    return after_anon - before_anon, after_file
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--size', type=int, default=683788)
+    parser.add_argument('--queries', type=int, default=100000)
+    parser.add_argument('--workers', type=int, default=4)
+    args = parser.parse_args()
+
+    points = random_radians(args.size)
+    queries = random_radians(args.queries, seed=7)
+
+    # build
+    start = time.perf_counter()
+    index = TreeIndex(points)
+    print(f'build ({args.size} points): {time.perf_counter() - start:.2f} s')
+
+    # k-NN throughput
+    start = time.perf_counter()
+    index.query(queries, k=3)
+    elapsed = time.perf_counter() - start
+    print(f'k-NN (k=3): {args.queries / elapsed:,.0f} queries/s')
+
+    # radius throughput, counts only
+    for radius in [10, 50, 100]:
+        start = time.perf_counter()
+        index.query_radius(queries, radius, count_only=True)
+        elapsed = time.perf_counter() - start
+        print(f'radius {radius} m (count only): '
+              f'{args.queries / elapsed:,.0f} queries/s')
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'tree_index.joblib')
+
+        start = time.perf_counter()
+        index.save(path)
+        print(f'save: {time.perf_counter() - start:.2f} s, '
+              f'{os.path.getsize(path) / 1e6:.1f} MB on disk')
+
+        for mmap_mode in ['r', None]:
+            start = time.perf_counter()
+            TreeIndex.load(path, mmap_mode=mmap_mode)
+            print(f'load (mmap_mode={mmap_mode}): '
+                  f'{time.perf_counter() - start:.3f} s')
+
+        # per-worker memory, loading the saved index in fresh processes
+        for mmap_mode in ['r', None]:
+            with mp.get_context('spawn').Pool(args.workers) as pool:
+                results = pool.map(worker, [(path, mmap_mode, queries[:1000])]
+                                   * args.workers)
+            anon = np.mean([r[0] for r in results])
+            file_backed = np.mean([r[1] for r in results])
+            print(f'worker RSS (mmap_mode={mmap_mode}): '
+                  f'{anon:.1f} MB private, {file_backed:.1f} MB shared')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,98 @@
+'''
+Compare `verification_queue` (bounded heaps over streamed chunks) with
+materializing the full mismatch table and sorting it, on a census
+replicated 10 times with synthetic model scores.
+
+Each mode runs in a fresh process so peak RSS is not shared.
+
+Run from the repository root:
+
+    python benchmarks/bench_verification_queue.py --rows 683788 --copies 10
+
+'''
+
+# standard libraries
+import argparse
+import os
+import subprocess
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+# make the repository root importable
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from functions import daily_batches, mismatch_report, verification_queue
+from bench_load_census import peak_rss_mb
+
+CLASSES = np.array(['Fair', 'Good', 'Poor'])
+
+
+def scored_chunks(rows, copies, chunksize=250000):
+    '''
+    Synthetic scored census rows, `copies` times over, a chunk at a time.
+    Each copy has its own row ids and scores.
+    '''
+    boards = [boro * 100 + cb for boro, n_cb in
+              zip(range(1, 6), [12, 12, 18, 14, 3]) for cb in range(1, n_cb + 1)]
+    for copy in range(copies):
+        for start in range(0, rows, chunksize):
+            rng = np.random.default_rng([copy, start])
+            n = min(chunksize, rows - start)
+            probabilities = rng.dirichlet([1, 4, 1], n)
+            chunk = pd.DataFrame(
+                probabilities, columns=[f'prob_{c}' for c in CLASSES],
+                index=pd.RangeIndex(start, start + n) + copy * rows)
+            chunk.insert(0, 'prediction', CLASSES[probabilities.argmax(axis=1)])
+            chunk['health'] = rng.choice(CLASSES, n, p=[.15, .8, .05])
+            chunk['cb_num'] = rng.choice(boards, n)
+            chunk['block_id'] = rng.integers(100000, 500000, n)
+            yield chunk
+
+
+def run(mode, rows, copies, k, k_per_board):
+    start = time.perf_counter()
+    if mode == 'materialize':
+        trees = pd.concat(scored_chunks(rows, copies))
+        score_cols = ['prediction'] + [f'prob_{c}' for c in CLASSES]
+        report = mismatch_report(trees['health'], trees[score_cols],
+                                 source=trees)
+        top = report.head(k)
+        top_per_board = report.groupby('cb_num').head(k_per_board)
+    else:
+        top, top_per_board = verification_queue(
+            scored_chunks(rows, copies), k=k, k_per_board=k_per_board)
+    batches = daily_batches(top)
+    elapsed = time.perf_counter() - start
+
+    print(f'{mode:>12} {elapsed:>9.1f} {peak_rss_mb():>14.1f} '
+          f'{len(top):>6} {len(top_per_board):>8} {batches.batch.max():>8} '
+          f'{top.margin.min():>11.6f}')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--rows', type=int, default=683788)
+    parser.add_argument('--copies', type=int, default=10)
+    parser.add_argument('--k', type=int, default=1000)
+    parser.add_argument('--k-per-board', type=int, default=100)
+    parser.add_argument('--mode')
+    args = parser.parse_args()
+
+    if args.mode:
+        run(args.mode, args.rows, args.copies, args.k, args.k_per_board)
+        return
+
+    print(f'{args.rows * args.copies} scored rows')
+    print(f'{"mode":>12} {"time (s)":>9} {"peak RSS (MB)":>14} {"top":>6} '
+          f'{"per board":>8} {"batches":>8} {"kth margin":>11}')
+    for mode in ['materialize', 'queue']:
+        subprocess.run([sys.executable, __file__, '--mode', mode,
+                        '--rows', str(args.rows), '--copies', str(args.copies),
+                        '--k', str(args.k),
+                        '--k-per-board', str(args.k_per_board)], check=True)
+
+
+if __name__ == '__main__':
+    main()
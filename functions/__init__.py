@@ -0,0 +1,59 @@
+'''
+Helpers for the NYC street tree census notebooks.
+
+Submodules are imported on first use of one of their names, so e.g.
+`from functions import good_precision` only loads pandas and numpy, and
+matplotlib, scikit-learn and scipy are loaded only by the helpers that
+need them. `from functions import *` still imports every helper.
+'''
+
+# standard libraries
+import importlib
+
+
+# public names of each submodule
+_SUBMODULES = {
+    'features': ['yes_to_one', 'column_stats', 'find_extremes', 'YES_NO_COLS',
+                 'DUMMY_COLS', 'DROP_LEVELS', 'CLIP_COLS'],
+    'transformers': ['rein_extremes', 'OutlierClipper', 'TreeFeaturizer',
+                     'FeatureBinner'],
+    'plotting': ['plot_confusion_matrix', 'plot_forest_features'],
+    'spatial': ['EARTH_RADIUS', 'get_nearest', 'coords_to_radians',
+                'TreeIndex', 'project_coords', 'nearest_neighbor',
+                'add_spatial_features', 'neighborhood_features',
+                'SpatialFeatureStore'],
+    'metrics': ['good_precision', 'class_precision', 'per_class_precision',
+                'ContingencyCube'],
+    'census': ['CENSUS_COLUMNS', 'CENSUS_DTYPES', 'load_census', 'iter_census',
+               'save_checkpoint', 'load_checkpoint', 'load_pickle',
+               'iter_rows'],
+    'synthetic': ['synthetic_census', 'write_synthetic_census'],
+    'tracing': ['PipelineTrace', 'trace_stage', 'traced'],
+    'scoring': ['score_trees', 'score_file'],
+    'verification': ['mismatch_report', 'verification_queue',
+                     'daily_batches'],
+    'models': ['halving_search', 'permutation_importance', 'CompactForest'],
+    'boosting': ['GoodBooster', 'train_good_booster'],
+    'maps': ['aggregate_health_grid', 'health_grid_geojson',
+             'write_health_tiles', 'health_grid_map'],
+}
+
+_NAMES = {name: module for module, names in _SUBMODULES.items()
+          for name in names}
+
+__all__ = list(_NAMES)
+
+
+# import a helper's submodule on first access
+def __getattr__(name):
+    if name not in _NAMES:
+        raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
+
+    value = getattr(importlib.import_module(f'.{_NAMES[name]}', __name__), name)
+    globals()[name] = value
+
+    return value
+
+
+def __dir__():
+    return sorted(list(globals()) + __all__)
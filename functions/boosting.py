@@ -0,0 +1,253 @@
+'''
+Binary 'Good' vs 'Not Good' histogram gradient boosting.
+'''
+
+# standard libraries
+import numpy as np
+
+# custom classifier
+from sklearn.base import BaseEstimator, ClassifierMixin
+from sklearn.utils.validation import check_is_fitted
+
+from .metrics import good_precision
+from .models import halving_search
+from .tracing import trace_stage, traced
+from .transformers import FeatureBinner
+
+
+# histogram gradient boosting on a binary target
+class GoodBooster(BaseEstimator, ClassifierMixin):
+    '''
+    Classifier predicting whether a tree is in 'Good' health or not (Fair
+    and Poor collapsed to 'Not Good'), with scikit-learn's histogram
+    gradient boosting, early stopped on `good_precision`.
+
+    Fit it on the uint8 codes of a `FeatureBinner` (see
+    `train_good_booster`): the matrix takes an eighth of the memory and
+    every fit of a search sees the same bins. scikit-learn still maps
+    the codes to its own bins on each fit (exactly, and in about the
+    same time for any size). Each fit uses all cores through OpenMP
+    threads.
+
+    Works with `halving_search` and scores with `good_precision` on the
+    original three-class labels, since only 'Good' predictions count.
+
+
+    Optional input
+    --------------
+    label : str
+        Label of the positive class (default='Good').
+
+    other_label : str
+        Label of every other class (default='Not Good').
+
+    learning_rate : float
+        Shrinkage of each tree (default=0.1).
+
+    max_iter : int
+        Maximum number of boosting iterations (trees) (default=500).
+
+    max_leaf_nodes : int
+        Maximum number of leaves per tree (default=31).
+
+    min_samples_leaf : int
+        Minimum number of rows per leaf (default=20).
+
+    l2_regularization : float
+        L2 penalty on leaf values (default=0.0).
+
+    class_weight : dict, 'balanced' or None
+        Weights of 'Good' and 'Not Good' (default='balanced', as the
+        notebooks' forest).
+
+    early_stopping : bool
+        Whether to stop once `good_precision` on a held-out part of the
+        training data stops improving (default=True).
+
+    validation_fraction : float
+        Share of the training rows held out for early stopping
+        (default=0.1).
+
+    n_iter_no_change : int
+        Iterations without improvement before stopping (default=10).
+
+    random_state : int
+        Seed for the held-out rows (default=99).
+
+
+    Attributes
+    ----------
+    model_ : sklearn.ensemble.HistGradientBoostingClassifier
+        Fitted model.
+
+    classes_ : numpy array
+        `other_label` and `label`, in the order of the `predict_proba`
+        columns.
+
+    n_iter_ : int
+        Number of boosting iterations kept.
+
+    validation_score_ : numpy array
+        `good_precision` on the held-out rows after each iteration (empty
+        without early stopping).
+
+    '''
+
+    def __init__(self, label='Good', other_label='Not Good',
+                 learning_rate=0.1, max_iter=500, max_leaf_nodes=31,
+                 min_samples_leaf=20, l2_regularization=0.0,
+                 class_weight='balanced', early_stopping=True,
+                 validation_fraction=0.1, n_iter_no_change=10,
+                 random_state=99):
+        self.label = label
+        self.other_label = other_label
+        self.learning_rate = learning_rate
+        self.max_iter = max_iter
+        self.max_leaf_nodes = max_leaf_nodes
+        self.min_samples_leaf = min_samples_leaf
+        self.l2_regularization = l2_regularization
+        self.class_weight = class_weight
+        self.early_stopping = early_stopping
+        self.validation_fraction = validation_fraction
+        self.n_iter_no_change = n_iter_no_change
+        self.random_state = random_state
+
+    @traced('fit')
+    def fit(self, X, y):
+        '''
+        Fit on the binary target.
+
+
+        Input
+        -----
+        X : numpy array
+            Features, ideally `FeatureBinner` codes.
+
+        y : numpy array or Pandas Series
+            Labels; every label other than `label` is 'Not Good'.
+
+
+        Output
+        ------
+        self : GoodBooster
+
+        '''
+
+        from sklearn.ensemble import HistGradientBoostingClassifier
+        from sklearn.metrics import make_scorer
+
+        y = np.asarray(y)
+        binary = np.where(y == self.label, self.label, self.other_label)
+
+        self.model_ = HistGradientBoostingClassifier(
+            learning_rate=self.learning_rate, max_iter=self.max_iter,
+            max_leaf_nodes=self.max_leaf_nodes,
+            min_samples_leaf=self.min_samples_leaf,
+            l2_regularization=self.l2_regularization, max_bins=255,
+            class_weight=self.class_weight,
+            early_stopping=self.early_stopping,
+            scoring=make_scorer(good_precision, label=self.label),
+            validation_fraction=self.validation_fraction,
+            n_iter_no_change=self.n_iter_no_change,
+            random_state=self.random_state)
+        self.model_.fit(X, binary)
+
+        self.classes_ = self.model_.classes_
+        self.n_iter_ = self.model_.n_iter_
+        self.validation_score_ = self.model_.validation_score_
+
+        return self
+
+    @traced('predict')
+    def predict_proba(self, X):
+        '''
+        Probability of each class, columns in the order of `classes_`.
+        '''
+
+        check_is_fitted(self)
+
+        return self.model_.predict_proba(X)
+
+    def predict(self, X):
+        '''
+        `label` or `other_label` for each row.
+        '''
+
+        return self.classes_[self.predict_proba(X).argmax(axis=1)]
+
+
+# bin once, search and fit
+@traced()
+def train_good_booster(X, y, param_grid=None, cache_dir=None, max_bins=255,
+                       n_jobs=None, random_state=42, verbose=0, **params):
+    '''
+    Function to train a `GoodBooster`: bins the feature matrix once into
+    uint8 codes, optionally picks parameters by `halving_search` on the
+    codes (scored with `good_precision`), and fits the final model on all
+    rows.
+
+
+    Input
+    -----
+    X : numpy array or Pandas DataFrame
+        Training features, e.g. the 147-column matrix (scaled or not).
+
+    y : numpy array or Pandas Series
+        Training labels ('Good', 'Fair', 'Poor').
+
+
+    Optional input
+    --------------
+    param_grid : dict
+        `GoodBooster` parameter names and lists of values to search
+        (default=None, i.e. no search).
+
+    cache_dir : str
+        Directory for the search (required with `param_grid`), see
+        `halving_search`.
+
+    max_bins : int
+        Bins per feature (default=255).
+
+    n_jobs : int
+        Number of search worker processes (default=None). The final fit
+        always uses all cores.
+
+    random_state : int
+        Seed for the search folds (default=42).
+
+    verbose : int
+        Print search progress if > 0 (default=0).
+
+    **params :
+        Fixed `GoodBooster` parameters, e.g. `learning_rate=0.05`.
+
+
+    Output
+    ------
+    tuple :
+        binner : FeatureBinner fitted on `X`; score new data with
+            `model.predict(binner.transform(X_new))`
+        model : GoodBooster fitted on all rows
+        results : Pandas DataFrame of the search, see `halving_search`
+            (None without `param_grid`)
+
+    '''
+
+    binner = FeatureBinner(max_bins=max_bins)
+    with trace_stage('bin_fit'):
+        binner.fit(X)
+    codes = binner.transform(X)
+
+    results = None
+    if param_grid is not None:
+        if cache_dir is None:
+            raise ValueError('cache_dir is required with param_grid')
+        best_params, results = halving_search(
+            codes, y, param_grid, cache_dir, estimator=GoodBooster(**params),
+            n_jobs=n_jobs, random_state=random_state, verbose=verbose)
+        params = {**params, **best_params}
+
+    model = GoodBooster(**params).fit(codes, y)
+
+    return (binner, model, results)
@@ -0,0 +1,354 @@
+'''
+Loading the census CSV, Parquet checkpoints and pickled pipeline stages.
+'''
+
+# standard libraries
+import pandas as pd
+
+# saving/loading
+import os
+import gzip
+import pickle
+
+from .tracing import traced
+
+
+# census CSV columns kept by the notebooks, and their new names
+CENSUS_COLUMNS = {
+    'block_id': 'block_id', 'tree_dbh': 'tree_diameter',
+    'curb_loc': 'curb_loc', 'health': 'health', 'spc_common': 'species',
+    'steward': 'steward', 'guards': 'guards', 'sidewalk': 'sidewalk',
+    'user_type': 'user_type', 'root_stone': 'root_stone',
+    'root_grate': 'root_grate', 'root_other': 'root_other',
+    'trnk_wire': 'trunk_wire', 'trnk_light': 'trunk_light',
+    'trnk_other': 'trunk_other', 'brnch_ligh': 'branch_light',
+    'brnch_shoe': 'branch_shoe', 'brnch_othe': 'branch_other',
+    'cb_num': 'cb_num', 'boroname': 'boroname', 'cncldist': 'council_dist',
+    'st_assem': 'st_assembly', 'st_senate': 'st_senate', 'nta': 'nta',
+    'Latitude': 'latitude', 'longitude': 'longitude'}
+
+
+# compact dtype of every census CSV column (categories for strings)
+CENSUS_DTYPES = {
+    'created_at': 'category', 'tree_id': 'int32', 'block_id': 'int32',
+    'the_geom': 'object', 'tree_dbh': 'int16', 'stump_diam': 'int16',
+    'curb_loc': 'category', 'status': 'category', 'health': 'category',
+    'spc_latin': 'category', 'spc_common': 'category',
+    'steward': 'category', 'guards': 'category', 'sidewalk': 'category',
+    'user_type': 'category', 'problems': 'category',
+    'root_stone': 'category', 'root_grate': 'category',
+    'root_other': 'category', 'trnk_wire': 'category',
+    'trnk_light': 'category', 'trnk_other': 'category',
+    'brnch_ligh': 'category', 'brnch_shoe': 'category',
+    'brnch_othe': 'category', 'address': 'object', 'zipcode': 'int32',
+    'zip_city': 'category', 'cb_num': 'int16', 'borocode': 'int8',
+    'boroname': 'category', 'cncldist': 'int8', 'st_assem': 'int8',
+    'st_senate': 'int8', 'nta': 'category', 'nta_name': 'category',
+    'boro_ct': 'int32', 'state': 'category', 'Latitude': 'float64',
+    'longitude': 'float64', 'x_sp': 'float32', 'y_sp': 'float32'}
+
+
+# load the street tree census
+@traced('load')
+def load_census(path='data/2015StreetTreesCensus_TREES.csv', extra_cols=None,
+                clean=True, chunksize=None):
+    '''
+    Function to load the 2015 street tree census CSV with only the needed
+    columns, compact dtypes and the notebooks' column names.
+
+
+    Optional input
+    --------------
+    path : str
+        Path to the census CSV
+        (default='data/2015StreetTreesCensus_TREES.csv').
+
+    extra_cols : list (str)
+        Raw CSV columns to load in addition to `CENSUS_COLUMNS`, e.g.
+        ['tree_id', 'address'] (default=None). They keep their raw names,
+        except 'Latitude', which is always renamed to 'latitude'.
+
+    clean : bool
+        Whether to apply the initial cleaning from the notebooks
+        (default=True): drop dead trees and stumps and rows with missing
+        values, and rename steward '4orMore' to '5plus'.
+
+    chunksize : int
+        If set, read and clean the file this many rows at a time
+        (default=None), so only one raw chunk is in memory at once.
+
+
+    Output
+    ------
+    trees : Pandas DataFrame
+        Index is the row number in the CSV, as in the notebooks, so rows
+        can be matched back to the raw file.
+
+    '''
+
+    chunks = list(iter_census(path, extra_cols=extra_cols, clean=clean,
+                              chunksize=chunksize))
+
+    return _concat_categorical(chunks)
+
+
+# stream the street tree census
+def iter_census(path='data/2015StreetTreesCensus_TREES.csv', extra_cols=None,
+                clean=True, chunksize=None):
+    '''
+    Generator version of `load_census`, yielding one cleaned DataFrame
+    per `chunksize` rows of the CSV (or the whole file if None).
+    Categories may differ between chunks.
+    '''
+
+    extra_cols = list(extra_cols or [])
+
+    # status is needed to filter dead trees and stumps
+    usecols = list(CENSUS_COLUMNS) + [col for col in extra_cols
+                                      if col not in CENSUS_COLUMNS]
+    if clean and 'status' not in usecols:
+        usecols.append('status')
+
+    # NOTE: only empty fields are missing; 'None' is a valid steward,
+    # guards and problems value
+    reader = pd.read_csv(path, usecols=usecols, chunksize=chunksize,
+                         dtype={col: CENSUS_DTYPES[col] for col in usecols},
+                         keep_default_na=False, na_values=[''])
+    if chunksize is None:
+        reader = [reader]
+
+    for chunk in reader:
+
+        # keep the CSV's column order with the notebooks' names
+        chunk = chunk.rename(columns=CENSUS_COLUMNS)
+
+        if clean:
+            chunk = _clean_census(chunk, drop_status='status' not in extra_cols)
+
+        yield chunk
+
+
+@traced('clean')
+def _clean_census(trees, drop_status=True):
+    '''
+    Initial cleaning from the notebooks: drop dead trees, stumps and rows
+    with missing values, and rename steward '4orMore' to '5plus'.
+    '''
+
+    trees = trees[~trees['status'].isin(['Dead', 'Stump'])]
+    if drop_status:
+        trees = trees.drop(columns='status')
+    trees = trees.dropna(how='any', axis=0,
+                         subset=list(CENSUS_COLUMNS.values()))
+
+    # rename the category rather than rewriting every row
+    steward = trees['steward']
+    if '4orMore' in steward.cat.categories:
+        trees = trees.assign(
+            steward=steward.cat.rename_categories({'4orMore': '5plus'}))
+
+    # drop categories no longer present (e.g. the dead trees' health)
+    categorical = trees.select_dtypes('category').columns
+    return trees.assign(**{col: trees[col].cat.remove_unused_categories()
+                           for col in categorical})
+
+
+def _concat_categorical(frames):
+    '''
+    Concatenate DataFrames, keeping categorical columns categorical by
+    giving each one the union of its categories first.
+    '''
+
+    if len(frames) == 1:
+        return frames[0]
+
+    for col in frames[0].select_dtypes('category').columns:
+        categories = pd.api.types.union_categoricals(
+            [frame[col] for frame in frames]).categories
+        frames = [frame.assign(**{col: frame[col].cat.set_categories(
+            sorted(categories))}) for frame in frames]
+
+    return pd.concat(frames)
+
+
+# save a pipeline stage
+@traced()
+def save_checkpoint(df, name, directory='data', sort_by=('boroname', 'user_type'),
+                    row_group_size=65536):
+    '''
+    Function to save a pipeline stage (e.g. 'nyc_trees_initial_clean') as
+    a columnar Parquet file, replacing the gzip-compressed pickles.
+
+    Rows are clustered by `sort_by` before writing, so each row group
+    covers few boroughs/user types and `load_checkpoint` filters can skip
+    whole row groups using their statistics.
+
+
+    Input
+    -----
+    df : Pandas DataFrame
+        Stage to save. The index is stored with it.
+
+    name : str
+        Checkpoint name, without extension.
+
+
+    Optional input
+    --------------
+    directory : str
+        Directory to write to (default='data').
+
+    sort_by : tuple (str)
+        Columns to cluster rows by, where present
+        (default=('boroname', 'user_type')).
+
+    row_group_size : int
+        Maximum number of rows per row group (default=65536).
+
+
+    Output
+    ------
+    path : str
+        Path of the written file.
+
+    '''
+
+    path = os.path.join(directory, f'{name}.parquet')
+
+    # cluster rows by the usual filter columns; loading restores the order
+    sort_by = [col for col in sort_by if col in df.columns]
+    if sort_by:
+        df = df.sort_values(sort_by, kind='stable')
+
+    df.to_parquet(path, engine='pyarrow', row_group_size=row_group_size)
+
+    return path
+
+
+# load a pipeline stage
+@traced()
+def load_checkpoint(name, directory='data', columns=None, filters=None):
+    '''
+    Function to load a pipeline stage saved with `save_checkpoint`,
+    reading only the needed columns and row groups.
+
+
+    Input
+    -----
+    name : str
+        Checkpoint name, without extension.
+
+
+    Optional input
+    --------------
+    directory : str
+        Directory to read from (default='data').
+
+    columns : list (str)
+        Columns to load (default=None, i.e. all). The index is always
+        loaded.
+
+    filters : list (tuple)
+        Row filters in pyarrow's format (default=None), e.g.
+        `[('user_type', '==', 'Volunteer')]` or
+        `[('boroname', 'in', ['Bronx', 'Queens'])]`.
+
+
+    Output
+    ------
+    df : Pandas DataFrame
+        Rows in index order, as they were before saving.
+
+    '''
+
+    path = os.path.join(directory, f'{name}.parquet')
+
+    # memory-map the file instead of reading it into a buffer first
+    df = pd.read_parquet(path, engine='pyarrow', columns=columns,
+                         filters=filters, memory_map=True)
+
+    return df.sort_index()
+
+
+# load a gzip-compressed pickle, as saved by the notebooks
+@traced()
+def load_pickle(path):
+    '''
+    Function to load a gzip-compressed pickle, e.g.
+    'data/final_model.pickle'.
+    '''
+
+    with gzip.open(path, 'rb') as hello:
+        return pickle.load(hello)
+
+
+# stream rows from a file
+def iter_rows(path, chunksize=100000, columns=None):
+    '''
+    Function to read a CSV or Parquet file `chunksize` rows at a time.
+
+
+    Input
+    -----
+    path : str
+        File ending in '.csv' or '.parquet'. A CSV's first column is
+        used as the index; Parquet files use their stored index, or the
+        row position if none was stored.
+
+
+    Optional input
+    --------------
+    chunksize : int
+        Number of rows per chunk (default=100000).
+
+    columns : list (str)
+        Columns to read (default=None, i.e. all).
+
+
+    Output
+    ------
+    Yields Pandas DataFrames.
+
+    '''
+
+    if path.endswith('.parquet'):
+        import pyarrow.parquet as pq
+
+        batches = pq.ParquetFile(path, memory_map=True).iter_batches(
+            batch_size=chunksize, columns=_with_index_columns(path, columns))
+
+        # a RangeIndex is not stored with the rows, so number them by
+        # their position in the file instead
+        start = 0
+        for batch in batches:
+            chunk = batch.to_pandas()
+            if isinstance(chunk.index, pd.RangeIndex):
+                chunk.index = pd.RangeIndex(start, start + len(chunk))
+            start += len(chunk)
+            yield chunk
+
+    else:
+        usecols = None
+        if columns is not None:
+            index_col = pd.read_csv(path, nrows=0).columns[0]
+            usecols = [index_col] + list(columns)
+        yield from pd.read_csv(path, index_col=0, usecols=usecols,
+                               chunksize=chunksize, keep_default_na=False,
+                               na_values=[''])
+
+
+def _with_index_columns(path, columns):
+    '''
+    Add the stored pandas index columns of a Parquet file to `columns`.
+    '''
+
+    if columns is None:
+        return None
+
+    import pyarrow.parquet as pq
+
+    metadata = pq.read_schema(path).pandas_metadata or {}
+    index_columns = [col for col in metadata.get('index_columns', [])
+                     if isinstance(col, str)]
+
+    return list(columns) + index_columns
@@ -0,0 +1,243 @@
+'''
+Data cleaning and feature helpers that only need pandas and numpy.
+'''
+
+# standard libraries
+import pandas as pd
+import numpy as np
+
+from .tracing import traced
+
+
+# dummy yes/no columns
+@traced()
+def yes_to_one(df, cols):
+    '''
+    Turn columns with 'Yes' and 'No' values into 1s and 0s.
+
+
+    Input
+    -----
+    df : Pandas DataFrame
+        DataFrame containing target data.
+
+    cols : list (str)
+        Column names.
+
+
+    Output
+    ------
+    NONE : Overwrites the input columns!
+
+    '''
+
+    # replace values with 0 or 1 for each column in list
+    for col in cols:
+        df[col] = np.where(df[col] == 'Yes', 1, 0)
+
+
+# summary statistics of numeric columns
+@traced(rows_out=False)
+def column_stats(df, chunk_size=65536):
+    '''
+    Function to compute count, mean, standard deviation, minimum and
+    maximum of every numeric column in a single pass over the data.
+
+
+    Input
+    -----
+    df : Pandas DataFrame
+        DataFrame containing target data. Non-numeric columns are
+        ignored.
+
+
+    Optional input
+    --------------
+    chunk_size : int
+        Number of rows converted to a float block at a time
+        (default=65536), which bounds the extra memory used.
+
+
+    Output
+    ------
+    stats : Pandas DataFrame
+        One row per numeric column, with columns 'count', 'mean', 'std'
+        (sample standard deviation, as in pandas), 'min' and 'max'.
+        Missing values are skipped.
+
+    '''
+
+    numeric = df.select_dtypes(include=['number', 'bool'])
+
+    # boolean columns (e.g. one-hot dummies) have closed-form statistics
+    is_bool = (numeric.dtypes == bool).to_numpy()
+    bool_stats = _bool_column_stats(numeric.loc[:, is_bool])
+    other_stats = _chunked_column_stats(numeric.loc[:, ~is_bool], chunk_size)
+
+    # output statistics, in the original column order
+    return pd.concat([bool_stats, other_stats]).loc[numeric.columns]
+
+
+def _bool_column_stats(df):
+    '''
+    `column_stats` for boolean columns, from a single count of True values.
+    '''
+
+    n_rows = len(df)
+    n_true = np.count_nonzero(df.to_numpy(), axis=0).astype(np.float64)
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        mean = n_true / n_rows
+        std = np.sqrt(n_true * (1 - mean) / (n_rows - 1))
+
+    stats = pd.DataFrame({'count': np.full(len(n_true), float(n_rows)),
+                          'mean': mean,
+                          'std': std,
+                          'min': (n_true == n_rows).astype(np.float64),
+                          'max': (n_true > 0).astype(np.float64)},
+                         index=df.columns)
+
+    # match the general path on empty and single-row frames
+    if n_rows == 0:
+        stats[['mean', 'min', 'max']] = np.nan
+    if n_rows < 2:
+        stats['std'] = np.nan
+
+    return stats
+
+
+def _chunked_column_stats(df, chunk_size):
+    '''
+    `column_stats` for general numeric columns, merging per-chunk
+    statistics so only `chunk_size` rows are held as floats at a time.
+    '''
+
+    n_cols = df.shape[1]
+
+    # running statistics for every column at once
+    count = np.zeros(n_cols)
+    mean = np.zeros(n_cols)
+    sq_dev = np.zeros(n_cols)
+    col_min = np.full(n_cols, np.nan)
+    col_max = np.full(n_cols, np.nan)
+
+    # ignore empty and all-missing columns, which come out as NaN
+    with np.errstate(invalid='ignore', divide='ignore'):
+        for start in range(0, len(df), chunk_size):
+            block = df.iloc[start:start + chunk_size].to_numpy(
+                dtype=np.float64, na_value=np.nan)
+
+            # statistics of this chunk
+            chunk_count = (~np.isnan(block)).sum(axis=0)
+            chunk_mean = np.nansum(block, axis=0) / chunk_count
+            chunk_sq_dev = np.nansum((block - chunk_mean) ** 2, axis=0)
+
+            # merge into the running mean and squared deviations
+            # (Chan et al. parallel variance update)
+            total = count + chunk_count
+            delta = chunk_mean - mean
+            has_values = chunk_count > 0
+            mean = np.where(has_values, mean + delta * chunk_count / total,
+                            mean)
+            sq_dev = np.where(has_values,
+                              sq_dev + chunk_sq_dev
+                              + delta ** 2 * count * chunk_count / total,
+                              sq_dev)
+            count = total
+
+            # fmin/fmax skip missing values
+            col_min = np.fmin(col_min, np.fmin.reduce(block, axis=0))
+            col_max = np.fmax(col_max, np.fmax.reduce(block, axis=0))
+
+        std = np.sqrt(sq_dev / (count - 1))
+
+    return pd.DataFrame({'count': count,
+                         'mean': np.where(count > 0, mean, np.nan),
+                         'std': np.where(count > 1, std, np.nan),
+                         'min': col_min,
+                         'max': col_max},
+                        index=df.columns)
+
+
+# find outliers
+@traced(rows_out=False)
+def find_extremes(df, num_std):
+    '''
+    Function to find columns that contain outlier values.
+
+
+    Input
+    -----
+    df : Pandas DataFrame
+        DataFrame containing target data. Non-numeric columns are
+        ignored.
+
+    num_std : int
+        Number of standard deviations from the mean to define outlier
+        status.
+
+
+    Output
+    ------
+    tuple :
+        extreme_list : list (str)
+            Columns that contain outlier values.
+        thresholds : Pandas DataFrame
+            'lower' and 'upper' outlier thresholds for every numeric
+            column.
+
+    '''
+
+    # all column statistics in one pass
+    stats = column_stats(df)
+
+    # values beyond num_std standard deviations from the mean
+    thresholds = pd.DataFrame({'lower': stats['mean'] - num_std * stats['std'],
+                               'upper': stats['mean'] + num_std * stats['std']})
+
+    # columns with a value beyond either threshold
+    is_extreme = ((stats['max'] > thresholds['upper'])
+                  | (stats['min'] < thresholds['lower']))
+    extreme_list = list(stats.index[is_extreme])
+
+    # output columns list and thresholds
+    return (extreme_list, thresholds)
+
+
+# columns with 'Yes'/'No' values
+YES_NO_COLS = ['root_stone', 'root_grate', 'root_other', 'trunk_wire',
+               'trunk_light', 'trunk_other', 'branch_light', 'branch_shoe',
+               'branch_other']
+
+
+# multivariate columns to dummy
+DUMMY_COLS = ['steward', 'guards', 'boroname', 'cb_num', 'species']
+
+
+# dummy dropped from each multivariate column, to prevent multicollinearity
+DROP_LEVELS = {'steward': 'None', 'guards': 'None',
+               'boroname': 'Staten Island', 'cb_num': '101',
+               'species': 'Other'}
+
+
+# continuous columns whose outliers are reined in
+CLIP_COLS = ['tree_diameter', 'log_block_count', 'neighbor_dist']
+
+
+def _as_category_values(column):
+    '''
+    Community board numbers are encoded as strings, as in the notebooks.
+    '''
+
+    if column.name == 'cb_num':
+        return column.astype(str)
+
+    return column
+
+
+def _dummy_name(col, level):
+    '''
+    Dummy column name in the notebooks' format, e.g. 'boroname_Staten_Island'.
+    '''
+
+    return f'{col}_{level}'.replace(' ', '_').replace("'", '')
@@ -0,0 +1,320 @@
+'''
+Health-mix grid layers for web maps.
+'''
+
+# standard libraries
+import pandas as pd
+import numpy as np
+
+# saving
+import os
+import json
+
+from .tracing import traced
+
+
+# health mix of trees binned into map grid cells
+@traced(rows_out=False)
+def aggregate_health_grid(trees, zoom, cell_px=16, target='health'):
+    '''
+    Function to bin trees into square cells of a web map's pixel grid
+    at one zoom level and count each cell's health mix, instead of
+    drawing one marker per tree.
+
+
+    Input
+    -----
+    trees : Pandas DataFrame
+        Data with 'latitude', 'longitude' and `target` columns.
+
+    zoom : int
+        Web map (Web Mercator) zoom level, e.g. 11 for the whole city or
+        15 for a neighborhood.
+
+
+    Optional input
+    --------------
+    cell_px : int
+        Cell size in screen pixels at that zoom (default=16), i.e.
+        about 900 m at zoom 11 and 60 m at zoom 15 in NYC.
+
+    target : str
+        Column whose values are counted per cell (default='health').
+
+
+    Output
+    ------
+    cells : Pandas DataFrame
+        One row per cell with at least one tree with a `target` value
+        (trees without one are not counted), with 'col', 'row', the cell
+        bounds
+        ('west', 'south', 'east', 'north'), 'n_trees', a count column per
+        `target` value and 'good_share' (share of 'Good' trees, if any).
+
+    '''
+
+    # position in the zoom level's global pixel grid
+    n_pixels = 256 * 2 ** zoom
+    lat = np.radians(trees['latitude'].to_numpy(dtype=np.float64))
+    x = (trees['longitude'].to_numpy(dtype=np.float64) + 180) / 360 * n_pixels
+    y = (1 - np.arcsinh(np.tan(lat)) / np.pi) / 2 * n_pixels
+
+    # one key per cell, then count (cell, value) pairs at once; trees
+    # with a missing value (e.g. dead trees' health) are left out
+    n_cols = int(np.ceil(n_pixels / cell_px))
+    keys = (y // cell_px).astype(np.int64) * n_cols + (x // cell_px).astype(np.int64)
+    codes, levels = pd.factorize(trees[target], sort=True)
+    valid = codes >= 0
+    cell_keys, cell_codes = np.unique(keys[valid], return_inverse=True)
+    counts = np.bincount(cell_codes * len(levels) + codes[valid],
+                         minlength=len(cell_keys) * len(levels))
+    counts = counts.reshape(-1, len(levels))
+
+    cells = pd.DataFrame({'col': cell_keys % n_cols, 'row': cell_keys // n_cols})
+
+    # cell bounds in degrees
+    cells['west'] = cells['col'] * cell_px / n_pixels * 360 - 180
+    cells['east'] = (cells['col'] + 1) * cell_px / n_pixels * 360 - 180
+    cells['north'] = _pixel_to_lat(cells['row'] * cell_px, n_pixels)
+    cells['south'] = _pixel_to_lat((cells['row'] + 1) * cell_px, n_pixels)
+
+    cells['n_trees'] = counts.sum(axis=1)
+    for i, level in enumerate(levels):
+        cells[str(level)] = counts[:, i]
+    if 'Good' in cells:
+        cells['good_share'] = cells['Good'] / cells['n_trees']
+
+    return cells
+
+
+def _pixel_to_lat(y, n_pixels):
+    '''
+    Latitude (in degrees) of a Web Mercator pixel row.
+    '''
+
+    return np.degrees(np.arctan(np.sinh(np.pi * (1 - 2 * y / n_pixels))))
+
+
+# grid cells as GeoJSON
+def health_grid_geojson(cells, precision=5):
+    '''
+    Function to convert `aggregate_health_grid` cells into a compact
+    GeoJSON FeatureCollection of squares, with the counts as properties.
+
+
+    Input
+    -----
+    cells : Pandas DataFrame
+        Output of `aggregate_health_grid`.
+
+
+    Optional input
+    --------------
+    precision : int
+        Decimal places of the coordinates (default=5, about 1 m).
+
+
+    Output
+    ------
+    geojson : dict
+
+    '''
+
+    bounds = cells[['west', 'south', 'east', 'north']].round(precision)
+    properties = cells.drop(columns=['col', 'row', 'west', 'south', 'east',
+                                     'north'])
+    if 'good_share' in properties:
+        properties = properties.assign(good_share=properties['good_share']
+                                       .round(3))
+
+    features = [
+        {'type': 'Feature',
+         'geometry': {'type': 'Polygon',
+                      'coordinates': [[[w, s], [e, s], [e, n], [w, n], [w, s]]]},
+         'properties': props}
+        for (w, s, e, n), props in zip(bounds.itertuples(index=False),
+                                       properties.to_dict('records'))]
+
+    return {'type': 'FeatureCollection', 'features': features}
+
+
+# grid cells at several zoom levels, written to a directory
+@traced()
+def write_health_tiles(trees, directory='maps/tiles', zooms=(11, 13, 15),
+                       cell_px=16):
+    '''
+    Function to write one GeoJSON file of `aggregate_health_grid` cells
+    per zoom level, e.g. for a local map server or `health_grid_map`.
+
+
+    Input
+    -----
+    trees : Pandas DataFrame
+        Data with 'latitude', 'longitude' and 'health' columns.
+
+
+    Optional input
+    --------------
+    directory : str
+        Directory to write to (default='maps/tiles').
+
+    zooms : tuple (int)
+        Zoom levels to aggregate at (default=(11, 13, 15)).
+
+    cell_px : int
+        Cell size in screen pixels (default=16).
+
+
+    Output
+    ------
+    paths : dict
+        Path of the 'health_z<zoom>.geojson' file for each zoom.
+
+    '''
+
+    os.makedirs(directory, exist_ok=True)
+
+    paths = {}
+    for zoom in zooms:
+        geojson = health_grid_geojson(aggregate_health_grid(trees, zoom,
+                                                            cell_px))
+        paths[zoom] = os.path.join(directory, f'health_z{zoom}.geojson')
+        with open(paths[zoom], 'w') as f:
+            f.write(json.dumps(geojson, separators=(',', ':')))
+
+    return paths
+
+
+# folium map of grid cells
+def health_grid_map(paths, location=(40.700991, -73.924587), zoom_start=11,
+                    thresholds=(0.8, 0.6), embed=True):
+    '''
+    Function to make a folium map with one layer of health grid cells per
+    zoom level, colored like the notebooks' tree markers. Each layer is
+    shown only while the map is zoomed to its range: from its zoom level
+    up to the next one's (e.g. zoom 11 layer at zooms 0-12, zoom 13 layer
+    at 13-14 and zoom 15 layer from 15 on).
+
+
+    Input
+    -----
+    paths : dict
+        GeoJSON path (or URL) per zoom level, from `write_health_tiles`.
+
+
+    Optional input
+    --------------
+    location : tuple (float)
+        Map center (default=(40.700991, -73.924587)).
+
+    zoom_start : int
+        Initial zoom (default=11).
+
+    thresholds : tuple (float)
+        Share of 'Good' trees from which a cell is green, then yellow,
+        otherwise red (default=(0.8, 0.6)).
+
+    embed : bool
+        Whether to embed every layer in the page (default=True), so it
+        works as a saved file or in a notebook, but the page carries the
+        finest layer too. With `embed=False`, each layer is fetched from
+        its path only when the map first reaches its zoom, which keeps
+        the page light at city scale; the paths must then be URLs
+        relative to the page, served over HTTP (browsers block fetching
+        local files).
+
+
+    Output
+    ------
+    tree_map : folium.Map
+
+    '''
+
+    import folium
+
+    zooms = sorted(paths)
+    layers = []
+    for i, zoom in enumerate(zooms):
+        layer = {'min': zoom if i else 0,
+                 'max': zooms[i + 1] - 1 if i + 1 < len(zooms) else 30}
+        if embed:
+            with open(paths[zoom]) as f:
+                layer['data'] = json.load(f)
+        else:
+            layer['url'] = paths[zoom]
+        layers.append(layer)
+
+    tree_map = folium.Map(location=list(location), zoom_start=zoom_start)
+    _zoom_layers(layers, thresholds).add_to(tree_map)
+
+    return tree_map
+
+
+def _zoom_layers(layers, thresholds):
+    '''
+    folium element that shows each GeoJSON layer only in its zoom range
+    (defined here so folium is only imported by `health_grid_map`).
+    '''
+
+    from branca.element import MacroElement, Template
+
+    class ZoomLayers(MacroElement):
+        _template = Template('''
+            {% macro script(this, kwargs) %}
+            (function() {
+                var map = {{ this._parent.get_name() }};
+                var layers = {{ this.layers|tojson }};
+                var green = {{ this.green }}, yellow = {{ this.yellow }};
+
+                function style(feature) {
+                    var share = feature.properties.good_share || 0;
+                    var color = share >= green ? 'green'
+                        : share >= yellow ? 'yellow' : 'red';
+                    return {fillColor: color, color: color, weight: 0,
+                            fillOpacity: 0.6};
+                }
+                function tooltip(feature, layer) {
+                    layer.bindTooltip('trees: ' + feature.properties.n_trees
+                        + '<br>good share: ' + feature.properties.good_share);
+                }
+
+                layers.forEach(function(spec) {
+                    spec.layer = L.geoJson(spec.data || null,
+                        {style: style, onEachFeature: tooltip});
+                    spec.loaded = Boolean(spec.data);
+                    delete spec.data;
+                });
+
+                // show only the layer of the current zoom, fetching it
+                // the first time it is needed
+                function update() {
+                    var zoom = map.getZoom();
+                    layers.forEach(function(spec) {
+                        var visible = zoom >= spec.min && zoom <= spec.max;
+                        if (visible && !spec.loaded) {
+                            spec.loaded = true;
+                            fetch(spec.url)
+                                .then(function(r) { return r.json(); })
+                                .then(function(data) {
+                                    spec.layer.addData(data); });
+                        }
+                        if (visible) {
+                            map.addLayer(spec.layer);
+                        } else {
+                            map.removeLayer(spec.layer);
+                        }
+                    });
+                }
+                map.on('zoomend', update);
+                update();
+            })();
+            {% endmacro %}
+        ''')
+
+        def __init__(self, layers, thresholds):
+            super().__init__()
+            self._name = 'ZoomLayers'
+            self.layers = layers
+            self.green, self.yellow = thresholds
+
+    return ZoomLayers(layers, thresholds)
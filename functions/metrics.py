@@ -0,0 +1,383 @@
+'''
+Precision metrics and contingency tables for tree health.
+'''
+
+# standard libraries
+import pandas as pd
+import numpy as np
+
+from .tracing import traced
+
+
+# custom scoring function
+@traced()
+def good_precision(y_true, y_pred, label='Good', zero_division=0.0, **kwargs):
+    '''
+    Custom scoring function calculating precision of 'Good' predictions.
+
+
+    Input
+    -----
+    y_true : Pandas Series or array
+        Actual labels.
+
+    y_pred : Pandas Series or array
+        Predicted labels.
+
+
+    Optional input
+    --------------
+    label : str or int
+        Label counted as 'Good' (default='Good'). Set to the matching
+        code if labels are categorical codes.
+
+    zero_division : float
+        Score returned if there are no 'Good' predictions (default=0.0).
+
+
+    Output
+    ------
+    score : float
+        Precision score for only 'Good' predictions.
+
+    '''
+
+    return class_precision(y_true, y_pred, label=label,
+                           zero_division=zero_division)
+
+
+# precision of a single class
+def class_precision(y_true, y_pred, label, zero_division=0.0):
+    '''
+    Function calculating precision of predictions of a single class.
+
+
+    Input
+    -----
+    y_true : Pandas Series, Categorical or array
+        Actual labels (or categorical codes).
+
+    y_pred : Pandas Series, Categorical or array
+        Predicted labels (or categorical codes). Compared by position
+        with `y_true`.
+
+    label : str or int
+        Class whose precision is calculated.
+
+
+    Optional input
+    --------------
+    zero_division : float
+        Score returned if `label` is never predicted (default=0.0).
+
+
+    Output
+    ------
+    score : float
+        Share of `label` predictions that are correct.
+
+    '''
+
+    y_true = np.asarray(y_true)
+    y_pred = np.asarray(y_pred)
+    if len(y_true) != len(y_pred):
+        raise ValueError('y_true and y_pred must have the same length')
+
+    # positions where label was predicted
+    predicted = y_pred == label
+    n_predicted = np.count_nonzero(predicted)
+    if n_predicted == 0:
+        return zero_division
+
+    # true positives / (true positives + false positives)
+    return np.count_nonzero(y_true[predicted] == label) / n_predicted
+
+
+# precision of every class
+@traced(rows_out=False)
+def per_class_precision(y_true, y_pred, labels=None, zero_division=0.0):
+    '''
+    Function calculating precision of predictions of every class at once.
+
+
+    Input
+    -----
+    y_true : Pandas Series, Categorical or array
+        Actual labels (or categorical codes).
+
+    y_pred : Pandas Series, Categorical or array
+        Predicted labels (or categorical codes). Compared by position
+        with `y_true`.
+
+
+    Optional input
+    --------------
+    labels : list
+        Classes to report (default=None, i.e. every class present in
+        either input, sorted).
+
+    zero_division : float
+        Score given to classes that are never predicted (default=0.0).
+
+
+    Output
+    ------
+    scores : Pandas Series
+        Precision of each class, indexed by label.
+
+    '''
+
+    y_true = np.asarray(y_true)
+    y_pred = np.asarray(y_pred)
+    if len(y_true) != len(y_pred):
+        raise ValueError('y_true and y_pred must have the same length')
+
+    # hash-based unique values, rather than sorting every row
+    if labels is None:
+        labels = sorted(set(pd.unique(y_true)) | set(pd.unique(y_pred)))
+    labels = pd.Index(labels)
+
+    # code each prediction by its position in labels (-1 if not listed)
+    codes = labels.get_indexer(y_pred)
+    listed = codes >= 0
+    correct = listed & (y_true == y_pred)
+
+    # predictions and correct predictions per class
+    n_predicted = np.bincount(codes[listed], minlength=len(labels))
+    n_correct = np.bincount(codes[correct], minlength=len(labels))
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        scores = np.where(n_predicted > 0, n_correct / n_predicted,
+                          zero_division)
+
+    return pd.Series(scores, index=labels, name='precision')
+
+
+# health contingency tables for many columns at once
+class ContingencyCube:
+    '''
+    Contingency tables of health against many categorical columns,
+    counted in a single pass: every column is factorized once, and all
+    (column level, health) pairs are counted with one `np.bincount`.
+
+    Proportions, chi-squared tests and standardized residuals are then
+    computed from the cached tables, in the same layout as the EDA's
+    `groupby(...).value_counts(normalize=True).unstack()`,
+    `pd.crosstab`, `stats.chi2_contingency` and
+    `sm.stats.Table(...).standardized_resids`.
+
+
+    Input
+    -----
+    trees : Pandas DataFrame
+        Census data with `target` and the `cols` columns.
+
+    cols : list (str)
+        Categorical columns to cross with `target`, e.g. ['boroname',
+        'cb_num', 'nta', 'species', 'steward', 'guards'].
+
+
+    Optional input
+    --------------
+    target : str
+        Column to cross every column with (default='health').
+
+
+    Attributes
+    ----------
+    target_levels : Pandas Index
+        Sorted values of `target`.
+
+    levels : dict
+        Sorted values of each column.
+
+    tables : dict
+        Count table (numpy array, levels x target levels) of each column.
+
+    '''
+
+    def __init__(self, trees, cols, target='health'):
+
+        self.target = target
+        self.cols = list(cols)
+
+        # factorize every column once; rows with a missing value in a
+        # column are left out of that column's table, as in pd.crosstab
+        target_codes, self.target_levels = pd.factorize(trees[target],
+                                                        sort=True)
+        n_target = len(self.target_levels)
+
+        self.levels = {}
+        offsets = [0]
+        codes = np.empty((len(trees), len(self.cols)), dtype=np.int64)
+        for i, col in enumerate(self.cols):
+            codes[:, i], self.levels[col] = pd.factorize(trees[col], sort=True)
+            offsets.append(offsets[-1] + len(self.levels[col]))
+
+        # one code per (column level, target level) pair, counted at once
+        valid = (codes >= 0) & (target_codes >= 0)[:, None]
+        pairs = (codes + np.array(offsets[:-1])) * n_target + target_codes[:, None]
+        counts = np.bincount(pairs[valid], minlength=offsets[-1] * n_target)
+        counts = counts.reshape(-1, n_target)
+
+        self.tables = {col: counts[offsets[i]:offsets[i + 1]]
+                       for i, col in enumerate(self.cols)}
+
+    def counts(self, col):
+        '''
+        Count table, as `pd.crosstab(trees[target], trees[col])`.
+        '''
+
+        return pd.DataFrame(self.tables[col].T,
+                            index=self._target_index(),
+                            columns=self._level_index(col))
+
+    def proportions(self, col):
+        '''
+        Share of each target level within each level of `col`, as
+        `trees.groupby(col)[target].value_counts(normalize=True).unstack()`.
+        '''
+
+        table = self.tables[col]
+        return pd.DataFrame(table / table.sum(axis=1, keepdims=True),
+                            index=self._level_index(col),
+                            columns=self._target_index())
+
+    def chi2(self, col, correction=True):
+        '''
+        Chi-squared test of independence, as `stats.chi2_contingency`.
+
+
+        Input
+        -----
+        col : str
+            Column to test.
+
+
+        Optional input
+        --------------
+        correction : bool
+            Apply Yates' correction when there is one degree of freedom
+            (default=True).
+
+
+        Output
+        ------
+        tuple :
+            stat : chi-squared statistic
+            p : p-value
+            dof : degrees of freedom
+            expected : expected counts (target levels x levels)
+
+        '''
+
+        observed = self.tables[col].T.astype(np.float64)
+        expected = self._expected(observed)
+        dof = (observed.shape[0] - 1) * (observed.shape[1] - 1)
+
+        if dof == 0:
+            return (0.0, 1.0, 0, expected)
+
+        if correction and dof == 1:
+            diff = expected - observed
+            observed = observed + np.sign(diff) * np.minimum(0.5, np.abs(diff))
+
+        from scipy import stats
+
+        stat = ((observed - expected) ** 2 / expected).sum()
+
+        return (stat, stats.chi2.sf(stat, dof), dof, expected)
+
+    def standardized_resids(self, col, shift_zeros=True):
+        '''
+        Standardized residuals, as `sm.stats.Table(counts).standardized_resids`;
+        anything over +/-1.96 is significant.
+
+
+        Input
+        -----
+        col : str
+            Column to test.
+
+
+        Optional input
+        --------------
+        shift_zeros : bool
+            Count empty cells as 0.5, as `sm.stats.Table` does by
+            default (default=True), so sparse columns (e.g. 'species',
+            'nta') match the notebook.
+
+
+        Output
+        ------
+        resids : Pandas DataFrame
+            Residuals (target levels x levels).
+
+        '''
+
+        observed = self.tables[col].T.astype(np.float64)
+        if shift_zeros:
+            observed[observed == 0] = 0.5
+        total = observed.sum()
+        row_share = observed.sum(axis=1, keepdims=True) / total
+        col_share = observed.sum(axis=0, keepdims=True) / total
+        expected = self._expected(observed)
+
+        resids = ((observed - expected)
+                  / np.sqrt(expected * (1 - row_share) * (1 - col_share)))
+
+        return pd.DataFrame(resids, index=self._target_index(),
+                            columns=self._level_index(col))
+
+    def summary(self, prob=0.95, threshold=1.96, shift_zeros=True):
+        '''
+        Significance sweep over every column.
+
+
+        Optional input
+        --------------
+        prob : float
+            Probability for the critical chi-squared value (default=0.95).
+
+        threshold : float
+            Absolute standardized residual counted as significant
+            (default=1.96).
+
+        shift_zeros : bool
+            Passed to `standardized_resids` (default=True).
+
+
+        Output
+        ------
+        summary : Pandas DataFrame
+            One row per column with 'n_levels', 'chi2', 'p_value', 'dof',
+            'critical' and 'significant_share' (percentage of residuals
+            beyond `threshold`), sorted by chi2.
+
+        '''
+
+        from scipy import stats
+
+        rows = []
+        for col in self.cols:
+            stat, p, dof, _ = self.chi2(col)
+            resids = self.standardized_resids(
+                col, shift_zeros=shift_zeros).to_numpy()
+            rows.append({
+                'column': col, 'n_levels': len(self.levels[col]),
+                'chi2': stat, 'p_value': p, 'dof': dof,
+                'critical': stats.chi2.ppf(prob, dof),
+                'significant_share': 100 * np.mean(np.abs(resids) > threshold)})
+
+        return (pd.DataFrame(rows).set_index('column')
+                .sort_values('chi2', ascending=False))
+
+    def _expected(self, observed):
+        return (observed.sum(axis=1, keepdims=True)
+                * observed.sum(axis=0, keepdims=True) / observed.sum())
+
+    def _target_index(self):
+        return pd.Index(self.target_levels, name=self.target)
+
+    def _level_index(self, col):
+        return pd.Index(self.levels[col], name=col)
@@ -0,0 +1,700 @@
+'''
+Resumable hyperparameter search, permutation importance and a compact,
+memory-mapped forest.
+'''
+
+# standard libraries
+import pandas as pd
+import numpy as np
+
+# search cache
+import os
+import time
+import json
+import tempfile
+
+# memory-mapped saving/loading
+import joblib
+
+from .features import DUMMY_COLS
+from .metrics import good_precision
+from .tracing import traced
+
+
+# successive-halving hyperparameter search
+@traced()
+def halving_search(X, y, param_grid, cache_dir, estimator=None,
+                   scoring=good_precision, cv=3, factor=3,
+                   resource='n_samples', max_resources=None, n_jobs=None,
+                   random_state=42, verbose=0):
+    '''
+    Function to tune a model by successive halving: every candidate is
+    scored on a small budget (training samples or trees), and only the
+    best 1/`factor` move on to a `factor` times larger budget, until the
+    last few are scored with the full budget.
+
+    The training matrix is saved once to `cache_dir` and memory-mapped,
+    so all worker processes share one copy. Folds and every fold score
+    are saved there too, so running again with the same `cache_dir`
+    resumes an interrupted search instead of restarting.
+
+
+    Input
+    -----
+    X : numpy array or Pandas DataFrame
+        Training features, e.g. the scaled 147-column matrix.
+
+    y : numpy array or Pandas Series
+        Training labels.
+
+    param_grid : dict
+        Parameter names and lists of values, as for `GridSearchCV`.
+
+    cache_dir : str
+        Directory for the memory-mapped matrix, folds and scores. Use a
+        new directory for different data.
+
+
+    Optional input
+    --------------
+    estimator : sklearn classifier
+        Model to tune (default=None, i.e. the notebooks' RandomForest
+        with class_weight='balanced' and random_state=99).
+
+    scoring : function
+        Score function of (y_true, y_pred), higher is better
+        (default=good_precision).
+
+    cv : int
+        Number of stratified folds (default=3).
+
+    factor : int
+        Fraction of candidates kept, and growth of the budget, per
+        iteration (default=3).
+
+    resource : str
+        Budget to grow (default='n_samples').
+        'n_samples' : training rows per fit, up to the whole fold.
+        'n_estimators' : number of trees, up to `max_resources`. Any
+            'n_estimators' in `param_grid` is replaced by the budget.
+
+    max_resources : int
+        Full budget (default=None, i.e. the whole training fold for
+        'n_samples', or the estimator's n_estimators).
+
+    n_jobs : int
+        Number of worker processes fitting candidates (default=None).
+        `n_jobs=-1` uses all cores.
+
+    random_state : int
+        Seed for the folds and sample subsets (default=42).
+
+    verbose : int
+        Print progress per iteration if > 0 (default=0).
+
+
+    Output
+    ------
+    tuple :
+        best_params : dict of the best candidate at the last iteration
+        results : Pandas DataFrame with one row per candidate and
+            iteration ('iteration', 'n_resources', 'params',
+            'mean_score', 'std_score', 'mean_fit_time')
+
+    '''
+
+    from sklearn.model_selection import ParameterGrid
+
+    if estimator is None:
+        from sklearn.ensemble import RandomForestClassifier
+
+        estimator = RandomForestClassifier(class_weight='balanced',
+                                           random_state=99)
+    if resource not in ('n_samples', 'n_estimators'):
+        raise ValueError(f"resource must be 'n_samples' or 'n_estimators', "
+                         f"not {resource!r}")
+
+    os.makedirs(cache_dir, exist_ok=True)
+    X, y, folds = _search_cache(X, y, cache_dir, cv, random_state)
+
+    # budget per iteration, growing by `factor` up to the full budget
+    candidates = list(ParameterGrid(param_grid))
+    if max_resources is None:
+        if resource == 'n_samples':
+            max_resources = min(len(train) for train, _ in folds)
+        else:
+            max_resources = estimator.get_params()['n_estimators']
+    n_iterations = 1 + int(np.floor(np.log(len(candidates)) / np.log(factor)))
+    budgets = [max(int(max_resources / factor ** (n_iterations - 1 - i)), 1)
+               for i in range(n_iterations)]
+
+    # fold scores already on disk, skipping a line cut off by a crash
+    scores_path = os.path.join(cache_dir, 'scores.jsonl')
+    done = {}
+    if os.path.exists(scores_path):
+        with open(scores_path) as f:
+            lines = f.read().split('\n')
+        for line in lines:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            done[_task_key(record['params'], record['n_resources'],
+                           record['fold'])] = record
+        if lines[-1]:
+            with open(scores_path, 'a') as f:
+                f.write('\n')
+
+    results = []
+    for iteration, budget in enumerate(budgets):
+
+        # fit and score only the folds not scored before
+        tasks = [(params, fold) for params in candidates
+                 for fold in range(len(folds))
+                 if _task_key(params, budget, fold) not in done]
+        if tasks:
+            jobs = joblib.Parallel(n_jobs=n_jobs, return_as='generator')(
+                joblib.delayed(_fit_and_score)(
+                    estimator, params, X, y, folds[fold], scoring, resource,
+                    budget, random_state)
+                for params, fold in tasks)
+
+            # save each score as soon as it is ready
+            with open(scores_path, 'a') as f:
+                for (params, fold), (score, fit_time) in zip(tasks, jobs):
+                    record = {'params': params, 'n_resources': budget,
+                              'fold': fold, 'score': score,
+                              'fit_time': fit_time}
+                    f.write(json.dumps(record, default=_json_default)
+                            + '\n')
+                    f.flush()
+                    done[_task_key(params, budget, fold)] = record
+
+        # summarize, best first
+        summary = []
+        for params in candidates:
+            records = [done[_task_key(params, budget, fold)]
+                       for fold in range(len(folds))]
+            fold_scores = [record['score'] for record in records]
+            summary.append({
+                'iteration': iteration, 'n_resources': budget,
+                'params': params, 'mean_score': np.mean(fold_scores),
+                'std_score': np.std(fold_scores),
+                'mean_fit_time': np.mean([record['fit_time']
+                                          for record in records])})
+        summary.sort(key=lambda row: -row['mean_score'])
+        results.extend(summary)
+
+        if verbose > 0:
+            print(f'iteration {iteration}: {len(candidates)} candidates, '
+                  f'{resource}={budget}, best {summary[0]["mean_score"]:.4f} '
+                  f'with {summary[0]["params"]}')
+
+        # keep the best 1/factor for the next iteration
+        candidates = [row['params'] for row in
+                      summary[:max(int(np.ceil(len(summary) / factor)), 1)]]
+
+    return (summary[0]['params'], pd.DataFrame(results))
+
+
+def _search_cache(X, y, cache_dir, cv, random_state):
+    '''
+    Memory-mapped copies of X and y and the folds, created on the first
+    run and reused after, checking they belong to the same data.
+    '''
+
+    meta_path = os.path.join(cache_dir, 'meta.json')
+    data_path = os.path.join(cache_dir, 'data.joblib')
+    folds_path = os.path.join(cache_dir, 'folds.joblib')
+
+    X = np.asarray(X)
+    y = np.asarray(y)
+    meta = {'shape': list(X.shape), 'y_hash': joblib.hash(y), 'cv': cv,
+            'random_state': random_state}
+
+    if os.path.exists(meta_path):
+        with open(meta_path) as f:
+            if json.load(f) != meta:
+                raise ValueError(f'{cache_dir} holds a search on different '
+                                 f'data or folds; use a new cache_dir')
+    else:
+        from sklearn.model_selection import StratifiedKFold
+
+        joblib.dump((X, y), data_path)
+        folds = list(StratifiedKFold(cv, shuffle=True,
+                                     random_state=random_state).split(X, y))
+        joblib.dump(folds, folds_path)
+        with open(meta_path, 'w') as f:
+            json.dump(meta, f)
+
+    X, y = joblib.load(data_path, mmap_mode='r')
+
+    return (X, y, joblib.load(folds_path))
+
+
+def _task_key(params, n_resources, fold):
+    return (json.dumps(params, sort_keys=True, default=_json_default),
+            n_resources, fold)
+
+
+def _json_default(value):
+    '''
+    Numpy values of a grid (e.g. `np.arange(3, 6)`) as plain Python.
+    '''
+
+    if isinstance(value, (np.generic, np.ndarray)):
+        return value.tolist()
+    raise TypeError(f'Object of type {type(value).__name__} is not JSON '
+                    f'serializable')
+
+
+def _fit_and_score(estimator, params, X, y, fold, scoring, resource, budget,
+                   random_state):
+    '''
+    Fit one candidate on one fold with the given budget and score it on
+    the whole validation fold.
+    '''
+
+    from sklearn.base import clone
+
+    train, test = fold
+    model = clone(estimator).set_params(**params)
+
+    if resource == 'n_samples':
+        # the same random subset of the fold for every candidate
+        rng = np.random.default_rng(random_state)
+        train = np.sort(rng.permutation(train)[:budget])
+    else:
+        model.set_params(n_estimators=budget)
+
+    start = time.perf_counter()
+    model.fit(X[train], y[train])
+    fit_time = time.perf_counter() - start
+
+    return (float(scoring(y[test], model.predict(X[test]))), fit_time)
+
+
+# permutation importance of features or one-hot groups
+@traced(rows_out=False)
+def permutation_importance(model, X, y, groups=None, feature_names=None,
+                           scoring=good_precision, n_repeats=5, n_jobs=None,
+                           batch_size=65536, random_state=42):
+    '''
+    Function to measure how much a fitted model's score drops when one
+    feature (or one group of one-hot columns) is shuffled on held-out
+    data. Unlike `model.feature_importances_`, this is not biased toward
+    continuous features such as 'neighbor_dist'.
+
+    The model predicts the unshuffled data once. Shuffling only changes
+    some rows (e.g. a 0/1 column shuffled keeps most 0s in place), so
+    only those are predicted again, and the others keep the baseline
+    prediction. The data and baseline are saved once to a temporary
+    file and memory-mapped, so all worker processes share one copy.
+
+
+    Input
+    -----
+    model : fitted classifier
+        Any model with `predict`, e.g. the final RandomForest or a
+        `CompactForest`.
+
+    X : numpy array or Pandas DataFrame
+        Held-out features, e.g. the 147-column test matrix.
+
+    y : numpy array or Pandas Series
+        Held-out labels.
+
+
+    Optional input
+    --------------
+    groups : None, 'dummies' or dict
+        Columns shuffled together (default=None, i.e. every column on its
+        own). 'dummies' groups the one-hot columns of each of
+        `DUMMY_COLS` (e.g. every 'species_...' column becomes 'species').
+        A dict maps group names to lists of column names.
+
+    feature_names : list (str)
+        Column names if `X` is an array (default=None, i.e. the
+        DataFrame's columns or the column positions).
+
+    scoring : function
+        Score function of (y_true, y_pred), higher is better
+        (default=good_precision).
+
+    n_repeats : int
+        Number of shuffles per feature or group (default=5).
+
+    n_jobs : int
+        Number of worker processes (default=None). `n_jobs=-1` uses all
+        cores.
+
+    batch_size : int
+        Rows predicted at a time (default=65536).
+
+    random_state : int
+        Seed for the shuffles (default=42). Results do not depend on
+        `n_jobs`.
+
+
+    Output
+    ------
+    importances : Pandas DataFrame
+        One row per feature or group, most important first, with
+        'importance' (mean drop in score), 'std' (over the repeats),
+        'n_columns' and 'rows_predicted' (mean share of rows predicted
+        again). Pass `importances['importance']` to
+        `plot_forest_features`.
+
+    '''
+
+    if feature_names is None:
+        feature_names = (list(X.columns) if isinstance(X, pd.DataFrame)
+                         else [str(i) for i in range(np.shape(X)[1])])
+    X = np.ascontiguousarray(X)
+    y = np.asarray(y)
+
+    # column positions of each feature or group
+    positions = {name: i for i, name in enumerate(feature_names)}
+    if groups is None:
+        groups = {name: [name] for name in feature_names}
+    elif groups == 'dummies':
+        grouped = {}
+        for name in feature_names:
+            group = next((col for col in DUMMY_COLS
+                          if name.startswith(f'{col}_')), name)
+            grouped.setdefault(group, []).append(name)
+        groups = grouped
+    tasks = [(index, name, [positions[col] for col in columns])
+             for index, (name, columns) in enumerate(groups.items())]
+
+    # one baseline prediction, shared with the workers
+    baseline = model.predict(_with_feature_names(model, X))
+    baseline_score = float(scoring(y, baseline))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        data_path = os.path.join(tmp, 'data.joblib')
+        joblib.dump((X, y, baseline), data_path)
+
+        # one chunk of groups per worker, so the model is sent once each
+        n_chunks = min(joblib.effective_n_jobs(n_jobs), len(tasks))
+        chunks = joblib.Parallel(n_jobs=n_jobs)(
+            joblib.delayed(_permutation_scores)(
+                model, data_path, tasks[chunk::n_chunks], scoring,
+                n_repeats, batch_size, random_state)
+            for chunk in range(n_chunks))
+
+    rows = []
+    for name, scores, n_columns, predicted in (row for chunk in chunks
+                                               for row in chunk):
+        drops = baseline_score - np.asarray(scores)
+        rows.append({'feature': name, 'importance': drops.mean(),
+                     'std': drops.std(), 'n_columns': n_columns,
+                     'rows_predicted': predicted})
+
+    return (pd.DataFrame(rows).set_index('feature')
+            .sort_values('importance', ascending=False))
+
+
+def _permutation_scores(model, data_path, tasks, scoring, n_repeats,
+                        batch_size, random_state):
+    '''
+    Scores of the model with each group of columns shuffled, predicting
+    only the rows a shuffle changes.
+    '''
+
+    X, y, baseline = joblib.load(data_path, mmap_mode='r')
+    baseline = np.asarray(baseline)
+
+    results = []
+    for index, name, columns in tasks:
+        rng = np.random.default_rng([random_state, index])
+        original = X[:, columns]
+        scores, predicted = [], []
+        for _ in range(n_repeats):
+            shuffled = original[rng.permutation(len(X))]
+            changed = np.flatnonzero((shuffled != original).any(axis=1))
+
+            y_pred = baseline.copy()
+            for start in range(0, len(changed), batch_size):
+                rows = changed[start:start + batch_size]
+                batch = X[rows]
+                batch[:, columns] = shuffled[rows]
+                y_pred[rows] = model.predict(_with_feature_names(model, batch))
+
+            scores.append(float(scoring(y, y_pred)))
+            predicted.append(len(changed) / len(X))
+        results.append((name, scores, len(columns), float(np.mean(predicted))))
+
+    return results
+
+
+def _with_feature_names(model, X):
+    '''
+    `X` as a DataFrame if the model was fit on one, so sklearn does not
+    warn about missing feature names on every batch.
+    '''
+
+    names = getattr(model, 'feature_names_in_', None)
+    if names is None:
+        return X
+
+    return pd.DataFrame(X, columns=names, copy=False)
+
+
+# random forest flattened into plain arrays for small, fast-loading files
+class CompactForest:
+    '''
+    A fitted sklearn tree ensemble (e.g. the final RandomForest)
+    flattened into a few contiguous arrays, for small files, memory-mapped
+    loading shared by processes, and prediction where sklearn is not
+    installed.
+
+    Every tree's nodes are stored back to back, and leaves point to
+    themselves. Prediction moves all (row, tree) pairs of a batch down
+    one level per step, with no Python loop over trees or rows.
+
+    Prediction is pure numpy, about 4x slower per row than sklearn's
+    compiled traversal of the same forest. Where throughput matters
+    (e.g. `score_file` over the whole census), score with the sklearn
+    model; use this where load time, file size or memory shared by
+    workers matter more.
+
+
+    Input
+    -----
+    arrays : dict
+        Arrays as built by `from_forest`. Use `from_forest` or `load`
+        rather than calling this directly.
+
+
+    Attributes
+    ----------
+    classes_ : numpy array
+        Class labels, in the order of the `predict_proba` columns.
+
+    n_features_in_ : int
+        Number of features the forest was fit on.
+
+    max_depth : int
+        Depth of the deepest tree.
+
+
+    NOTE: Thresholds are stored as float32 rounded down, which gives the
+    same splits as sklearn (which compares features as float32). Leaf
+    class distributions are float32, so probabilities agree with the
+    original model to about 1e-7.
+
+    '''
+
+    def __init__(self, arrays):
+        self.feature = arrays['feature']
+        self.threshold = arrays['threshold']
+        self.children = arrays['children']
+        self.value = arrays['value']
+        self.roots = arrays['roots']
+        self.classes_ = arrays['classes']
+        self.n_features_in_ = int(arrays['n_features'])
+        self.max_depth = int(arrays['max_depth'])
+
+    @classmethod
+    def from_forest(cls, model):
+        '''
+        Flatten a fitted sklearn forest (or other tree ensemble with
+        `estimators_` and `classes_`).
+
+
+        Input
+        -----
+        model : sklearn.ensemble.RandomForestClassifier
+            Fitted single-output classifier.
+
+
+        Output
+        ------
+        forest : CompactForest
+
+        '''
+
+        features, thresholds, children, values, roots = [], [], [], [], []
+        offset, max_depth = 0, 0
+        for estimator in model.estimators_:
+            tree = estimator.tree_
+            nodes = np.arange(tree.node_count)
+            leaf = tree.children_left == -1
+
+            # leaves loop back to themselves
+            features.append(np.where(leaf, 0, tree.feature))
+            thresholds.append(_float32_floor(np.where(leaf, 0, tree.threshold)))
+            children.append(np.column_stack([
+                np.where(leaf, nodes, tree.children_left),
+                np.where(leaf, nodes, tree.children_right)]) + offset)
+
+            # class distribution of each node, as in predict_proba
+            value = tree.value[:, 0, :]
+            values.append(value / value.sum(axis=1, keepdims=True))
+
+            roots.append(offset)
+            offset += tree.node_count
+            max_depth = max(max_depth, tree.max_depth)
+
+        return cls({
+            'feature': np.concatenate(features).astype(np.int32),
+            'threshold': np.concatenate(thresholds),
+            'children': np.concatenate(children).astype(np.int32),
+            'value': np.concatenate(values).astype(np.float32),
+            'roots': np.array(roots, dtype=np.int32),
+            'classes': np.asarray(model.classes_),
+            'n_features': model.n_features_in_,
+            'max_depth': max_depth})
+
+    @property
+    def n_estimators(self):
+        return len(self.roots)
+
+    @traced('predict')
+    def predict_proba(self, X, batch_size=4096):
+        '''
+        Average class distribution of the leaves each row lands in.
+
+
+        Input
+        -----
+        X : numpy array, Pandas DataFrame or scipy sparse matrix
+            Features, in the order the forest was fit on. Sparse input
+            (e.g. from `TreeFeaturizer(sparse=True)`) is made dense one
+            batch at a time.
+
+
+        Optional input
+        --------------
+        batch_size : int
+            Number of rows moved down the trees at a time
+            (default=4096). Memory use is about
+            batch_size x n_estimators x 40 bytes.
+
+
+        Output
+        ------
+        probabilities : numpy array (float64)
+            (N, n_classes) array, columns in the order of `classes_`.
+
+        '''
+
+        is_sparse = hasattr(X, 'tocsr')
+        if is_sparse:
+            X = X.tocsr()
+        else:
+            X = np.asarray(X, dtype=np.float32)
+        if X.ndim != 2 or X.shape[1] != self.n_features_in_:
+            raise ValueError(f'X must have {self.n_features_in_} columns, '
+                             f'not {X.shape[1:]}')
+
+        n_trees = len(self.roots)
+        children = self.children.ravel()
+        probabilities = np.empty((X.shape[0], len(self.classes_)))
+        for start in range(0, X.shape[0], batch_size):
+            if is_sparse:
+                batch = X[start:start + batch_size].toarray().astype(
+                    np.float32)
+            else:
+                batch = np.ascontiguousarray(X[start:start + batch_size])
+            flat_batch = batch.ravel()
+
+            # one (row, tree) pair per row and tree, starting at the roots
+            node = np.tile(self.roots, len(batch))
+            offset = np.repeat(np.arange(len(batch)) * batch.shape[1], n_trees)
+            pair = np.arange(len(node))
+            leaves = np.empty_like(node)
+
+            # move every pair down one level per step; pairs at a leaf
+            # (which points back to itself) stay there, and are dropped
+            # once they are a quarter of the pairs left
+            while len(node):
+                go_right = (flat_batch[offset + self.feature[node]]
+                            > self.threshold[node])
+                child = children[2 * node + go_right]
+                at_leaf = child == node
+                n_at_leaf = np.count_nonzero(at_leaf)
+                if n_at_leaf == len(node):
+                    leaves[pair] = node
+                    break
+                if n_at_leaf > len(node) // 4:
+                    leaves[pair[at_leaf]] = node[at_leaf]
+                    moving = ~at_leaf
+                    node, offset, pair = (child[moving], offset[moving],
+                                          pair[moving])
+                else:
+                    node = child
+
+            probabilities[start:start + len(batch)] = (
+                self.value[leaves].reshape(len(batch), n_trees, -1)
+                .mean(axis=1, dtype=np.float64))
+
+        return probabilities
+
+    def predict(self, X, batch_size=4096):
+        '''
+        Most probable class of each row, as in sklearn's `predict`.
+        '''
+
+        return self.classes_[self.predict_proba(X, batch_size).argmax(axis=1)]
+
+    def save(self, path):
+        '''
+        Save the arrays uncompressed, so they can be memory-mapped by
+        `load`.
+
+
+        Input
+        -----
+        path : str
+            File path to write.
+
+        '''
+
+        joblib.dump({'feature': self.feature, 'threshold': self.threshold,
+                     'children': self.children, 'value': self.value,
+                     'roots': self.roots, 'classes': self.classes_,
+                     'n_features': self.n_features_in_,
+                     'max_depth': self.max_depth}, path)
+
+    @classmethod
+    def load(cls, path, mmap_mode='r'):
+        '''
+        Load a saved forest. With the default `mmap_mode='r'` the arrays
+        are memory-mapped rather than read, so loading is near-instant
+        and worker processes share one copy.
+
+
+        Input
+        -----
+        path : str
+            File path written by `save`.
+
+
+        Optional input
+        --------------
+        mmap_mode : str or None
+            Passed to `joblib.load` (default='r'). Set to None to load
+            into memory.
+
+
+        Output
+        ------
+        forest : CompactForest
+
+        '''
+
+        return cls(joblib.load(path, mmap_mode=mmap_mode))
+
+
+def _float32_floor(values):
+    '''
+    Largest float32 not above each float64 value.
+    '''
+
+    rounded = values.astype(np.float32)
+    above = rounded.astype(np.float64) > values
+    rounded[above] = np.nextafter(rounded[above], np.float32(-np.inf))
+
+    return rounded
@@ -0,0 +1,170 @@
+'''
+Confusion matrix and feature importance plots.
+'''
+
+# standard libraries
+import pandas as pd
+import numpy as np
+
+# iterate over dataframes
+import itertools
+
+
+# confusion matrix plotter
+def plot_confusion_matrix(
+    cm, 
+    classes,
+    normalize=False,
+    title='Confusion matrix',
+    cmap='Blues'
+):
+    '''
+    This function prints and plots a model's confusion matrix.
+
+
+    Input
+    -----
+    cm : sklearn confusion matrix
+        `sklearn.metrics.confusion_matrix(y_true, y_pred)`
+
+    classes : list (str)
+        Names of target classes.
+
+
+    Optional input
+    --------------
+    normalize : bool
+        Whether to apply normalization (default=False).
+        Normalization can be applied by setting `normalize=True`.
+
+    title : str
+        Title of the returned plot.
+
+    cmap : matplotlib color map or its name
+        Color map (default='Blues'). For options, visit:
+        `https://matplotlib.org/3.1.0/tutorials/colors/colormaps.html`
+
+
+    Output
+    ------
+    Prints a stylized confusion matrix.
+
+
+    [Code modified from work by Sean Abu Wilson.]
+
+    '''
+
+    import matplotlib.pyplot as plt
+
+    # convert to percentage, if normalize set to True
+    if normalize:
+        cm = cm.astype('float') / cm.sum(axis=1)[:, np.newaxis]
+
+    # plot
+    plt.imshow(cm, interpolation='nearest', cmap=cmap)
+    plt.title(title)
+    plt.colorbar()
+    tick_marks = np.arange(len(classes))
+    plt.xticks(tick_marks, classes, rotation=45)
+    plt.yticks(tick_marks, classes)
+
+    # format true positives and others
+    fmt = '.2f' if normalize else 'd'
+    thresh = cm.max() / 2.
+    for i, j in itertools.product(range(cm.shape[0]), range(cm.shape[1])):
+        plt.text(j, i, format(cm[i, j], fmt), fontsize=15,
+                 horizontalalignment="center", verticalalignment="center",
+                 color="white" if cm[i, j] > thresh else "black")
+
+    # add axes labels
+    plt.ylabel('True label')
+    plt.xlabel('Predicted label')
+    plt.tight_layout()
+
+
+# random forest feature importances plotter
+def plot_forest_features(model, X, num_features=15, to_print=True,
+                         importances=None):
+    '''
+    This function plots feature importances for Random Forest models
+    and optionally prints a list of tuples with features and their
+    measure of importance.
+
+
+    Input
+    -----
+    model : Random Forest model
+        `sklearn.ensemble.RandomForestClassifier()`
+
+    X : Pandas DataFrame or list (str)
+        Features used in model, or their names (e.g. the
+        `feature_names_` of a sparse `TreeFeaturizer`).
+
+
+    Optional input
+    --------------
+    num_features : int
+        The number of features to plot/print (default=15).
+        All feature importances can be shown by setting
+        `num_features=X.shape[1]`.
+
+    to_print : bool
+        Whether to print list of feature names and their impurity
+        decrease values (default=True).
+        Printing can be turned off by setting `to_print=False`.
+
+    importances : Pandas Series
+        Importances to show instead of the model's impurity decrease,
+        indexed by feature (or group) name, e.g. the 'importance' column
+        of `permutation_importance` (default=None). `X` is then ignored.
+
+
+    Output
+    ------
+    Prints a bar graph and optional list of tuples.
+
+
+    [Code modified from work by Sean Abu Wilson.]
+
+    '''
+
+    import matplotlib.pyplot as plt
+
+    # list of tuples (column index, measure of feature importance)
+    if importances is None:
+        imp_forest = model.feature_importances_
+        feature_names = X.columns if isinstance(X, pd.DataFrame) else X
+        title = 'Random Forest Feature Importances'
+        ylabel = 'Average Decrease in Impurity'
+    else:
+        imp_forest = importances.to_numpy()
+        feature_names = importances.index
+        title = 'Permutation Feature Importances'
+        ylabel = 'Average Decrease in Score'
+        num_features = min(num_features, len(imp_forest))
+
+    # sort feature importances in descending order, slicing top number of
+    # features
+    indices_forest = np.argsort(imp_forest)[::-1][:num_features]
+
+    # rearrange feature names so they match the sorted feature importances
+    names_forest = [feature_names[i] for i in indices_forest]
+
+    # create plot, using num_features as a dimensional proxy
+    plt.figure(figsize=(num_features, num_features / 1.5))
+    plt.bar(range(num_features), imp_forest[indices_forest])
+
+    # prettify plot
+    plt.title(title, fontsize=30, pad=15)
+    plt.ylabel(ylabel, fontsize=22, labelpad=20)
+    # add feature names as x-axis labels
+    plt.xticks(range(num_features), names_forest, fontsize=20, rotation=90)
+    plt.tick_params(axis="y", labelsize=20)
+
+    # Show plot
+    plt.tight_layout()
+    plt.show()
+
+    if to_print:
+        # print a list of feature names and their importance values
+        print([(i, j) for i, j in zip(names_forest, imp_forest[indices_forest])])
@@ -0,0 +1,201 @@
+'''
+Batch scoring of census rows with a fitted featurizer and model.
+'''
+
+# standard libraries
+import pandas as pd
+
+# parallel scoring
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from .census import iter_rows, load_pickle
+from .spatial import _effective_n_jobs
+from .tracing import trace_stage, traced
+
+
+# score a frame of trees
+@traced()
+def score_trees(trees, featurizer, model, scaler=None):
+    '''
+    Function to predict tree health with class probabilities.
+
+
+    Input
+    -----
+    trees : Pandas DataFrame
+        Rows with the `TreeFeaturizer` input columns.
+
+    featurizer : TreeFeaturizer
+        Fitted featurizer.
+
+    model : sklearn classifier
+        Fitted model with `predict_proba`, e.g. the final RandomForest.
+
+
+    Optional input
+    --------------
+    scaler : sklearn transformer
+        Fitted scaler applied after featurizing, e.g. the final
+        MinMaxScaler (default=None).
+
+
+    Output
+    ------
+    scores : Pandas DataFrame
+        'prediction' and one 'prob_<class>' column per class, index same
+        as `trees`.
+
+    '''
+
+    X = featurizer.transform(trees)
+    if scaler is not None:
+        with trace_stage('scale', rows_in=len(trees)):
+            X = scaler.transform(X)
+
+    # predictions are the most probable class, as in model.predict
+    with trace_stage('predict', rows_in=len(trees)):
+        probabilities = model.predict_proba(X)
+    scores = pd.DataFrame(probabilities, index=trees.index,
+                          columns=[f'prob_{label}' for label in model.classes_])
+    scores.insert(0, 'prediction', model.classes_[probabilities.argmax(axis=1)])
+
+    return scores
+
+
+# artifacts loaded once in each scoring worker
+_SCORER = {}
+
+
+def _init_scorer(featurizer_path, model_path, scaler_path, worker=False):
+    '''
+    Load the scoring artifacts, in this process or (with `worker=True`)
+    in a worker process.
+    '''
+
+    _SCORER['featurizer'] = load_pickle(featurizer_path)
+    _SCORER['model'] = load_pickle(model_path)
+    _SCORER['scaler'] = scaler_path and load_pickle(scaler_path)
+
+    # in workers, parallelism comes from the workers, not the forest
+    if worker and hasattr(_SCORER['model'], 'n_jobs'):
+        _SCORER['model'].n_jobs = 1
+
+
+def _score_chunk(chunk):
+    return score_trees(chunk, _SCORER['featurizer'], _SCORER['model'],
+                       _SCORER['scaler'])
+
+
+# score a file in chunks
+@traced()
+def score_file(input_path, output_path, featurizer_path, model_path,
+               scaler_path=None, chunksize=100000, n_jobs=None):
+    '''
+    Function to score a file of trees in fixed-size chunks, writing each
+    chunk's results as soon as it is scored, so memory stays flat
+    regardless of input size.
+
+
+    Input
+    -----
+    input_path : str
+        CSV or Parquet file with the `TreeFeaturizer` input columns (see
+        `iter_rows`), e.g. a `save_checkpoint` stage.
+
+    output_path : str
+        CSV or Parquet file to write 'prediction' and 'prob_<class>'
+        columns to, indexed like the input. Rows are written in the
+        input file's row order, not sorted by index: a `save_checkpoint`
+        Parquet file is ordered by its clustering columns (e.g.
+        'boroname' and 'user_type'). Join on the index, e.g. with
+        `score_trees` results, rather than comparing rows by position.
+
+    featurizer_path : str
+        Gzip-compressed pickle of a fitted `TreeFeaturizer`.
+
+    model_path : str
+        Gzip-compressed pickle of the fitted model.
+
+
+    Optional input
+    --------------
+    scaler_path : str
+        Gzip-compressed pickle of the fitted scaler (default=None).
+
+    chunksize : int
+        Number of rows per chunk (default=100000).
+
+    n_jobs : int
+        Number of worker processes scoring chunks in parallel
+        (default=None, i.e. score in this process). `n_jobs=-1` uses all
+        cores.
+
+
+    Output
+    ------
+    n_rows : int
+        Number of rows scored.
+
+    '''
+
+    chunks = iter_rows(input_path, chunksize=chunksize)
+    n_jobs = _effective_n_jobs(n_jobs)
+    artifacts = (featurizer_path, model_path, scaler_path)
+
+    with _ScoreWriter(output_path) as writer:
+        if n_jobs == 1:
+            _init_scorer(*artifacts)
+            for chunk in chunks:
+                writer.write(_score_chunk(chunk))
+
+        else:
+            with ProcessPoolExecutor(max_workers=n_jobs,
+                                     initializer=_init_scorer,
+                                     initargs=(*artifacts, True)) as executor:
+
+                # keep a bounded number of chunks in flight, and write
+                # results in input order
+                pending = deque()
+                for chunk in chunks:
+                    pending.append(executor.submit(_score_chunk, chunk))
+                    if len(pending) >= 2 * n_jobs:
+                        writer.write(pending.popleft().result())
+                while pending:
+                    writer.write(pending.popleft().result())
+
+    return writer.n_rows
+
+
+class _ScoreWriter:
+    '''
+    Append scored chunks to a CSV or Parquet file.
+    '''
+
+    def __init__(self, path):
+        self.path = path
+        self.n_rows = 0
+        self._parquet = None
+
+    def __enter__(self):
+        return self
+
+    def write(self, scores):
+        if self.path.endswith('.parquet'):
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+
+            table = pa.Table.from_pandas(scores)
+            if self._parquet is None:
+                self._parquet = pq.ParquetWriter(self.path, table.schema)
+            self._parquet.write_table(table)
+
+        else:
+            scores.to_csv(self.path, mode='w' if self.n_rows == 0 else 'a',
+                          header=self.n_rows == 0)
+
+        self.n_rows += len(scores)
+
+    def __exit__(self, *exc):
+        if self._parquet is not None:
+            self._parquet.close()
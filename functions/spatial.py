@@ -0,0 +1,1190 @@
+'''
+Nearest-neighbor and neighborhood features from tree coordinates.
+'''
+
+# standard libraries
+import pandas as pd
+import numpy as np
+
+# iterate over grid cells
+import itertools
+
+# parallel queries
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from .features import _dummy_name
+from .tracing import trace_stage, traced
+
+
+# mean radius of the earth (in meters), to convert haversine distances
+EARTH_RADIUS = 6371000
+
+
+# The following code was copied from
+# It has been edited slightly to suit my purposes.
+# calculate distance between two points
+@traced()
+def get_nearest(src_points, candidates, k_neighbors=3, n_jobs=None,
+                chunk_size=50000):
+    '''
+    Function to calculate distances between points, comparing two lists.
+
+
+    Input
+    -----
+    src_points : list (tuple)
+        Location data (e.g., latitude and longitude).
+
+    candidates : list (tuple) or TreeIndex
+        Location data to compare with src_points (e.g., latitude and longitude).
+        Pass a prebuilt `TreeIndex` to skip rebuilding the BallTree.
+
+
+    Optional input
+    --------------
+    k_neighbors : int
+        Number of closest points to find (default=3).
+
+    n_jobs : int
+        Number of threads querying the tree in parallel (default=None,
+        i.e. a single call on all points). `n_jobs=-1` uses all cores.
+        Results are identical to the serial path.
+
+    chunk_size : int
+        Number of source points per parallel query (default=50000).
+
+
+    Output
+    ------
+    tuple :
+        target_tree : indices of nearest points
+        closest_dist : distance to nearest neighbor (in radians)
+
+
+    [Code modified from]:
+     https://automating-gis-processes.github.io/site/notebooks/L3/nearest-neighbor-faster.html
+
+    '''
+
+    # NOTE: haversine distance which is implemented here is a bit slower
+    # than using e.g. 'euclidean' metric but useful as we get the distance
+    # between points in meters.
+
+    # create tree from the candidate points, unless one is already built
+    if isinstance(candidates, TreeIndex):
+        tree = candidates.tree
+    else:
+        from sklearn.neighbors import BallTree
+
+        tree = BallTree(candidates, leaf_size=15, metric='haversine')
+
+    # split the source points into chunks queried on a thread pool
+    # NOTE: BallTree queries release the GIL, so threads share the one
+    # read-only tree without copying it
+    n_jobs = _effective_n_jobs(n_jobs)
+    if n_jobs > 1:
+        return _parallel_nearest(tree, np.asarray(src_points, dtype=np.float64),
+                                 k_neighbors, n_jobs, chunk_size)
+
+    # find closest points and distances
+    distances, indices = tree.query(src_points, k=k_neighbors)
+
+    # transpose to get distances and indices into arrays
+    distances = distances.transpose()
+    indices = indices.transpose()
+
+    # keep index of tree whose neighbor is being found and distance to the
+    # neighbor
+    # NOTE: since I'm running this within the same dataframe, take first
+    # index of distances, since distances[0] will have a distance of 0,
+    # it being the same point.
+    target_tree = indices[0]
+    closest_dist = distances[1]
+
+    # output indices and distances
+    return (target_tree, closest_dist)
+
+
+def _effective_n_jobs(n_jobs):
+    '''
+    Resolve an sklearn-style `n_jobs` value to a number of workers.
+    '''
+
+    if n_jobs is None:
+        return 1
+    if n_jobs < 0:
+        return max(os.cpu_count() + 1 + n_jobs, 1)
+
+    return n_jobs
+
+
+def _parallel_nearest(tree, src_points, k_neighbors, n_jobs, chunk_size):
+    '''
+    Chunked, multi-threaded version of the query in `get_nearest`, writing
+    only the needed columns straight into preallocated output arrays.
+    '''
+
+    n_points = len(src_points)
+    target_tree = np.empty(n_points, dtype=np.intp)
+    closest_dist = np.empty(n_points, dtype=np.float64)
+
+    def query_chunk(start):
+        stop = min(start + chunk_size, n_points)
+        distances, indices = tree.query(src_points[start:stop], k=k_neighbors)
+        target_tree[start:stop] = indices[:, 0]
+        closest_dist[start:stop] = distances[:, 1]
+
+    with ThreadPoolExecutor(max_workers=n_jobs) as executor:
+        # consume the iterator so worker exceptions are raised here
+        list(executor.map(query_chunk, range(0, n_points, chunk_size)))
+
+    return (target_tree, closest_dist)
+
+
+# convert coordinates into a radians array
+def coords_to_radians(data, lat_col='latitude', lon_col='longitude'):
+    '''
+    Function to pull coordinates out of a DataFrame or GeoSeries into a
+    contiguous (N, 2) array of (latitude, longitude) in RADIANS, the
+    layout expected by sklearn's haversine metric.
+
+
+    Input
+    -----
+    data : Pandas DataFrame, GeoPandas GeoDataFrame or GeoSeries
+        If `lat_col` and `lon_col` are columns of `data`, they are used
+        directly. Otherwise, the Points in `data`'s geometry are used
+        (assumed to be in WGS84 projection).
+
+
+    Optional input
+    --------------
+    lat_col : str
+        Name of latitude column (default='latitude').
+
+    lon_col : str
+        Name of longitude column (default='longitude').
+
+
+    Output
+    ------
+    radians : numpy array (float64)
+        C-contiguous array of shape (N, 2).
+
+    '''
+
+    # pull latitude and longitude with vectorized accessors, i.e. no
+    # python-level loop over shapely Points
+    if isinstance(data, pd.DataFrame) and {lat_col, lon_col} <= set(data.columns):
+        lat = data[lat_col].to_numpy(dtype=np.float64)
+        lon = data[lon_col].to_numpy(dtype=np.float64)
+    else:
+        geoms = data.geometry if isinstance(data, pd.DataFrame) else data
+        lat = np.asarray(geoms.y, dtype=np.float64)
+        lon = np.asarray(geoms.x, dtype=np.float64)
+
+    # fill a single buffer and convert to radians in place
+    radians = np.empty((len(lat), 2), dtype=np.float64)
+    radians[:, 0] = lat
+    radians[:, 1] = lon
+    np.radians(radians, out=radians)
+
+    # output coordinates array
+    return radians
+
+
+# reusable haversine index
+class TreeIndex:
+    '''
+    Haversine BallTree over a fixed set of points, built once and queried
+    many times (e.g. per borough, per volunteer batch or for new
+    inventory entries).
+
+
+    Input
+    -----
+    points : numpy array, Pandas DataFrame or GeoPandas GeoSeries
+        Arrays (or lists of tuples) are assumed to already be (latitude,
+        longitude) in RADIANS; pandas objects are passed through
+        `coords_to_radians`.
+
+
+    Optional input
+    --------------
+    leaf_size : int
+        Leaf size of the BallTree (default=15).
+
+    index : Pandas Index
+        Labels for the indexed points (default=None). Defaults to the
+        index of `points` if it has one, otherwise a RangeIndex.
+
+
+    Attributes
+    ----------
+    tree : sklearn.neighbors.BallTree
+        The underlying haversine tree.
+
+    index : Pandas Index
+        Labels for the indexed points, in the same order as the tree.
+
+
+    NOTE: Distances and radii are in meters. Use `save` and `load` to
+    share a single copy of the tree between worker processes.
+
+    '''
+
+    def __init__(self, points, leaf_size=15, index=None):
+
+        # keep labels so query results can be mapped back to a dataframe
+        if index is None:
+            index = getattr(points, 'index', None)
+        if index is None:
+            index = pd.RangeIndex(len(points))
+        self.index = pd.Index(index)
+
+        # build the tree a single time
+        from sklearn.neighbors import BallTree
+
+        self.tree = BallTree(_to_radians(points), leaf_size=leaf_size,
+                             metric='haversine')
+
+    def __len__(self):
+        return len(self.index)
+
+    def query(self, points, k=1):
+        '''
+        Find the k nearest indexed points.
+
+
+        Input
+        -----
+        points : numpy array, Pandas DataFrame or GeoPandas GeoSeries
+            Query points (see class docstring).
+
+
+        Optional input
+        --------------
+        k : int
+            Number of closest points to find (default=1).
+
+
+        Output
+        ------
+        tuple :
+            distances : (N, k) array of distances (in meters)
+            indices : (N, k) array of positions in the index
+
+        '''
+
+        distances, indices = self.tree.query(_to_radians(points), k=k)
+
+        return (distances * EARTH_RADIUS, indices)
+
+    def query_radius(self, points, radius, count_only=False,
+                     return_distance=False):
+        '''
+        Find indexed points within a radius of each query point.
+
+
+        Input
+        -----
+        points : numpy array, Pandas DataFrame or GeoPandas GeoSeries
+            Query points (see class docstring).
+
+        radius : float or array
+            Search radius (in meters), one per query point if an array.
+
+
+        Optional input
+        --------------
+        count_only : bool
+            Whether to return only the number of points within the radius
+            (default=False).
+
+        return_distance : bool
+            Whether to also return the distances (in meters) to the
+            points found (default=False).
+
+
+        Output
+        ------
+        counts : numpy array (int)
+            If `count_only=True`.
+
+        indices : numpy array (object)
+            Array of index-position arrays, one per query point.
+
+        tuple :
+            indices, distances : if `return_distance=True`.
+
+        '''
+
+        result = self.tree.query_radius(
+            _to_radians(points),
+            np.asarray(radius, dtype=np.float64) / EARTH_RADIUS,
+            count_only=count_only,
+            return_distance=return_distance)
+
+        # convert distances from radians to meters
+        if return_distance:
+            indices, distances = result
+            return (indices, distances * EARTH_RADIUS)
+
+        return result
+
+    def save(self, path):
+        '''
+        Save the index uncompressed, so it can be memory-mapped by `load`.
+
+
+        Input
+        -----
+        path : str
+            File path to write.
+
+        '''
+
+        import joblib
+
+        joblib.dump(self, path)
+
+    @classmethod
+    def load(cls, path, mmap_mode='r'):
+        '''
+        Load a saved index. With the default `mmap_mode='r'` the tree's
+        arrays are memory-mapped read-only rather than read into RAM, so
+        any number of worker processes share one copy via the OS page
+        cache.
+
+
+        Input
+        -----
+        path : str
+            File path written by `save`.
+
+
+        Optional input
+        --------------
+        mmap_mode : str or None
+            Passed to `joblib.load` (default='r'). Set to None to load
+            into memory.
+
+
+        Output
+        ------
+        index : TreeIndex
+
+        '''
+
+        import joblib
+
+        index = joblib.load(path, mmap_mode=mmap_mode)
+        if not isinstance(index, cls):
+            raise TypeError(f'{path} does not contain a {cls.__name__}')
+
+        return index
+
+
+def _to_radians(points):
+    '''
+    Parse coordinates of pandas objects with `coords_to_radians`; arrays
+    and lists are assumed to already be (latitude, longitude) radians.
+    '''
+
+    if isinstance(points, (pd.DataFrame, pd.Series)):
+        return coords_to_radians(points)
+
+    return np.asarray(points, dtype=np.float64)
+
+
+# project coordinates onto a plane
+def project_coords(radians, center_lat=None):
+    '''
+    Function to project (latitude, longitude) radians onto a local plane
+    in meters, using a (spherical) Mercator projection with true scale at
+    the points' mean latitude.
+
+    The projection is conformal: around every point, distances are
+    scaled by the same factor in every direction, from about 0.997 to
+    1.003 across NYC. Dividing a planar distance by the factor at one
+    end (see `_local_scale`) gives the haversine distance to under a
+    millimeter up to 100 meters; the error grows with the square of the
+    distance (about 1.5 cm at 500 m, 10 cm at 1.3 km).
+
+
+    Input
+    -----
+    radians : numpy array
+        (N, 2) array of (latitude, longitude) in RADIANS, e.g. from
+        `coords_to_radians`.
+
+
+    Optional input
+    --------------
+    center_lat : float
+        Central latitude in RADIANS (default=None, i.e. the points' mean
+        latitude). Fix it to project points added later onto the same
+        plane.
+
+
+    Output
+    ------
+    xy : numpy array (float64)
+        (N, 2) array of (x, y) coordinates in meters.
+
+    '''
+
+    # Mercator, scaled by the cosine of the central latitude
+    if center_lat is None:
+        center_lat = radians[:, 0].mean()
+
+    scale = EARTH_RADIUS * np.cos(center_lat)
+    xy = np.empty_like(radians, dtype=np.float64)
+    xy[:, 0] = radians[:, 1] * scale
+    xy[:, 1] = np.log(np.tan(np.pi / 4 + radians[:, 0] / 2)) * scale
+
+    return xy
+
+
+def _local_scale(radians, center_lat=None):
+    '''
+    Planar meters per true meter of `project_coords` at each point.
+    '''
+
+    if center_lat is None:
+        center_lat = radians[:, 0].mean()
+
+    return np.cos(center_lat) / np.cos(radians[:, 0])
+
+
+def _kdtree_nearest(xy, n_jobs=None, points=None):
+    '''
+    Distance from each of `points` (default: every point) to its nearest
+    other point in `xy`, using a scipy cKDTree.
+    '''
+
+    from scipy.spatial import cKDTree
+
+    tree = cKDTree(xy)
+
+    # k=2, since each point's closest match is itself
+    distances, _ = tree.query(xy if points is None else xy[points], k=2,
+                              workers=_effective_n_jobs(n_jobs))
+
+    return distances[:, 1]
+
+
+def _grid_hash_nearest(xy, n_jobs=None, cell_size=None):
+    '''
+    Distance from each point in `xy` to its nearest other point, by
+    bucketing points into a uniform grid and comparing each point with
+    the points in its own and the 8 surrounding cells.
+
+    A match closer than `cell_size` is exact, since anything outside the
+    3x3 block is at least that far away. Points without one fall back to
+    `_kdtree_nearest`.
+    '''
+
+    n_points = len(xy)
+
+    # default to cells holding one point on average over the bounding box
+    origin = xy.min(axis=0)
+    if cell_size is None:
+        width, height = xy.max(axis=0) - origin
+        cell_size = max(np.sqrt(width * height / n_points), 1.0)
+
+    # hash each point to a single cell key, padded by one cell on every
+    # side so neighboring keys never wrap around a row
+    cells = ((xy - origin) // cell_size).astype(np.int64) + 1
+    n_cols = cells[:, 0].max() + 2
+    keys = cells[:, 1] * n_cols + cells[:, 0]
+
+    # sort points by cell, so each cell is a contiguous run
+    order = np.argsort(keys, kind='stable')
+    sorted_keys = keys[order]
+
+    best = np.full(n_points, np.inf)
+    for d_row in (-1, 0, 1):
+        for d_col in (-1, 0, 1):
+
+            # run of sorted points in the neighboring cell
+            neighbor_keys = keys + d_row * n_cols + d_col
+            starts = np.searchsorted(sorted_keys, neighbor_keys, 'left')
+            counts = np.searchsorted(sorted_keys, neighbor_keys, 'right') - starts
+            has_points = np.flatnonzero(counts)
+            if not len(has_points):
+                continue
+
+            # expand into (point, candidate) pairs, grouped by point
+            counts = counts[has_points]
+            group_starts = np.cumsum(counts) - counts
+            within = np.arange(counts.sum()) - np.repeat(group_starts, counts)
+            src = np.repeat(has_points, counts)
+            candidates = order[np.repeat(starts[has_points], counts) + within]
+
+            distances = np.hypot(*(xy[src] - xy[candidates]).T)
+            distances[candidates == src] = np.inf
+
+            # closest candidate per point
+            best[has_points] = np.minimum(
+                best[has_points], np.minimum.reduceat(distances, group_starts))
+
+    # search the rest exactly
+    unresolved = np.flatnonzero(best > cell_size)
+    if len(unresolved):
+        best[unresolved] = _kdtree_nearest(xy, n_jobs, points=unresolved)
+
+    return best
+
+
+@traced('neighbor_dist')
+def nearest_neighbor(gdf, name=None, lat_col='latitude', lon_col='longitude',
+                     n_jobs=None, engine='haversine'):
+    '''
+    Function to find the nearest point within same GeoDataFrame.
+
+
+    Input
+    -----
+    gdf : GeoPandas GeoDataFrame, GeoSeries or Pandas DataFrame
+        Assumes that the input Points or coordinate columns are in WGS84
+        projection (latitude and longitude).
+
+
+    Optional input
+    --------------
+    name : str
+        Name for the returned Pandas Series (default=None).
+
+    lat_col : str
+        Name of latitude column, used instead of the geometry if present
+        (default='latitude').
+
+    lon_col : str
+        Name of longitude column, used instead of the geometry if present
+        (default='longitude').
+
+    n_jobs : int
+        Number of threads for the neighbor query (default=None).
+        See `get_nearest`.
+
+    engine : str
+        Neighbor search to use (default='haversine').
+        'haversine' : BallTree with the haversine metric.
+        'projected_kdtree' : project once onto a local plane (see
+            `project_coords`) and query a scipy cKDTree.
+        'grid_hash' : project once and search a uniform grid of buckets,
+            falling back to a cKDTree for the few isolated points.
+        At city scale the projected engines agree with 'haversine' to
+        under a millimeter for neighbors up to 100 meters away (about
+        10 cm for the most isolated trees, 1.3 km away; see
+        `project_coords`), and run several times faster.
+
+
+    Output
+    ------
+    distances : Pandas Series
+        Series with neighbor distances in meters. Index values same as 
+        input GeoDataFrame.
+
+
+    [Code modified from]:
+     https://automating-gis-processes.github.io/site/notebooks/L3/nearest-neighbor-faster.html
+
+    '''
+
+    # parse coordinates into a numpy array as RADIANS
+    # NOTE: haversine expects (latitude, longitude) ordering
+    radians = coords_to_radians(gdf, lat_col=lat_col, lon_col=lon_col)
+
+    if engine == 'haversine':
+
+        # find the nearest points
+        # -----------------------
+        # tree ==> index that corresponds to the tree whose closest neighbor
+        # is being measured
+        # neighbor_dist ==> distance to tree's closest neighbor (in radians)
+
+        tree, neighbor_dist = get_nearest(src_points=radians,
+                                          candidates=radians, n_jobs=n_jobs)
+
+        # convert to meters from radians
+        neighbor_dist = neighbor_dist * EARTH_RADIUS
+
+    elif engine == 'projected_kdtree':
+        neighbor_dist = (_kdtree_nearest(project_coords(radians), n_jobs)
+                         / _local_scale(radians))
+
+    elif engine == 'grid_hash':
+        neighbor_dist = (_grid_hash_nearest(project_coords(radians), n_jobs)
+                         / _local_scale(radians))
+
+    else:
+        raise ValueError(f"engine must be 'haversine', 'projected_kdtree' "
+                         f"or 'grid_hash', not {engine!r}")
+
+    # convert into a pandas series, using index from input gdf
+    distances = pd.Series(neighbor_dist, index=gdf.index, name=name)
+
+    # output geodataframe with new column
+    return distances
+
+
+# census-wide spatial features
+@traced()
+def add_spatial_features(trees, n_jobs=None, engine='haversine'):
+    '''
+    Function to add the log of each tree's block count and the distance
+    to its nearest neighbor.
+
+    Both depend on every other tree in the census, so run this on the
+    full census (professional and volunteer entries) before selecting
+    rows.
+
+
+    Input
+    -----
+    trees : Pandas DataFrame
+        Census data with 'block_id', 'latitude' and 'longitude' columns.
+
+
+    Optional input
+    --------------
+    n_jobs : int
+        Passed to `nearest_neighbor` (default=None).
+
+    engine : str
+        Passed to `nearest_neighbor` (default='haversine').
+
+
+    Output
+    ------
+    NONE : Adds 'log_block_count' and 'neighbor_dist' columns in place!
+
+    '''
+
+    # total count of the trees on each row's block, without a merge
+    with trace_stage('block_count', rows_in=len(trees)):
+        block_counts = trees['block_id'].map(trees['block_id'].value_counts())
+        trees['log_block_count'] = np.log(
+            block_counts.to_numpy(dtype=np.float64))
+
+    # distance to closest tree (in meters)
+    trees['neighbor_dist'] = nearest_neighbor(trees, n_jobs=n_jobs,
+                                              engine=engine)
+
+
+# neighborhood density and composition features
+@traced()
+def neighborhood_features(trees, radii=(10, 25, 50, 100), k=5,
+                          same_cols=('species',), share_cols=('health',),
+                          index=None, n_jobs=None, chunk_size=50000,
+                          engine='haversine'):
+    '''
+    Function to describe each tree's surroundings: how many trees are
+    within several radii, how far its k nearest neighbors are, and what
+    those neighbors are.
+
+    All features come from one batched pass over a single spatial index:
+    radius queries only count (no per-tree lists of neighbors), and the
+    k nearest neighbors' attributes are aggregated as integer codes.
+    The tree itself is never counted as its own neighbor.
+
+
+    Input
+    -----
+    trees : Pandas DataFrame
+        Census data with 'latitude' and 'longitude' columns, plus any
+        `same_cols` and `share_cols`.
+
+
+    Optional input
+    --------------
+    radii : tuple (float)
+        Radii (in meters) to count trees within
+        (default=(10, 25, 50, 100)).
+
+    k : int
+        Number of nearest neighbors to average distances over and to
+        compute shares from (default=5).
+
+    same_cols : tuple (str)
+        Columns to compute the share of neighbors with the same value as
+        the tree for (default=('species',)).
+
+    share_cols : tuple (str)
+        Columns to compute the share of neighbors with each value for
+        (default=('health',)).
+
+    index : TreeIndex
+        Index built over `trees`, in the same row order, to reuse with
+        the 'haversine' engine (default=None, i.e. build one).
+
+    n_jobs : int
+        Number of threads querying chunks of trees (default=None).
+        See `get_nearest`.
+
+    chunk_size : int
+        Number of trees per query (default=50000).
+
+    engine : str
+        Spatial index to use (default='haversine').
+        'haversine' : a `TreeIndex` (BallTree with the haversine metric).
+        'projected_kdtree' : project once onto a local plane (see
+            `project_coords`) and query a scipy cKDTree, several times
+            faster city-wide. Distances agree with 'haversine' to under
+            a millimeter up to 100 meters, so only trees right at a
+            radius can be counted differently.
+
+
+    Output
+    ------
+    features : Pandas DataFrame
+        Index same as `trees`, with columns
+        'count_<radius>m' : other trees within each radius
+        'mean_neighbor_dist' : mean distance to the k nearest (in meters)
+        'same_<col>_share' : for each of `same_cols`
+        '<col>_<value>_share' : for each of `share_cols` and its values
+
+
+    NOTE: Shares of a label column (e.g. health) use the neighbors'
+    labels, never the tree's own.
+
+    '''
+
+    radians = coords_to_radians(trees)
+    n_trees = len(radians)
+
+    # counts within a radius and k nearest, in meters, for a chunk
+    if engine == 'haversine':
+        if index is None:
+            index = TreeIndex(radians)
+        points = radians
+
+        def count_within(chunk, radius, start):
+            return index.query_radius(chunk, radius, count_only=True)
+
+        def nearest(chunk, k, start):
+            return index.query(chunk, k)
+
+    elif engine == 'projected_kdtree':
+        from scipy.spatial import cKDTree
+
+        points = project_coords(radians)
+        scales = _local_scale(radians)
+        kdtree = cKDTree(points)
+
+        # planar distances are true distances times the local scale
+        def count_within(chunk, radius, start):
+            return kdtree.query_ball_point(
+                chunk, radius * scales[start:start + len(chunk)],
+                return_length=True)
+
+        def nearest(chunk, k, start):
+            distances, neighbors = kdtree.query(chunk, k=k)
+            return (distances / scales[start:start + len(chunk), None],
+                    neighbors)
+
+    else:
+        raise ValueError(f"engine must be 'haversine' or 'projected_kdtree', "
+                         f"not {engine!r}")
+
+    # integer codes of the columns to aggregate
+    same_codes = {col: pd.factorize(trees[col], use_na_sentinel=False)[0]
+                  for col in same_cols}
+    share_codes = {col: pd.factorize(trees[col], sort=True,
+                                     use_na_sentinel=False)
+                   for col in share_cols}
+
+    features = {f'count_{radius:g}m': np.empty(n_trees, dtype=np.int32)
+                for radius in radii}
+    features['mean_neighbor_dist'] = np.empty(n_trees)
+    features.update({f'same_{col}_share': np.empty(n_trees)
+                     for col in same_cols})
+    for col, (_, levels) in share_codes.items():
+        features.update({_dummy_name(col, level) + '_share': np.empty(n_trees)
+                         for level in levels})
+
+    def query_chunk(start):
+        stop = min(start + chunk_size, n_trees)
+        chunk = points[start:stop]
+
+        # counts include the tree itself
+        for radius in radii:
+            features[f'count_{radius:g}m'][start:stop] = count_within(
+                chunk, radius, start) - 1
+
+        # k nearest others: drop the tree itself, which may come after
+        # trees at the same spot (or not at all, if there are many)
+        distances, neighbors = nearest(chunk, k + 1, start)
+        keep = neighbors != np.arange(start, stop)[:, None]
+        keep[keep.all(axis=1), -1] = False
+        neighbors = neighbors[keep].reshape(-1, k)
+        features['mean_neighbor_dist'][start:stop] = distances[:, 1:].mean(axis=1)
+
+        for col, codes in same_codes.items():
+            features[f'same_{col}_share'][start:stop] = (
+                codes[neighbors] == codes[start:stop, None]).mean(axis=1)
+
+        # count neighbor values per tree with one bincount
+        rows = np.arange(stop - start)[:, None]
+        for col, (codes, levels) in share_codes.items():
+            counts = np.bincount(
+                (rows * len(levels) + codes[neighbors]).ravel(),
+                minlength=(stop - start) * len(levels))
+            shares = counts.reshape(-1, len(levels)) / k
+            for i, level in enumerate(levels):
+                features[_dummy_name(col, level) + '_share'][start:stop] = \
+                    shares[:, i]
+
+    n_jobs = _effective_n_jobs(n_jobs)
+    with ThreadPoolExecutor(max_workers=n_jobs) as executor:
+        # consume the iterator so worker exceptions are raised here
+        list(executor.map(query_chunk, range(0, n_trees, chunk_size)))
+
+    return pd.DataFrame(features, index=trees.index)
+
+
+# spatial features kept up to date as trees are added or removed
+class SpatialFeatureStore:
+    '''
+    Block counts and nearest-neighbor distances for a changing set of
+    trees, keyed by tree id. Inserting or deleting trees only updates the
+    affected blocks and the trees whose nearest neighbor changes, and the
+    result matches `add_spatial_features` on the current trees.
+
+    Points are bucketed into a grid of `cell_size` meter cells (see
+    `project_coords`), and distances are exact haversine distances. A
+    tree's nearest neighbor within reach of a cell is always in the
+    surrounding 3x3 cells; the few trees farther from their neighbor
+    than that are kept in a separate list and checked on every insert.
+
+
+    Input
+    -----
+    trees : Pandas DataFrame
+        Census data with 'block_id', 'latitude' and 'longitude' columns,
+        and tree ids in `id_col` or the index.
+
+
+    Optional input
+    --------------
+    id_col : str
+        Column with unique tree ids (default='tree_id'). The index is
+        used if there is no such column.
+
+    cell_size : float
+        Grid cell size in meters (default=100). Trees farther than about
+        this from their nearest neighbor are checked on every insert.
+
+
+    Attributes
+    ----------
+    block_counts : dict
+        Number of current trees on each block.
+
+
+    NOTE: The grid uses a fixed projection, so points should stay within
+    a city-sized area.
+
+    '''
+
+    # slack for the projection's scale error (a fraction of a percent)
+    _PROJECTION_SLACK = 1.01
+
+    # rings of cells searched around a tree before searching all trees
+    _MAX_RINGS = 16
+
+    def __init__(self, trees, id_col='tree_id', cell_size=100):
+
+        self.id_col = id_col
+        self.cell_size = float(cell_size)
+        self._reach = self.cell_size / self._PROJECTION_SLACK
+
+        ids = self._ids(trees)
+        radians = coords_to_radians(trees)
+        self._center_lat = radians[:, 0].mean()
+        n_trees = len(ids)
+
+        # per-slot arrays, grown as trees are inserted
+        self._slots = dict(zip(ids, range(n_trees)))
+        if len(self._slots) != n_trees:
+            raise ValueError(f'{id_col} values must be unique')
+        self._ids_by_slot = np.array(ids, dtype=object)
+        self._radians = radians
+        self._xy = project_coords(radians, self._center_lat)
+        self._cells = self._cell_keys(self._xy)
+        self._blocks = trees['block_id'].to_numpy().copy()
+        self._alive = np.ones(n_trees, dtype=bool)
+
+        self.block_counts = pd.Series(self._blocks).value_counts().to_dict()
+
+        # bucket slots by grid cell
+        self._grid = {}
+        for slot, cell in enumerate(map(tuple, self._cells.tolist())):
+            self._grid.setdefault(cell, []).append(slot)
+
+        # nearest neighbors, skipping each point's own match (a duplicate
+        # location may come first)
+        distances, indices = TreeIndex(radians).query(radians, k=2)
+        own = indices[:, 0] == np.arange(n_trees)
+        self._nn_dist = distances[:, 1]
+        self._nn_slot = np.where(own, indices[:, 1], indices[:, 0])
+        self._isolated = np.flatnonzero(self._nn_dist > self._reach)
+
+    def __len__(self):
+        return len(self._slots)
+
+    def __contains__(self, tree_id):
+        return tree_id in self._slots
+
+    @traced()
+    def insert(self, trees):
+        '''
+        Add trees and update the features they affect.
+
+
+        Input
+        -----
+        trees : Pandas DataFrame
+            New trees, with the same columns as at construction.
+
+
+        Output
+        ------
+        changed : Pandas Index
+            Ids of current trees whose features changed, including the
+            new trees.
+
+        '''
+
+        ids = self._ids(trees)
+        clash = [tree_id for tree_id in ids if tree_id in self._slots]
+        if clash or len(set(ids)) != len(ids):
+            raise ValueError(f'tree ids already present or repeated: '
+                             f'{clash[:5] or list(ids)[:5]}')
+
+        # grow the per-slot arrays
+        radians = coords_to_radians(trees)
+        start = len(self._alive)
+        new_slots = np.arange(start, start + len(ids))
+        blocks = trees['block_id'].to_numpy()
+        self._slots.update(zip(ids, new_slots.tolist()))
+        self._ids_by_slot = np.concatenate(
+            [self._ids_by_slot, np.array(ids, dtype=object)])
+        xy = project_coords(radians, self._center_lat)
+        self._radians = np.concatenate([self._radians, radians])
+        self._xy = np.concatenate([self._xy, xy])
+        self._cells = np.concatenate([self._cells, self._cell_keys(xy)])
+        self._blocks = np.concatenate([self._blocks, blocks])
+        self._alive = np.concatenate([self._alive,
+                                      np.zeros(len(ids), dtype=bool)])
+        # set when each tree is added below
+        self._nn_dist = np.concatenate([self._nn_dist, np.zeros(len(ids))])
+        self._nn_slot = np.concatenate([self._nn_slot,
+                                        np.full(len(ids), -1)])
+
+        changed = set(new_slots.tolist())
+        for slot in new_slots.tolist():
+            self._add_slot(slot)
+
+            # trees now closer to the new tree than to their old neighbor
+            candidates = np.concatenate([self._nearby(slot),
+                                         self._isolated_near(slot)])
+            candidates = candidates[candidates != slot]
+            distances = self._distances(slot, candidates)
+            closer = distances < self._nn_dist[candidates]
+            for neighbor, distance in zip(candidates[closer].tolist(),
+                                          distances[closer].tolist()):
+                self._set_nearest(neighbor, slot, distance)
+                changed.add(neighbor)
+
+            # the new tree's own neighbor
+            self._set_nearest(slot, *self._nearest(slot))
+
+        for block in blocks.tolist():
+            self.block_counts[block] = self.block_counts.get(block, 0) + 1
+
+        return self._changed(changed, set(blocks.tolist()))
+
+    @traced()
+    def delete(self, tree_ids):
+        '''
+        Remove trees and update the features they affect.
+
+
+        Input
+        -----
+        tree_ids : list-like
+            Ids of the trees to remove.
+
+
+        Output
+        ------
+        changed : Pandas Index
+            Ids of remaining trees whose features changed.
+
+        '''
+
+        # check every id before changing anything
+        tree_ids = list(tree_ids)
+        missing = [tree_id for tree_id in tree_ids if tree_id not in self._slots]
+        if missing:
+            raise KeyError(f'unknown tree ids: {missing[:5]}')
+        repeated = pd.Index(tree_ids)
+        repeated = repeated[repeated.duplicated()]
+        if len(repeated):
+            raise ValueError(f'tree ids repeated: {repeated[:5].tolist()}')
+
+        slots = np.array([self._slots.pop(tree_id) for tree_id in tree_ids],
+                         dtype=np.int64)
+
+        for slot in slots.tolist():
+            self._alive[slot] = False
+            self._grid[tuple(self._cells[slot].tolist())].remove(slot)
+
+        # trees that lost their nearest neighbor
+        orphans = np.flatnonzero(np.isin(self._nn_slot, slots) & self._alive)
+        for slot in orphans.tolist():
+            self._set_nearest(slot, *self._nearest(slot))
+
+        blocks = self._blocks[slots]
+        for block in blocks.tolist():
+            self.block_counts[block] -= 1
+            if not self.block_counts[block]:
+                del self.block_counts[block]
+
+        return self._changed(set(orphans.tolist()), set(blocks.tolist()))
+
+    def features(self):
+        '''
+        Current features, as `add_spatial_features` would compute them.
+
+
+        Output
+        ------
+        features : Pandas DataFrame
+            'log_block_count' and 'neighbor_dist' (in meters), indexed by
+            tree id.
+
+        '''
+
+        slots = np.flatnonzero(self._alive)
+        block_counts = pd.Series(self._blocks[slots]).map(self.block_counts)
+
+        return pd.DataFrame(
+            {'log_block_count': np.log(block_counts.to_numpy(dtype=np.float64)),
+             'neighbor_dist': self._nn_dist[slots]},
+            index=pd.Index(self._ids_by_slot[slots], name=self.id_col))
+
+    def _ids(self, trees):
+        if self.id_col in trees.columns:
+            return trees[self.id_col].tolist()
+        return trees.index.tolist()
+
+    def _cell_keys(self, xy):
+        '''
+        (column, row) grid cell of each projected point.
+        '''
+        return np.floor(xy / self.cell_size).astype(np.int64)
+
+    def _add_slot(self, slot):
+        self._alive[slot] = True
+        self._grid.setdefault(tuple(self._cells[slot].tolist()),
+                              []).append(slot)
+
+    def _nearby(self, slot):
+        '''
+        Current trees in the 3x3 cells around a slot.
+        '''
+        col, row = self._cells[slot].tolist()
+        nearby = [self._grid.get((col + d_col, row + d_row), [])
+                  for d_row in (-1, 0, 1) for d_col in (-1, 0, 1)]
+        return np.fromiter(itertools.chain.from_iterable(nearby),
+                           dtype=np.int64)
+
+    def _distances(self, slot, others):
+        '''
+        Haversine distances (in meters) from a slot to other slots.
+        '''
+        lat, lon = self._radians[slot]
+        other_lat, other_lon = self._radians[others].T
+        a = (np.sin((other_lat - lat) / 2) ** 2
+             + np.cos(lat) * np.cos(other_lat)
+             * np.sin((other_lon - lon) / 2) ** 2)
+        return 2 * np.arcsin(np.sqrt(a)) * EARTH_RADIUS
+
+    def _nearest(self, slot):
+        '''
+        Closest other current tree to a slot, as (slot, distance).
+        '''
+        col, row = self._cells[slot].tolist()
+        best_slot, best = -1, np.inf
+
+        # search rings of cells outwards; everything beyond ring r is at
+        # least r cells away
+        for ring in range(self._MAX_RINGS + 1):
+            if ring:
+                cells = [(col + d_col, row + d_row)
+                         for d_row in range(-ring, ring + 1)
+                         for d_col in ((-ring, ring) if abs(d_row) < ring
+                                       else range(-ring, ring + 1))]
+            else:
+                cells = [(col, row)]
+            candidates = np.fromiter(itertools.chain.from_iterable(
+                self._grid.get(cell, []) for cell in cells), dtype=np.int64)
+            candidates = candidates[candidates != slot]
+
+            if len(candidates):
+                distances = self._distances(slot, candidates)
+                closest = distances.argmin()
+                if distances[closest] < best:
+                    best_slot, best = candidates[closest], distances[closest]
+            if best <= ring * self._reach:
+                return (best_slot, best)
+
+        # far from every tree: search all of them
+        candidates = np.flatnonzero(self._alive)
+        candidates = candidates[candidates != slot]
+        if not len(candidates):
+            return (-1, np.inf)
+        distances = self._distances(slot, candidates)
+        closest = distances.argmin()
+
+        return (candidates[closest], distances[closest])
+
+    def _isolated_near(self, slot):
+        '''
+        Isolated trees that may be closer to a slot than to their
+        neighbor, using planar distances with slack as a cheap filter.
+        '''
+
+        # drop trees deleted or no longer isolated since they were added
+        isolated = self._isolated
+        current = self._alive[isolated] & (self._nn_dist[isolated] > self._reach)
+        if len(isolated) > 2 * current.sum() + 1024:
+            self._isolated = isolated = np.unique(isolated[current])
+        else:
+            isolated = isolated[current]
+
+        planar = np.hypot(*(self._xy[isolated] - self._xy[slot]).T)
+        return isolated[planar < self._nn_dist[isolated]
+                        * self._PROJECTION_SLACK]
+
+    def _set_nearest(self, slot, neighbor, distance):
+        # list trees becoming isolated; stale entries are dropped lazily
+        if distance > self._reach >= self._nn_dist[slot]:
+            self._isolated = np.append(self._isolated, slot)
+        self._nn_slot[slot] = neighbor
+        self._nn_dist[slot] = distance
+
+    def _changed(self, slots, blocks):
+        '''
+        Ids of current trees in `slots` or on one of `blocks`.
+        '''
+        on_blocks = np.flatnonzero(np.isin(self._blocks, list(blocks))
+                                   & self._alive)
+        slots = np.union1d(np.fromiter(slots, dtype=np.int64), on_blocks)
+        slots = slots[self._alive[slots]]
+        return pd.Index(self._ids_by_slot[slots], name=self.id_col)
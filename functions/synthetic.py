@@ -0,0 +1,374 @@
+'''
+Seeded synthetic street tree census with the real schema, for
+benchmarks and examples without the census CSV.
+'''
+
+# standard libraries
+import pandas as pd
+import numpy as np
+
+from .census import CENSUS_COLUMNS, CENSUS_DTYPES
+
+
+# borough: (code, community boards, NTAs, share of live trees,
+# (south, west, north, east), zip codes, zip cities)
+_BOROUGHS = {
+    'Manhattan': (1, 12, 29, .096, (40.700, -74.020, 40.880, -73.910),
+                  (10001, 10282), ['New York']),
+    'Bronx': (2, 12, 38, .124, (40.800, -73.930, 40.910, -73.770),
+              (10451, 10475), ['Bronx']),
+    'Brooklyn': (3, 18, 51, .260, (40.575, -74.040, 40.740, -73.860),
+                 (11201, 11256), ['Brooklyn']),
+    'Queens': (4, 14, 58, .365, (40.545, -73.960, 40.800, -73.700),
+               (11004, 11697), ['Astoria', 'Flushing', 'Forest Hills',
+                                'Jamaica', 'Ridgewood']),
+    'Staten Island': (5, 3, 19, .155, (40.500, -74.250, 40.645, -74.055),
+                      (10301, 10314), ['Staten Island']),
+}
+
+_NTA_PREFIXES = {'Manhattan': 'MN', 'Bronx': 'BX', 'Brooklyn': 'BK',
+                 'Queens': 'QN', 'Staten Island': 'SI'}
+
+# census bounding box (south, west, north, east)
+_NYC_BOUNDS = (40.4960, -74.2557, 40.9155, -73.7004)
+
+# street block size in degrees (about 90 m x 200 m) and meters
+_BLOCK_DEGREES = (0.0008, 0.0024)
+_BLOCK_METERS = (89.0, 202.0)
+
+# the 10 most common species and their share of live trees; the other
+# 122 species share the rest, by a power law of their rank
+_TOP_SPECIES = [
+    ('London planetree', 'Platanus x acerifolia', .133),
+    ('honeylocust', 'Gleditsia triacanthos var. inermis', .099),
+    ('Callery pear', 'Pyrus calleryana', .090),
+    ('pin oak', 'Quercus palustris', .082),
+    ('Norway maple', 'Acer platanoides', .052),
+    ('littleleaf linden', 'Tilia cordata', .046),
+    ('cherry', 'Prunus', .045),
+    ('Japanese zelkova', 'Zelkova serrata', .045),
+    ('ginkgo', 'Ginkgo biloba', .032),
+    ('Sophora', 'Styphnolobium japonicum', .030)]
+_N_SPECIES = 132
+
+# raw values and their shares of live trees
+_CHOICES = {
+    'status': (['Alive', 'Dead', 'Stump'], [.954, .025, .021]),
+    'health': (['Fair', 'Good', 'Poor'], [.142, .818, .040]),
+    'curb_loc': (['OffsetFromCurb', 'OnCurb'], [.04, .96]),
+    'steward': (['1or2', '3or4', '4orMore', 'None'], [.220, .030, .002, .748]),
+    'guards': (['Harmful', 'Helpful', 'None', 'Unsure'],
+               [.034, .087, .870, .009]),
+    'sidewalk': (['Damage', 'NoDamage'], [.29, .71]),
+    'user_type': (['NYC Parks Staff', 'TreesCount Staff', 'Volunteer'],
+                  [.25, .43, .32]),
+}
+
+# problem flags, their share of live trees and name in 'problems'
+_PROBLEMS = {
+    'root_stone': (.210, 'Stones'), 'root_grate': (.005, 'MetalGrates'),
+    'root_other': (.046, 'RootOther'), 'trnk_wire': (.020, 'WiresRope'),
+    'trnk_light': (.002, 'TrunkLights'), 'trnk_other': (.048, 'TrunkOther'),
+    'brnch_ligh': (.090, 'BranchLights'), 'brnch_shoe': (.001, 'Sneakers'),
+    'brnch_othe': (.037, 'BranchOther')}
+
+
+# synthetic census
+def synthetic_census(n, seed=42, raw=False, n_clusters=1000):
+    '''
+    Function to generate a seeded synthetic street tree census with the
+    real schema and roughly the real spatial distribution, species
+    frequencies and health mix.
+
+    Trees are clustered around `n_clusters` neighborhood centers within
+    the boroughs' bounds and placed along the edges of a street block
+    grid, which gives them their 'block_id'. Each neighborhood has its
+    own community board, NTA, districts and zip code.
+
+
+    Input
+    -----
+    n : int
+        Number of trees.
+
+
+    Optional input
+    --------------
+    seed : int
+        Random seed (default=42). The same seed gives the same census.
+
+    raw : bool
+        Whether to return the 42 raw census CSV columns, including dead
+        trees and stumps (default=False), instead of the live trees in
+        `load_census` format.
+
+    n_clusters : int
+        Number of neighborhoods trees are clustered in (default=1000).
+
+
+    Output
+    ------
+    trees : Pandas DataFrame
+        Categorical columns have the same categories for every seed and
+        size, so samples can be concatenated or compared directly.
+
+    '''
+
+    layout = _synthetic_layout(np.random.default_rng(seed), n_clusters)
+    trees = _synthetic_trees(layout, n, np.random.default_rng([seed, 0]),
+                             raw=raw, first_id=180000)
+
+    return trees
+
+
+# synthetic census CSV
+def write_synthetic_census(path, n, seed=42, chunksize=1000000,
+                           n_clusters=1000):
+    '''
+    Function to write a synthetic census (see `synthetic_census`) as a CSV
+    with the raw census schema, a chunk at a time, e.g. to benchmark
+    `load_census` at any size.
+
+
+    Input
+    -----
+    path : str
+        CSV path to write.
+
+    n : int
+        Number of rows, including dead trees and stumps.
+
+
+    Optional input
+    --------------
+    seed : int
+        Random seed (default=42). A file of one chunk has the same rows as
+        `synthetic_census(n, seed, raw=True)`.
+
+    chunksize : int
+        Rows generated and written at a time (default=1000000).
+
+    n_clusters : int
+        Number of neighborhoods trees are clustered in (default=1000).
+
+    '''
+
+    layout = _synthetic_layout(np.random.default_rng(seed), n_clusters)
+
+    for i, start in enumerate(range(0, n, chunksize)):
+        chunk = _synthetic_trees(layout, min(chunksize, n - start),
+                                 np.random.default_rng([seed, i]), raw=True,
+                                 first_id=180000 + start)
+        chunk.to_csv(path, mode='w' if i == 0 else 'a', header=i == 0,
+                     index=False)
+
+
+def _synthetic_layout(rng, n_clusters):
+    '''
+    Neighborhood centers and the administrative codes of each.
+    '''
+
+    boroughs = list(_BOROUGHS)
+    shares = np.array([_BOROUGHS[boro][3] for boro in boroughs])
+    borough = rng.choice(len(boroughs), n_clusters, p=shares / shares.sum())
+
+    layout = {'borough': borough,
+              'latitude': np.zeros(n_clusters),
+              'longitude': np.zeros(n_clusters)}
+    for col in ['cb_num', 'nta', 'zipcode', 'zip_city', 'boro_ct']:
+        layout[col] = np.zeros(n_clusters, dtype=np.int64)
+
+    ntas = []
+    zip_cities = []
+    for b, boro in enumerate(boroughs):
+        code, n_boards, n_ntas, _, bounds, zips, cities = _BOROUGHS[boro]
+        south, west, north, east = bounds
+        in_boro = np.flatnonzero(borough == b)
+        n_boro = len(in_boro)
+
+        layout['latitude'][in_boro] = rng.uniform(south, north, n_boro)
+        layout['longitude'][in_boro] = rng.uniform(west, east, n_boro)
+        layout['cb_num'][in_boro] = code * 100 + rng.integers(1, n_boards + 1,
+                                                              n_boro)
+        layout['nta'][in_boro] = len(ntas) + rng.integers(0, n_ntas, n_boro)
+        layout['zipcode'][in_boro] = rng.integers(zips[0], zips[1] + 1, n_boro)
+        layout['zip_city'][in_boro] = len(zip_cities) + rng.integers(
+            0, len(cities), n_boro)
+        layout['boro_ct'][in_boro] = code * 1000000 + rng.integers(
+            100, 160000, n_boro)
+
+        ntas += [f'{_NTA_PREFIXES[boro]}{i:02d}' for i in range(1, n_ntas + 1)]
+        zip_cities += cities
+
+    layout['cncldist'] = rng.integers(1, 52, n_clusters)
+    layout['st_assem'] = rng.integers(23, 88, n_clusters)
+    layout['st_senate'] = rng.integers(10, 37, n_clusters)
+    layout['ntas'] = ntas
+    layout['zip_cities'] = zip_cities
+
+    return layout
+
+
+def _synthetic_trees(layout, n, rng, raw, first_id):
+    '''
+    `n` trees in the neighborhoods of `layout`, as raw census columns or
+    as live trees in `load_census` format.
+    '''
+
+    # neighborhood of each tree, then a point on its nearest block's edge
+    cluster = rng.integers(0, len(layout['borough']), n)
+    latitude, longitude, block_id = _block_edge_points(
+        layout['latitude'][cluster], layout['longitude'][cluster], rng)
+
+    # every tree is alive unless raw rows are asked for
+    if raw:
+        status = _categorical(rng, 'status', n)
+        alive = np.asarray(status == 'Alive')
+    else:
+        alive = np.ones(n, dtype=bool)
+
+    columns = {}
+    if raw:
+        dates = pd.date_range('2015-05-19', '2016-10-05').strftime('%m/%d/%Y')
+        columns['created_at'] = pd.Categorical.from_codes(
+            rng.integers(0, len(dates), n), dates)
+        columns['tree_id'] = first_id + np.arange(n)
+    columns['block_id'] = block_id
+
+    if raw:
+        columns['the_geom'] = ('POINT (' + pd.Series(longitude).astype(str)
+                               + ' ' + pd.Series(latitude).astype(str) + ')')
+
+    stump = np.asarray(status == 'Stump') if raw else np.zeros(n, dtype=bool)
+    columns['tree_dbh'] = np.where(stump, 0, np.minimum(
+        np.round(rng.gamma(2, 5.7, n)), 450))
+
+    if raw:
+        columns['stump_diam'] = np.where(stump, rng.integers(1, 30, n), 0)
+    columns['curb_loc'] = _categorical(rng, 'curb_loc', n)
+    if raw:
+        columns['status'] = status
+    columns['health'] = _categorical(rng, 'health', n, alive)
+
+    # species with a long tail after the 10 most common
+    top_share = sum(share for _, _, share in _TOP_SPECIES)
+    tail = 1 / np.arange(len(_TOP_SPECIES) + 1, _N_SPECIES + 1) ** 1.5
+    p = np.concatenate([[share for _, _, share in _TOP_SPECIES],
+                        tail / tail.sum() * (1 - top_share)])
+    species = np.where(alive, rng.choice(_N_SPECIES, n, p=p / p.sum()), -1)
+    tail_names = [f'species {i}' for i in range(len(_TOP_SPECIES) + 1,
+                                                 _N_SPECIES + 1)]
+    if raw:
+        columns['spc_latin'] = pd.Categorical.from_codes(
+            species, [latin for _, latin, _ in _TOP_SPECIES] + tail_names)
+    columns['spc_common'] = pd.Categorical.from_codes(
+        species, [common for common, _, _ in _TOP_SPECIES] + tail_names)
+
+    for col in ['steward', 'guards', 'sidewalk']:
+        columns[col] = _categorical(rng, col, n, alive)
+    columns['user_type'] = _categorical(rng, 'user_type', n)
+
+    # problem flags, and their names joined into 'problems'
+    flags = {col: rng.random(n) < share
+             for col, (share, _) in _PROBLEMS.items()}
+    if raw:
+        code = sum(flag.astype(np.int64) << i
+                   for i, flag in enumerate(flags.values()))
+        names = [','.join(name for i, (_, name) in enumerate(_PROBLEMS.values())
+                          if value >> i & 1) or 'None'
+                 for value in range(2 ** len(_PROBLEMS))]
+        columns['problems'] = pd.Categorical.from_codes(
+            np.where(alive, code, -1), names)
+    for col, flag in flags.items():
+        columns[col] = pd.Categorical.from_codes(flag.astype(np.int8),
+                                                 ['No', 'Yes'])
+
+    if raw:
+        columns['address'] = (pd.Series(rng.integers(1, 3000, n)).astype(str)
+                              + ' STREET ' + pd.Series(block_id % 997)
+                              .astype(str))
+        columns['zipcode'] = layout['zipcode'][cluster]
+        columns['zip_city'] = pd.Categorical.from_codes(
+            layout['zip_city'][cluster], layout['zip_cities'])
+    columns['cb_num'] = layout['cb_num'][cluster]
+    if raw:
+        columns['borocode'] = layout['borough'][cluster] + 1
+    columns['boroname'] = pd.Categorical.from_codes(layout['borough'][cluster],
+                                                    list(_BOROUGHS))
+    for col in ['cncldist', 'st_assem', 'st_senate']:
+        columns[col] = layout[col][cluster]
+    columns['nta'] = pd.Categorical.from_codes(layout['nta'][cluster],
+                                               layout['ntas'])
+    if raw:
+        columns['nta_name'] = pd.Categorical.from_codes(
+            layout['nta'][cluster], [f'{nta} neighborhood'
+                                     for nta in layout['ntas']])
+        columns['boro_ct'] = layout['boro_ct'][cluster]
+        columns['state'] = pd.Categorical.from_codes(np.zeros(n, np.int8),
+                                                     ['New York'])
+    columns['Latitude'] = latitude
+    columns['longitude'] = longitude
+
+    # approximate New York State Plane coordinates (in feet)
+    if raw:
+        columns['x_sp'] = 984000 + (longitude + 73.9) * 276900
+        columns['y_sp'] = 200000 + (latitude - 40.7) * 364000
+
+    # raw census dtypes; live trees get the notebooks' names
+    names = list(CENSUS_DTYPES) if raw else list(CENSUS_COLUMNS)
+    trees = pd.DataFrame({col: columns[col] for col in names}).astype(
+        {col: CENSUS_DTYPES[col] for col in names
+         if CENSUS_DTYPES[col] != 'category'})
+    if not raw:
+        trees = trees.rename(columns=CENSUS_COLUMNS)
+        trees['steward'] = trees['steward'].cat.rename_categories(
+            {'4orMore': '5plus'})
+
+    return trees
+
+
+def _categorical(rng, col, n, alive=None):
+    '''
+    Random values of `col` with their census shares, missing where not
+    `alive`.
+    '''
+
+    values, p = _CHOICES[col]
+    codes = rng.choice(len(values), n, p=p)
+    if alive is not None:
+        codes = np.where(alive, codes, -1)
+
+    return pd.Categorical.from_codes(codes, values)
+
+
+def _block_edge_points(center_lat, center_lon, rng, spread=0.006):
+    '''
+    Points scattered around the given centers, moved onto the nearest
+    street block's edge, with the block's id.
+    '''
+
+    south, west, north, east = _NYC_BOUNDS
+    lat = center_lat + rng.normal(0, spread, len(center_lat))
+    lon = center_lon + rng.normal(0, spread / np.cos(np.radians(40.7)),
+                                  len(center_lon))
+    lat = np.clip(lat, south, north - 1e-9)
+    lon = np.clip(lon, west, east - 1e-9)
+
+    # block of each point
+    block_lat, block_lon = _BLOCK_DEGREES
+    row = ((lat - south) // block_lat).astype(np.int64)
+    col = ((lon - west) // block_lon).astype(np.int64)
+    n_cols = int(np.ceil((east - west) / block_lon))
+    block_id = 100000 + row * n_cols + col
+
+    # uniform position along the block's perimeter
+    height, width = _BLOCK_METERS
+    position = rng.uniform(0, 2 * (height + width), len(lat))
+    along_width = np.clip(position, 0, width) - np.clip(
+        position - width - height, 0, width)
+    along_height = np.clip(position - width, 0, height) - np.clip(
+        position - 2 * width - height, 0, height)
+    lat = south + row * block_lat + along_height / height * block_lat
+    lon = west + col * block_lon + along_width / width * block_lon
+
+    return (lat, lon, block_id)
@@ -0,0 +1,347 @@
+'''
+Opt-in timing, memory and row counts of pipeline stages.
+'''
+
+# standard libraries
+import pandas as pd
+
+# stage timing
+import contextlib
+import datetime
+import functools
+import json
+import os
+import threading
+import time
+
+
+# trace recording stages in this process, if any
+_ACTIVE = None
+
+
+# pipeline trace
+class PipelineTrace:
+    '''
+    Class to record wall time, CPU time, peak RSS and rows in/out of each
+    pipeline stage while it is active (between `start` and `stop`, or in
+    a `with PipelineTrace() as trace:` block), then `summary` or `save`
+    them.
+
+    Stages are the helpers of this package (e.g. 'load', 'clean',
+    'block_count', 'neighbor_dist', 'encode', 'scale', 'predict') and any
+    code wrapped in `trace_stage` (e.g. a model's fit). Stages called by
+    other stages are recorded under them, e.g. 'load/clean'. When no
+    trace is active, the helpers only pay one global lookup per call.
+
+    Only the thread that started the trace is recorded; helpers run in
+    worker threads or processes (e.g. by `score_file`) count towards the
+    stage that started them.
+
+
+    Optional input
+    --------------
+    log_path : str
+        If set, each finished stage is appended to this file as a line
+        of JSON (default=None), so a crashed run still leaves a log.
+
+
+    Attributes
+    ----------
+    records : list (dict)
+        One record per finished stage, in order of completion, with
+        'name', 'path', 'depth', 'start_s' (since the trace started),
+        'wall_s', 'cpu_s', 'rss_mb' (at the start), 'peak_rss_delta_mb'
+        (peak RSS during the stage minus 'rss_mb'), 'rows_in' and
+        'rows_out'. Memory is None where /proc is not available.
+
+    '''
+
+    def __init__(self, log_path=None):
+        self.log_path = log_path
+        self.records = []
+        self._stack = []
+        self._thread = None
+        self._started = None
+        self._start = None
+        self._wall_s = None
+
+    def start(self):
+        '''
+        Start recording, e.g. in the first cell of a notebook.
+        '''
+
+        global _ACTIVE
+
+        if _ACTIVE is not None:
+            raise RuntimeError('another PipelineTrace is already active')
+
+        self._thread = threading.get_ident()
+        self._started = datetime.datetime.now(datetime.timezone.utc)
+        self._start = time.perf_counter()
+        _ACTIVE = self
+
+        return self
+
+    def stop(self):
+        '''
+        Stop recording.
+        '''
+
+        global _ACTIVE
+
+        if _ACTIVE is self:
+            _ACTIVE = None
+            self._wall_s = time.perf_counter() - self._start
+
+        return self
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    @contextlib.contextmanager
+    def stage(self, name, rows_in=None):
+        '''
+        Context manager recording the code it wraps as stage `name`.
+
+
+        Input
+        -----
+        name : str
+            Stage name, e.g. 'fit'.
+
+
+        Optional input
+        --------------
+        rows_in : int
+            Rows going into the stage (default=None).
+
+
+        Output
+        ------
+        record : dict
+            The stage's record; set its 'rows_out' inside the block.
+
+        '''
+
+        # the parent's peak so far, before resetting it for this stage
+        rss, peak = _memory_mb()
+        if self._stack and peak is not None:
+            parent = self._stack[-1]
+            parent['_peak'] = max(parent['_peak'], peak)
+        rss = _reset_peak(rss)
+
+        record = {'name': name,
+                  'path': '/'.join([r['name'] for r in self._stack] + [name]),
+                  'depth': len(self._stack),
+                  'start_s': time.perf_counter() - self._start,
+                  'wall_s': None, 'cpu_s': None, 'rss_mb': rss,
+                  'peak_rss_delta_mb': None, 'rows_in': rows_in,
+                  'rows_out': None, '_peak': rss if rss is not None else 0.0}
+        self._stack.append(record)
+        cpu_start = time.process_time()
+        wall_start = time.perf_counter()
+
+        try:
+            yield record
+        finally:
+            record['wall_s'] = time.perf_counter() - wall_start
+            record['cpu_s'] = time.process_time() - cpu_start
+            self._stack.pop()
+
+            # peak since the last reset, or of a stage called by this one
+            _, peak = _memory_mb()
+            if peak is not None and rss is not None:
+                peak = max(peak, record.pop('_peak'))
+                record['peak_rss_delta_mb'] = peak - rss
+                if self._stack:
+                    parent = self._stack[-1]
+                    parent['_peak'] = max(parent['_peak'], peak)
+            else:
+                record.pop('_peak')
+
+            self.records.append(record)
+            if self.log_path is not None:
+                with open(self.log_path, 'a') as f:
+                    f.write(json.dumps(record) + '\n')
+
+    def summary(self):
+        '''
+        Summary table of the trace.
+
+
+        Output
+        ------
+        summary : Pandas DataFrame
+            One row per stage path, in order of first start, with
+            'calls', 'wall_s', 'cpu_s' (totals), 'wall_share' (percent of
+            the trace's wall time), 'peak_rss_delta_mb' (largest),
+            'rows_in' and 'rows_out' (totals).
+
+        '''
+
+        columns = ['calls', 'wall_s', 'cpu_s', 'wall_share',
+                   'peak_rss_delta_mb', 'rows_in', 'rows_out']
+        if not self.records:
+            return pd.DataFrame(columns=columns)
+
+        records = pd.DataFrame(self.records).sort_values('start_s')
+        summary = records.groupby('path', sort=False).agg(
+            calls=('name', 'size'), wall_s=('wall_s', 'sum'),
+            cpu_s=('cpu_s', 'sum'),
+            peak_rss_delta_mb=('peak_rss_delta_mb', 'max'),
+            rows_in=('rows_in', lambda rows: rows.sum(min_count=1)),
+            rows_out=('rows_out', lambda rows: rows.sum(min_count=1)))
+        summary[['rows_in', 'rows_out']] = summary[
+            ['rows_in', 'rows_out']].astype('Int64')
+
+        total = self._total_wall_s()
+        summary['wall_share'] = 100 * summary['wall_s'] / total if total else None
+
+        return summary[columns]
+
+    def save(self, path):
+        '''
+        Write the trace as JSON.
+
+
+        Input
+        -----
+        path : str
+            File path to write.
+
+        '''
+
+        trace = {'started': self._started.isoformat() if self._started
+                 else None,
+                 'pid': os.getpid(), 'wall_s': self._total_wall_s(),
+                 'stages': self.records}
+        with open(path, 'w') as f:
+            json.dump(trace, f, indent=1)
+
+    def _total_wall_s(self):
+        if self._wall_s is not None:
+            return self._wall_s
+        if self._start is not None:
+            return time.perf_counter() - self._start
+        return None
+
+
+# record a block of code as a stage
+def trace_stage(name, rows_in=None):
+    '''
+    Function to record the code in a `with` block as stage `name` of the
+    active `PipelineTrace`, e.g. a model's fit:
+
+        with trace_stage('fit', rows_in=len(X)) as record:
+            model.fit(X, y)
+
+    Does nothing (and `record` is None) when no trace is active.
+    '''
+
+    trace = _ACTIVE
+    if trace is None or trace._thread != threading.get_ident():
+        return contextlib.nullcontext()
+
+    return trace.stage(name, rows_in=rows_in)
+
+
+# record each call of a function as a stage
+def traced(name=None, rows_out=True):
+    '''
+    Decorator recording each call of a function as a stage of the active
+    `PipelineTrace` (named `name`, or the function's name), with rows in
+    from its first argument with a shape and rows out from its result
+    (or the input's, for in-place functions that return None).
+
+    Set `rows_out=False` for functions whose result is not one row per
+    input row (e.g. `column_stats`, one row per column), so no rows out
+    are recorded.
+    '''
+
+    def decorate(func):
+        stage_name = name or func.__qualname__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            trace = _ACTIVE
+            if trace is None or trace._thread != threading.get_ident():
+                return func(*args, **kwargs)
+
+            data = next((arg for arg in args if hasattr(arg, 'shape')), None)
+            rows_in = _n_rows(data)
+            with trace.stage(stage_name, rows_in=rows_in) as record:
+                result = func(*args, **kwargs)
+                if rows_out:
+                    record['rows_out'] = _result_rows(result, data)
+
+            return result
+
+        return wrapper
+
+    return decorate
+
+
+def _result_rows(result, data):
+    '''
+    Rows out of a traced function: of its result, of the first element
+    of a tuple result, or of the input if it returns None (in place).
+    '''
+
+    if result is None:
+        return _n_rows(data)
+    if isinstance(result, tuple) and result:
+        return _n_rows(result[0])
+
+    return _n_rows(result)
+
+
+def _n_rows(data):
+    '''
+    Rows of a DataFrame, Series or array, else None.
+    '''
+
+    shape = getattr(data, 'shape', None)
+    if not shape:
+        return None
+
+    return int(shape[0])
+
+
+def _memory_mb():
+    '''
+    Current and peak RSS of this process in MB, or (None, None) without
+    /proc.
+    '''
+
+    rss = peak = None
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmRSS'):
+                    rss = int(line.split()[1]) / 1024
+                elif line.startswith('VmHWM'):
+                    peak = int(line.split()[1]) / 1024
+    except OSError:
+        pass
+
+    return (rss, peak)
+
+
+def _reset_peak(rss):
+    '''
+    Reset the peak RSS to the current RSS, returning the RSS after the
+    reset (None where that is not possible).
+    '''
+
+    if rss is None:
+        return None
+    try:
+        with open('/proc/self/clear_refs', 'w') as f:
+            f.write('5')
+    except OSError:
+        return None
+
+    return _memory_mb()[0]
@@ -0,0 +1,527 @@
+'''
+Scikit-learn transformers for outlier clipping and model features.
+'''
+
+# standard libraries
+import pandas as pd
+import numpy as np
+
+# custom transformers
+from sklearn.base import BaseEstimator, TransformerMixin
+from sklearn.utils.validation import check_is_fitted
+
+from .features import (CLIP_COLS, DROP_LEVELS, DUMMY_COLS, YES_NO_COLS,
+                       _as_category_values, _dummy_name, column_stats)
+from .tracing import traced
+
+
+# control value of outliers
+@traced()
+def rein_extremes(df, columns, num_std):
+    '''
+    Function to replace outlier values using a multiple of the data's
+    standard deviation.
+
+
+    Input
+    -----
+    df : Pandas DataFrame
+        DataFrame containing target data.
+
+    columns : list (str)
+        Columns to transform.
+
+    num_std : int
+        Number of desired standard deviations from the mean to transform
+        outlier data points.
+
+
+    Output
+    ------
+    NONE : Overwrites the input columns!
+
+
+    NOTE: The bounds come from `df` itself. To clip new data with bounds
+    learned on training data, fit an `OutlierClipper` instead.
+
+    '''
+
+    # learn bounds from df and clip it in place
+    OutlierClipper(columns=columns, num_std=num_std, copy=False).fit_transform(df)
+
+
+# outlier clipping transformer
+class OutlierClipper(BaseEstimator, TransformerMixin):
+    '''
+    Transformer that learns outlier bounds (mean +/- num_std standard
+    deviations) once with `fit`, then clips data to them with `transform`.
+
+    Unlike `rein_extremes`, new data (e.g. volunteer entries) is clipped
+    with the bounds of the data it was fit on (e.g. professional
+    entries), and the fitted clipper can be pickled next to the scaler.
+
+
+    Optional input
+    --------------
+    columns : list (str or int)
+        Columns to clip (default=None, i.e. all columns). Column names
+        for DataFrames, positions for arrays.
+
+    num_std : int
+        Number of standard deviations from the mean to clip at
+        (default=4).
+
+    copy : bool
+        Whether `transform` returns a copy (default=True). Set to False
+        to clip the input in place: arrays must then be float (e.g.
+        float32, which stays float32), other arrays raise a ValueError.
+
+
+    Attributes
+    ----------
+    columns_ : list
+        Columns that are clipped.
+
+    lower_ : numpy array
+        Lower bound of each column in `columns_`.
+
+    upper_ : numpy array
+        Upper bound of each column in `columns_`.
+
+    '''
+
+    def __init__(self, columns=None, num_std=4, copy=True):
+        self.columns = columns
+        self.num_std = num_std
+        self.copy = copy
+
+    @traced()
+    def fit(self, X, y=None):
+        '''
+        Learn the clipping bounds of each column.
+
+
+        Input
+        -----
+        X : Pandas DataFrame or array
+            Training data.
+
+
+        Output
+        ------
+        self : OutlierClipper
+
+        '''
+
+        if isinstance(X, pd.DataFrame):
+            columns = list(X.columns if self.columns is None else self.columns)
+            block = X[columns]
+        else:
+            X = np.asarray(X, dtype=np.float64)
+            columns = list(range(X.shape[1]) if self.columns is None
+                           else self.columns)
+            block = pd.DataFrame(X[:, columns])
+
+        # mean and standard deviation of all columns in one pass
+        stats = column_stats(block)
+        if len(stats) != len(columns):
+            raise ValueError('OutlierClipper columns must all be numeric')
+
+        spread = self.num_std * stats['std'].to_numpy()
+        self.columns_ = columns
+        self.lower_ = stats['mean'].to_numpy() - spread
+        self.upper_ = stats['mean'].to_numpy() + spread
+        self.n_features_in_ = X.shape[1]
+
+        return self
+
+    @traced()
+    def transform(self, X):
+        '''
+        Clip each column to its fitted bounds.
+
+
+        Input
+        -----
+        X : Pandas DataFrame or array
+            Data to clip, with the same columns as the training data.
+
+
+        Output
+        ------
+        X_clipped : Pandas DataFrame or array
+            Same type as `X`. `X` itself if `copy=False`.
+
+        '''
+
+        check_is_fitted(self)
+
+        if isinstance(X, pd.DataFrame):
+            if self.copy:
+                X = X.copy()
+
+            # clip all columns as a single 2-D block
+            X[self.columns_] = np.clip(
+                X[self.columns_].to_numpy(dtype=np.float64),
+                self.lower_, self.upper_)
+
+            return X
+
+        # float arrays are only copied if copy=True, and are clipped in
+        # their own dtype; any other input would clip a copy the caller
+        # never sees
+        if self.copy:
+            X = np.array(X, dtype=np.float64)
+        elif not (isinstance(X, np.ndarray) and X.dtype.kind == 'f'):
+            raise ValueError('OutlierClipper with copy=False clips in place '
+                             'and needs a float numpy array')
+
+        if self.columns_ == list(range(X.shape[1])):
+            np.clip(X, self.lower_, self.upper_, out=X)
+        else:
+            X[:, self.columns_] = np.clip(X[:, self.columns_],
+                                          self.lower_, self.upper_)
+
+        return X
+
+
+# feature engineering shared by training and scoring
+class TreeFeaturizer(BaseEstimator, TransformerMixin):
+    '''
+    Transformer that turns cleaned census rows into the model's feature
+    matrix: reins in outliers, converts binary columns to 0/1, collapses
+    rare species to 'Other' and one-hot encodes the multivariate
+    columns.
+
+    Vocabularies and clipping bounds are learned once with `fit` (on the
+    professional entries), so new data is encoded with exactly the same
+    columns, in the same order, and can be scored without re-running the
+    EDA. Pickle the fitted featurizer alongside the scaler and model.
+
+
+    Optional input
+    --------------
+    min_species_count : int
+        Species with fewer training rows than this are collapsed to
+        'Other' (default=445, as in the notebook, which keeps 65 species
+        of the 444,390 professional entries).
+
+    min_species_share : float
+        Share of the training rows to use as the cutoff instead of
+        `min_species_count`, e.g. 0.001 for 0.1% (default=None).
+
+    species_list : list (str)
+        Fixed list of species to keep, instead of learning it
+        (default=None).
+
+    num_std : int
+        Number of standard deviations from the mean to clip `CLIP_COLS`
+        at (default=4).
+
+    scale : bool
+        Whether to min-max scale `CLIP_COLS` to the training range
+        (default=False). The 0/1 columns are left as they are, which
+        matches a `MinMaxScaler` over every column, without its cost.
+
+    sparse : bool
+        Whether `transform` returns a scipy CSR matrix instead of a dense
+        DataFrame (default=False). Each row has at most 19 non-zero
+        values out of ~147, and sklearn's RandomForestClassifier fits and
+        predicts on CSR input directly. This saves memory; sklearn's
+        sparse tree splitter is slower to fit than the dense one.
+
+
+    Input columns
+    -------------
+    `CLIP_COLS`, 'curb_loc', 'sidewalk', `YES_NO_COLS` and `DUMMY_COLS`.
+    See `add_spatial_features` for 'log_block_count' and
+    'neighbor_dist'. Other columns are ignored.
+
+
+    Attributes
+    ----------
+    categories_ : dict
+        Levels of each column in `DUMMY_COLS`, in output order, excluding
+        the dropped level.
+
+    clipper_ : OutlierClipper
+        Fitted clipper for `CLIP_COLS`.
+
+    feature_names_ : list (str)
+        Names of the output columns.
+
+    data_min_ : numpy array
+        Training minimum of each of `CLIP_COLS`, after clipping.
+
+    data_range_ : numpy array
+        Training range of each of `CLIP_COLS`, after clipping.
+
+    '''
+
+    def __init__(self, min_species_count=445, min_species_share=None,
+                 species_list=None, num_std=4, scale=False, sparse=False):
+        self.min_species_count = min_species_count
+        self.min_species_share = min_species_share
+        self.species_list = species_list
+        self.num_std = num_std
+        self.scale = scale
+        self.sparse = sparse
+
+    @traced('encode_fit')
+    def fit(self, X, y=None):
+        '''
+        Learn vocabularies and clipping bounds.
+
+
+        Input
+        -----
+        X : Pandas DataFrame
+            Training data.
+
+
+        Output
+        ------
+        self : TreeFeaturizer
+
+        '''
+
+        # species common enough to keep
+        if self.species_list is None:
+            counts = X['species'].value_counts()
+            if self.min_species_share is None:
+                cutoff = self.min_species_count
+            else:
+                cutoff = np.ceil(len(X) * self.min_species_share)
+            keep_species = set(counts.index[counts >= cutoff])
+        else:
+            keep_species = set(self.species_list)
+
+        # sorted levels of each multivariate column, as in pd.get_dummies
+        self.categories_ = {}
+        for col in DUMMY_COLS:
+            if col == 'species':
+                levels = keep_species | {'Other'}
+            else:
+                levels = set(_as_category_values(X[col]).unique())
+            levels.discard(DROP_LEVELS[col])
+            self.categories_[col] = sorted(levels)
+
+        self.clipper_ = OutlierClipper(columns=CLIP_COLS,
+                                       num_std=self.num_std).fit(X)
+
+        # range of the clipped continuous columns, for scaling
+        clipped = np.clip(X[CLIP_COLS].to_numpy(dtype=np.float64),
+                          self.clipper_.lower_, self.clipper_.upper_)
+        self.data_min_ = np.nanmin(clipped, axis=0)
+        self.data_range_ = np.nanmax(clipped, axis=0) - self.data_min_
+
+        # fixed column order of the output
+        self.feature_names_ = (
+            ['tree_diameter', 'on_curb', 'sidewalk_damage'] + YES_NO_COLS
+            + ['log_block_count', 'neighbor_dist']
+            + [_dummy_name(col, level) for col in DUMMY_COLS
+               for level in self.categories_[col]])
+
+        return self
+
+    @traced('encode')
+    def transform(self, X):
+        '''
+        Build the feature matrix in a single pass.
+
+
+        Input
+        -----
+        X : Pandas DataFrame
+            Data with the input columns (see class docstring).
+
+
+        Output
+        ------
+        features : Pandas DataFrame (float64) or scipy CSR matrix
+            Columns `feature_names_`. DataFrame index same as `X`.
+
+        '''
+
+        check_is_fitted(self)
+
+        n_rows = len(X)
+        n_numeric = 14
+
+        # continuous and binary columns
+        numeric = np.zeros((n_rows, n_numeric))
+
+        # continuous columns, clipped (and optionally scaled) to the
+        # training bounds
+        clipped = np.clip(X[CLIP_COLS].to_numpy(dtype=np.float64),
+                          self.clipper_.lower_, self.clipper_.upper_)
+        if self.scale:
+            clipped -= self.data_min_
+            clipped /= np.where(self.data_range_ == 0, 1, self.data_range_)
+        numeric[:, 0] = clipped[:, 0]
+        numeric[:, 12:14] = clipped[:, 1:]
+
+        # binary columns
+        numeric[:, 1] = X['curb_loc'].to_numpy() == 'OnCurb'
+        numeric[:, 2] = X['sidewalk'].to_numpy() == 'Damage'
+        numeric[:, 3:12] = X[YES_NO_COLS].to_numpy() == 'Yes'
+
+        # (row, column) of every one-hot 1: unseen, rare and dropped
+        # levels stay all zero
+        dummy_rows = []
+        dummy_cols = []
+        offset = 0
+        for col in DUMMY_COLS:
+            levels = self.categories_[col]
+            codes = pd.Index(levels).get_indexer(_as_category_values(X[col]))
+            known = np.flatnonzero(codes >= 0)
+            dummy_rows.append(known)
+            dummy_cols.append(offset + codes[known])
+            offset += len(levels)
+        dummy_rows = np.concatenate(dummy_rows)
+        dummy_cols = np.concatenate(dummy_cols)
+
+        if self.sparse:
+            from scipy import sparse
+
+            dummies = sparse.csr_matrix(
+                (np.ones(len(dummy_rows)), (dummy_rows, dummy_cols)),
+                shape=(n_rows, offset))
+            return sparse.hstack([sparse.csr_matrix(numeric), dummies],
+                                 format='csr')
+
+        # dense: a single preallocated array
+        features = np.zeros((n_rows, len(self.feature_names_)))
+        features[:, :n_numeric] = numeric
+        features[dummy_rows, n_numeric + dummy_cols] = 1
+
+        return pd.DataFrame(features, index=X.index,
+                            columns=self.feature_names_, copy=False)
+
+
+# quantile binning to one byte per value
+class FeatureBinner(BaseEstimator, TransformerMixin):
+    '''
+    Transformer that learns up to `max_bins` bins per column once with
+    `fit`, then codes data as uint8 bin numbers with `transform`, e.g.
+    the 147-column matrix in an eighth of the memory of float64.
+
+    Columns with at most `max_bins` distinct values (the 0/1 columns)
+    get one bin per value, so no information is lost; continuous columns
+    are cut at quantiles. Bin numbers keep the order of the values, so
+    tree models (e.g. `GoodBooster`) split the codes as they would the
+    values. scikit-learn's histogram boosting still bins its input on
+    every fit; on the codes that binning is exact (one bin per code), so
+    binning up front saves memory and fixes the bins across fits, not
+    the booster's own binning work.
+
+
+    Optional input
+    --------------
+    max_bins : int
+        Maximum number of bins per column, up to 256 (default=255).
+
+    subsample : int
+        Number of rows the quantiles are taken from (default=200000).
+        Column minima and maxima always come from every row.
+
+    random_state : int
+        Seed for the subsample (default=0).
+
+
+    Attributes
+    ----------
+    bin_edges_ : list (numpy array)
+        Edges between the bins of each column, increasing. Values equal
+        to an edge go to the bin above it; missing values go to the last
+        bin.
+
+    '''
+
+    def __init__(self, max_bins=255, subsample=200000, random_state=0):
+        self.max_bins = max_bins
+        self.subsample = subsample
+        self.random_state = random_state
+
+    def fit(self, X, y=None):
+        '''
+        Learn the bin edges of each column.
+
+
+        Input
+        -----
+        X : Pandas DataFrame or array
+            Training data, all numeric.
+
+
+        Output
+        ------
+        self : FeatureBinner
+
+        '''
+
+        if not 2 <= self.max_bins <= 256:
+            raise ValueError(f'max_bins must be between 2 and 256, '
+                             f'not {self.max_bins}')
+
+        X = np.asarray(X, dtype=np.float64)
+        rng = np.random.default_rng(self.random_state)
+        if len(X) > self.subsample:
+            sample = X[np.sort(rng.choice(len(X), self.subsample,
+                                          replace=False))]
+        else:
+            sample = X
+
+        # full-data extremes, so rare one-hot levels are never missed
+        with np.errstate(invalid='ignore'):
+            extremes = np.vstack([np.nanmin(X, axis=0), np.nanmax(X, axis=0)])
+
+        self.bin_edges_ = []
+        for j in range(X.shape[1]):
+            values = np.concatenate([sample[:, j], extremes[:, j]])
+            distinct = np.unique(values[~np.isnan(values)])
+
+            # one bin per value, else cut at quantiles
+            if len(distinct) > self.max_bins:
+                distinct = np.unique(np.quantile(
+                    values[~np.isnan(values)],
+                    np.linspace(0, 1, self.max_bins + 1)))
+                edges = distinct[1:-1]
+            else:
+                edges = (distinct[:-1] + distinct[1:]) / 2
+            self.bin_edges_.append(edges)
+        self.n_features_in_ = X.shape[1]
+
+        return self
+
+    @traced('bin')
+    def transform(self, X):
+        '''
+        Code each value as its bin number.
+
+
+        Input
+        -----
+        X : Pandas DataFrame or array
+            Data with the same columns as the training data.
+
+
+        Output
+        ------
+        codes : numpy array (uint8)
+            Same shape as `X`.
+
+        '''
+
+        check_is_fitted(self)
+
+        X = np.asarray(X)
+        if X.ndim != 2 or X.shape[1] != self.n_features_in_:
+            raise ValueError(f'X must have {self.n_features_in_} columns, '
+                             f'not {X.shape[1:]}')
+
+        codes = np.empty(X.shape, dtype=np.uint8)
+        for j, edges in enumerate(self.bin_edges_):
+            codes[:, j] = np.searchsorted(edges, X[:, j], side='right')
+
+        return codes
@@ -0,0 +1,273 @@
+'''
+Ranking recorded health labels that disagree with the model for
+volunteer verification.
+'''
+
+# standard libraries
+import pandas as pd
+import numpy as np
+
+# bounded top-k queues
+import heapq
+
+from .tracing import traced
+
+
+# trees where the recorded health and the model disagree
+@traced()
+def mismatch_report(y_true, scores, source=None, columns=None, sort=True):
+    '''
+    Function to list the trees whose recorded health differs from the
+    model's prediction, with the model's class probabilities.
+
+
+    Input
+    -----
+    y_true : Pandas Series
+        Recorded health, indexed by row id (e.g. the CSV row number kept
+        by `load_census`).
+
+    scores : Pandas DataFrame
+        Output of `score_trees` or `score_file`: 'prediction' and one
+        'prob_<class>' column per class, with the same row ids.
+
+
+    Optional input
+    --------------
+    source : Pandas DataFrame
+        Original attributes indexed by the same row ids, e.g. from
+        `load_checkpoint` or `load_census(extra_cols=...)`, to join onto
+        the mismatches (default=None).
+
+    columns : list (str)
+        Columns of `source` to join (default=None, i.e. all).
+
+    sort : bool
+        Whether to sort by margin, most confident disagreements first
+        (default=True).
+
+
+    Output
+    ------
+    report : Pandas DataFrame
+        One row per mismatch with 'health' (recorded), 'prediction', the
+        'prob_<class>' columns, 'margin' (probability of the predicted
+        class minus probability of the recorded one) and the joined
+        `source` columns.
+
+    '''
+
+    if not scores.index.equals(y_true.index):
+        scores = scores.reindex(y_true.index)
+
+    # compare all rows at once
+    recorded = np.asarray(y_true, dtype=object)
+    predicted = scores['prediction'].to_numpy(dtype=object)
+    mask = recorded != predicted
+
+    prob_cols = [col for col in scores.columns if col.startswith('prob_')]
+    probabilities = scores[prob_cols].to_numpy()[mask]
+    classes = pd.Index([col[len('prob_'):] for col in prob_cols])
+
+    # probabilities of the predicted and of the recorded class
+    rows = np.arange(len(probabilities))
+    predicted_codes = classes.get_indexer(predicted[mask])
+    recorded_codes = classes.get_indexer(recorded[mask])
+    margin = (probabilities[rows, predicted_codes]
+              - np.where(recorded_codes >= 0,
+                         probabilities[rows, recorded_codes], 0.0))
+
+    report = pd.DataFrame(probabilities, index=y_true.index[mask],
+                          columns=prob_cols)
+    report.insert(0, 'health', recorded[mask])
+    report.insert(1, 'prediction', predicted[mask])
+    report['margin'] = margin
+
+    # join the original attributes by row id
+    if source is not None:
+        if columns is None:
+            columns = [col for col in source.columns if col not in report]
+        report = report.join(source[columns])
+
+    if sort:
+        report = report.sort_values('margin', ascending=False, kind='stable')
+
+    return report
+
+
+# most confident disagreements, overall and per community board
+@traced()
+def verification_queue(chunks, k=1000, k_per_board=100, board_col='cb_num'):
+    '''
+    Function to stream through scored trees and keep only the `k` most
+    confident disagreements between recorded health and the model, and
+    the `k_per_board` most confident in each community board.
+
+    Each kept set is a bounded heap, so memory depends on `k`, not on the
+    number of trees or mismatches.
+
+
+    Input
+    -----
+    chunks : iterable (Pandas DataFrame)
+        Scored trees, e.g. `score_file` output joined with the census
+        attributes: 'health', 'prediction', the 'prob_<class>' columns,
+        `board_col` and any other columns to keep (e.g. 'block_id').
+
+
+    Optional input
+    --------------
+    k : int
+        Number of disagreements to keep overall (default=1000).
+
+    k_per_board : int
+        Number of disagreements to keep per community board
+        (default=100).
+
+    board_col : str
+        Community board column (default='cb_num').
+
+
+    Output
+    ------
+    top : Pandas DataFrame
+        `mismatch_report` rows of the `k` largest margins, largest first.
+
+    top_per_board : Pandas DataFrame
+        `mismatch_report` rows of the `k_per_board` largest margins per
+        board, sorted by board then margin.
+
+    '''
+
+    top = []
+    board_tops = {}
+    columns = None
+    seen = 0
+
+    for chunk in chunks:
+        score_cols = ['prediction'] + [col for col in chunk.columns
+                                       if col.startswith('prob_')]
+        report = mismatch_report(chunk['health'], chunk[score_cols],
+                                 source=chunk, sort=False)
+        columns = report.columns
+        margins = report['margin'].to_numpy()
+        boards = report[board_col].to_numpy()
+
+        # only rows beating the smallest kept margin can enter a full heap
+        threshold = top[0][0] if len(top) >= k else -np.inf
+        board_thresholds = pd.Series(
+            {board: heap[0][0] for board, heap in board_tops.items()
+             if len(heap) >= k_per_board}, dtype=float)
+        board_threshold = (pd.Series(boards).map(board_thresholds)
+                           .fillna(-np.inf).to_numpy())
+        candidates = np.flatnonzero((margins > threshold)
+                                    | (margins > board_threshold))
+
+        # later rows lose ties, so the result does not depend on chunking
+        rows = report.iloc[candidates].itertuples(name=None)
+        for position, (row_id, *row) in zip(candidates, rows):
+            entry = (margins[position], -(seen + position), row_id, row)
+            _push_bounded(top, entry, k)
+            _push_bounded(board_tops.setdefault(boards[position], []), entry,
+                          k_per_board)
+
+        seen += len(chunk)
+
+    top = _heap_frame(top, columns).sort_values('margin', ascending=False,
+                                                kind='stable')
+    top_per_board = _heap_frame(
+        [entry for heap in board_tops.values() for entry in heap], columns)
+    top_per_board = top_per_board.sort_values(
+        [board_col, 'margin'], ascending=[True, False], kind='stable')
+
+    return top, top_per_board
+
+
+def _push_bounded(heap, entry, size):
+    '''
+    Push onto a min-heap, keeping at most `size` entries.
+    '''
+
+    if len(heap) < size:
+        heapq.heappush(heap, entry)
+    elif entry > heap[0]:
+        heapq.heapreplace(heap, entry)
+
+
+def _heap_frame(entries, columns):
+    '''
+    DataFrame of the rows stored in heap entries.
+    '''
+
+    entries = sorted(entries, reverse=True)
+    return pd.DataFrame([entry[3] for entry in entries], columns=columns,
+                        index=[entry[2] for entry in entries])
+
+
+# split a verification queue into daily work batches
+@traced()
+def daily_batches(queue, batch_size=50, group_cols=('cb_num', 'block_id')):
+    '''
+    Function to split a verification queue into daily batches, keeping
+    trees of the same community board and block together so each day's
+    visits are close to each other.
+
+    Boards and blocks are ordered by their largest margin, so the most
+    confident disagreements are checked first. A block only spans two
+    batches if it has more than `batch_size` trees.
+
+
+    Input
+    -----
+    queue : Pandas DataFrame
+        Output of `verification_queue` (or `mismatch_report`).
+
+
+    Optional input
+    --------------
+    batch_size : int
+        Maximum number of trees per batch (default=50).
+
+    group_cols : tuple (str)
+        Columns to keep together, outermost first
+        (default=('cb_num', 'block_id')).
+
+
+    Output
+    ------
+    batches : Pandas DataFrame
+        `queue` reordered, with a 'batch' column numbered from 1.
+
+    '''
+
+    group_cols = list(group_cols)
+
+    # order groups by their best margin, then trees by margin
+    keys = queue[group_cols + ['margin']].copy()
+    sort_cols = []
+    for i, col in enumerate(group_cols):
+        keys[f'_best_{col}'] = queue.groupby(
+            group_cols[:i + 1], observed=True)['margin'].transform('max')
+        sort_cols += [f'_best_{col}', col]
+    order = keys.sort_values(sort_cols + ['margin'],
+                             ascending=[False, True] * len(group_cols) + [False],
+                             kind='stable').index
+    batches = queue.loc[order]
+
+    # pack whole groups into batches, starting a new batch when the next
+    # group does not fit; a group larger than a batch fills several
+    group_sizes = batches.groupby(group_cols, sort=False, dropna=False,
+                                  observed=True).size().to_numpy()
+    tree_batch = np.empty(len(batches), dtype=np.int64)
+    batch, filled, start = 1, 0, 0
+    for size in group_sizes:
+        if filled and filled + size > batch_size:
+            batch, filled = batch + 1, 0
+        while size:
+            if filled == batch_size:
+                batch, filled = batch + 1, 0
+            take = min(size, batch_size - filled)
+            tree_batch[start:start + take] = batch
+            start, filled, size = start + take, filled + take, size - take
+
+    return batches.assign(batch=tree_batch)
@@ -0,0 +1,49 @@
+'''
+Score a file of trees with the final model, for volunteer verification.
+
+The input is read and scored in chunks and each chunk's predictions are
+written as soon as they are ready, so memory stays flat for any input
+size. The input needs the `TreeFeaturizer` columns, including
+`log_block_count` and `neighbor_dist` (see `add_spatial_features`), e.g.
+a `save_checkpoint` stage.
+
+Usage:
+
+    python score_trees.py data/volunteers.parquet data/volunteer_scores.csv \
+        --featurizer data/final_featurizer.pickle \
+        --model data/final_model.pickle --scaler data/final_scaler.pickle \
+        --n-jobs -1
+
+'''
+
+# standard libraries
+import argparse
+import time
+
+from functions import score_file
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawTextHelpFormatter)
+    parser.add_argument('input', help='CSV or Parquet file of trees')
+    parser.add_argument('output', help='CSV or Parquet file for the scores')
+    parser.add_argument('--featurizer', default='data/final_featurizer.pickle')
+    parser.add_argument('--model', default='data/final_model.pickle')
+    parser.add_argument('--scaler', default=None)
+    parser.add_argument('--chunksize', type=int, default=100000)
+    parser.add_argument('--n-jobs', type=int, default=None)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    n_rows = score_file(args.input, args.output, args.featurizer, args.model,
+                        scaler_path=args.scaler, chunksize=args.chunksize,
+                        n_jobs=args.n_jobs)
+    elapsed = time.perf_counter() - start
+
+    print(f'scored {n_rows} rows in {elapsed:.1f} s '
+          f'({n_rows / elapsed:,.0f} rows/s) -> {args.output}')
+
+
+if __name__ == '__main__':
+    main()
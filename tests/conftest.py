@@ -0,0 +1,9 @@
+'''
+Make the repository root importable when running `pytest` from anywhere.
+'''
+
+# standard libraries
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,53 @@
+'''
+`aggregate_health_grid` counts each tree in its own cell and leaves out
+trees without a health value.
+'''
+
+# standard libraries
+import numpy as np
+import pandas as pd
+
+from functions import aggregate_health_grid
+
+
+def test_missing_health_not_counted():
+    # two trees ~1 km apart, and a dead tree (no health) next to the
+    # first one
+    trees = pd.DataFrame({'latitude': [40.70, 40.70001, 40.71],
+                          'longitude': [-73.92, -73.92001, -73.93],
+                          'health': ['Good', np.nan, 'Poor']})
+
+    cells = aggregate_health_grid(trees, zoom=15).sort_values('row')
+
+    assert len(cells) == 2
+    assert cells['n_trees'].tolist() == [1, 1]
+    assert cells['Poor'].tolist() == [1, 0]
+    assert cells['Good'].tolist() == [0, 1]
+    assert cells['good_share'].tolist() == [0.0, 1.0]
+
+
+def test_counts_match_trees():
+    rng = np.random.default_rng(0)
+    trees = pd.DataFrame({
+        'latitude': rng.uniform(40.5, 40.9, 1000),
+        'longitude': rng.uniform(-74.2, -73.7, 1000),
+        'health': rng.choice(['Good', 'Fair', 'Poor', None], 1000)})
+
+    cells = aggregate_health_grid(trees, zoom=13)
+
+    assert cells['n_trees'].sum() == trees['health'].notna().sum()
+    for level in ['Good', 'Fair', 'Poor']:
+        assert cells[level].sum() == (trees['health'] == level).sum()
+
+
+def test_map_links_layers_without_embed():
+    from functions import health_grid_map
+
+    paths = {11: 'tiles/z11.geojson', 15: 'tiles/z15.geojson'}
+    html = health_grid_map(paths, embed=False).get_root().render()
+
+    # each layer is fetched by URL at its own zoom range
+    assert '"url": "tiles/z11.geojson"' in html
+    assert '"max": 14, "min": 0' in html
+    assert '"max": 30, "min": 15' in html
+    assert 'FeatureCollection' not in html
@@ -0,0 +1,115 @@
+'''
+`SpatialFeatureStore` features after inserts and deletes match a full
+`add_spatial_features` recompute on the current trees.
+'''
+
+# standard libraries
+import numpy as np
+import pandas as pd
+import pytest
+
+from functions import SpatialFeatureStore, add_spatial_features, synthetic_census
+
+
+def census_trees(n, start=0, seed=42):
+    trees = synthetic_census(n, seed=seed, n_clusters=20)[
+        ['latitude', 'longitude', 'block_id']]
+    trees.insert(0, 'tree_id', np.arange(start, start + n))
+    return trees
+
+
+def assert_matches_recompute(store, trees):
+    full = trees.set_index('tree_id')[['block_id', 'latitude',
+                                       'longitude']].copy()
+    add_spatial_features(full)
+    features = store.features()
+
+    assert len(store) == len(full)
+    assert set(features.index) == set(full.index)
+    features = features.loc[full.index]
+    np.testing.assert_allclose(features['neighbor_dist'],
+                               full['neighbor_dist'], rtol=1e-9, atol=1e-9)
+    np.testing.assert_array_equal(features['log_block_count'],
+                                  full['log_block_count'])
+
+
+@pytest.fixture
+def trees():
+    return census_trees(2000)
+
+
+def test_build_matches_recompute(trees):
+    assert_matches_recompute(SpatialFeatureStore(trees), trees)
+
+
+def test_insert(trees):
+    store = SpatialFeatureStore(trees)
+    new = census_trees(200, start=len(trees), seed=1)
+
+    store.insert(new)
+
+    assert_matches_recompute(store, pd.concat([trees, new],
+                                              ignore_index=True))
+
+
+def test_delete(trees):
+    store = SpatialFeatureStore(trees)
+    removed = np.random.default_rng(0).choice(trees['tree_id'], 200,
+                                              replace=False)
+
+    store.delete(removed)
+
+    assert_matches_recompute(store, trees[~trees['tree_id'].isin(removed)])
+
+
+def test_duplicate_coordinates(trees):
+    store = SpatialFeatureStore(trees)
+
+    # new trees on top of existing ones are 0 m from them
+    new = census_trees(20, start=len(trees), seed=2)
+    new[['latitude', 'longitude']] = trees[['latitude', 'longitude']].iloc[
+        :20].to_numpy()
+    store.insert(new)
+    current = pd.concat([trees, new], ignore_index=True)
+    assert_matches_recompute(store, current)
+    assert (store.features().loc[new['tree_id'], 'neighbor_dist'] == 0).all()
+
+    # removing the originals moves their copies' nearest neighbor away
+    store.delete(trees['tree_id'].iloc[:20])
+    assert_matches_recompute(store, current.iloc[20:])
+
+
+def test_isolated_point(trees):
+    store = SpatialFeatureStore(trees, cell_size=100)
+
+    # a tree kilometers from the rest, then a neighbor for it, then both
+    # removed again
+    far = census_trees(2, start=len(trees), seed=3)
+    far['latitude'] = trees['latitude'].max() + np.array([0.05, 0.0501])
+    far['longitude'] = trees['longitude'].mean()
+
+    store.insert(far.iloc[:1])
+    assert_matches_recompute(store, pd.concat([trees, far.iloc[:1]],
+                                              ignore_index=True))
+
+    store.insert(far.iloc[1:])
+    assert_matches_recompute(store, pd.concat([trees, far],
+                                              ignore_index=True))
+
+    store.delete(far['tree_id'])
+    assert_matches_recompute(store, trees)
+
+
+def test_bad_delete_leaves_store(trees):
+    store = SpatialFeatureStore(trees)
+    ids = trees['tree_id'].iloc[:3].tolist()
+
+    # a repeated or unknown id fails before any tree is removed
+    with pytest.raises(ValueError):
+        store.delete(ids + ids[:1])
+    with pytest.raises(KeyError):
+        store.delete(ids + [-1])
+    assert_matches_recompute(store, trees)
+
+    store.delete(ids)
+    assert_matches_recompute(store, trees.iloc[3:])
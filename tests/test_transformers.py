@@ -0,0 +1,68 @@
+'''
+`OutlierClipper` clips to its fitted bounds, in place with `copy=False`,
+and the default `TreeFeaturizer` has the notebook's columns.
+'''
+
+# standard libraries
+import numpy as np
+import pandas as pd
+import pytest
+
+from functions import (OutlierClipper, TreeFeaturizer, add_spatial_features,
+                       synthetic_census)
+
+
+def _fitted_clipper(**params):
+    rng = np.random.default_rng(0)
+    return OutlierClipper(num_std=2, **params).fit(rng.normal(size=(1000, 3)))
+
+
+def test_copy_false_clips_float32_in_place():
+    clipper = _fitted_clipper(copy=False)
+    X = np.array([[10, -10, 0]], dtype=np.float32)
+
+    out = clipper.transform(X)
+
+    assert out is X
+    assert X.dtype == np.float32
+    np.testing.assert_allclose(X[0, :2], [clipper.upper_[0], clipper.lower_[1]],
+                               rtol=1e-6)
+    assert X[0, 2] == 0
+
+
+def test_copy_false_rejects_non_float():
+    clipper = _fitted_clipper(copy=False)
+
+    with pytest.raises(ValueError):
+        clipper.transform(np.array([[10, -10, 0]]))
+    with pytest.raises(ValueError):
+        clipper.transform([[10.0, -10.0, 0.0]])
+
+
+def test_copy_leaves_input():
+    clipper = _fitted_clipper()
+    X = np.array([[10, -10, 0]], dtype=np.float32)
+
+    out = clipper.transform(X)
+
+    assert X[0, 0] == 10
+    assert out.dtype == np.float64
+    assert out[0, 0] == clipper.upper_[0]
+
+
+def test_default_featurizer_matches_notebook_columns():
+    # 65 species with 445 trees each (kept by the notebook's cutoff), one
+    # with 444 and the rest with fewer
+    trees = synthetic_census(30000)
+    add_spatial_features(trees)
+    names = trees['species'].cat.categories
+    species = np.repeat(names[:65], 445).tolist() + [names[65]] * 444
+    rest = len(trees) - len(species)
+    species += np.resize(names[66:], rest).tolist()
+    trees['species'] = pd.Categorical(species, categories=names)
+
+    featurizer = TreeFeaturizer().fit(trees)
+
+    assert featurizer.categories_['species'] == sorted(names[:65])
+    assert len(featurizer.feature_names_) == 147
+    assert featurizer.transform(trees).shape == (len(trees), 147)